@@ -0,0 +1,203 @@
+"""
+Load Test
+
+Drives many concurrent SSE sessions against an in-process server whose prompts are
+answered by a simulated human, and reports tool latency percentiles, throughput,
+memory and event-loop lag. Everything runs on localhost, so it also runs offline in
+pytest to catch regressions before upgrading mcp, rich or questionary.
+
+Every call asks its own question, so each one reaches the simulated human. With
+--coalesce, all sessions ask the same few questions instead, which measures how well
+identical questions in flight are answered together.
+
+Usage:
+    python -m benchmarks.load_test [--sessions 20] [--calls 10]
+        [--think exponential] [--think-ms 5] [--coalesce]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import time
+import tracemalloc
+from typing import Dict, List, Optional, TypedDict
+from unittest.mock import patch
+
+from rich.console import Console
+from rich.table import Table
+
+from src.loop_lag import LoopLagMonitor
+from src.terminal import console as terminal_console
+
+from .simulated_human import THINK_TIME_KINDS, SimulatedHuman, think_time
+from .transport_benchmark import Variant, _connect, _percentile, _serve
+
+console = Console()
+
+# How often the loop-lag monitor wakes up
+LAG_INTERVAL_SECONDS = 0.01
+
+# Tool calls each session cycles through, covering every prompt type; the questions
+# are made unique per session and call unless identical ones should be coalesced
+CALLS = [
+    ("request_free_form_input", {"question": "Which branch should I use?"}),
+    ("request_yes_no_input", {"question": "Proceed with the migration?"}),
+    (
+        "request_multiple_choice_input",
+        {"question": "Which database?", "options": ["Postgres", "MySQL"]},
+    ),
+]
+
+
+class LoadResult(TypedDict):
+    sessions: int
+    calls: int
+    errors: int
+    seconds: float
+    calls_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_memory_mb: Optional[float]
+    loop_lag_p99_ms: float
+    loop_lag_max_ms: float
+
+
+async def _session(
+    url: str, number: int, calls: int, latencies_ms: List[float], coalesce: bool
+) -> int:
+    """Runs one client session and returns the number of failed calls."""
+    errors = 0
+    async with _connect(Variant("sse", "sse"), url) as session:
+        for index in range(calls):
+            name, arguments = CALLS[index % len(CALLS)]
+            if not coalesce:
+                question = f"{arguments['question']} (session {number}, call {index})"
+                arguments = dict(arguments, question=question)
+            started = time.perf_counter()
+            result = await session.call_tool(name, arguments)
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+            errors += bool(result.isError)
+    return errors
+
+
+async def run_load(
+    sessions: int,
+    calls_per_session: int,
+    human: Optional[SimulatedHuman] = None,
+    track_memory: bool = True,
+    coalesce: bool = False,
+) -> LoadResult:
+    """
+    Runs the load test.
+
+    Args:
+        sessions: Number of concurrent SSE client sessions
+        calls_per_session: Tool calls made one after another by each session
+        human: Simulated human answering the prompts, instant by default
+        track_memory: Trace Python allocations to report peak memory; this slows
+            every call down, so turn it off for absolute latency numbers
+        coalesce: Have every session ask the same questions, so identical ones in
+            flight are answered together instead of each reaching the human
+
+    Returns:
+        Tool call latency percentiles in milliseconds, throughput, the number of
+        failed calls, peak traced memory and event-loop lag
+    """
+    human = human or SimulatedHuman()
+    latencies_ms: List[float] = []
+
+    # Panels are still rendered, just not to the real terminal
+    with human.installed(), patch.object(terminal_console, "_file", io.StringIO()):
+        async with _serve(Variant("sse", "sse")) as url:
+            if track_memory:
+                tracemalloc.start()
+            # Lags are reported in the results instead of logged
+            lag = LoopLagMonitor(
+                LAG_INTERVAL_SECONDS, warn_after=float("inf"), keep_samples=True
+            )
+            lag.start()
+            try:
+                started = time.perf_counter()
+                errors = await asyncio.gather(
+                    *(
+                        _session(url, number, calls_per_session, latencies_ms, coalesce)
+                        for number in range(sessions)
+                    )
+                )
+                seconds = time.perf_counter() - started
+                peak_memory_mb = (
+                    tracemalloc.get_traced_memory()[1] / 2**20 if track_memory else None
+                )
+            finally:
+                await lag.stop()
+                if track_memory:
+                    tracemalloc.stop()
+
+    return {
+        "sessions": sessions,
+        "calls": len(latencies_ms),
+        "errors": sum(errors),
+        "seconds": seconds,
+        "calls_per_second": len(latencies_ms) / seconds,
+        "p50_ms": _percentile(latencies_ms, 50),
+        "p95_ms": _percentile(latencies_ms, 95),
+        "p99_ms": _percentile(latencies_ms, 99),
+        "peak_memory_mb": peak_memory_mb,
+        "loop_lag_p99_ms": _percentile(
+            [value * 1000 for value in lag.lags] or [0.0], 99
+        ),
+        "loop_lag_max_ms": lag.max_lag * 1000,
+    }
+
+
+def _render(result: LoadResult) -> Table:
+    table = Table(title="PairPilot load test")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    rows: Dict[str, str] = {
+        "Sessions": str(result["sessions"]),
+        "Calls (errors)": f"{result['calls']} ({result['errors']})",
+        "Calls/s": f"{result['calls_per_second']:.1f}",
+        "Latency p50 (ms)": f"{result['p50_ms']:.2f}",
+        "Latency p95 (ms)": f"{result['p95_ms']:.2f}",
+        "Latency p99 (ms)": f"{result['p99_ms']:.2f}",
+        "Peak traced memory (MiB)": (
+            "-"
+            if result["peak_memory_mb"] is None
+            else f"{result['peak_memory_mb']:.1f}"
+        ),
+        "Loop lag p99 (ms)": f"{result['loop_lag_p99_ms']:.2f}",
+        "Loop lag max (ms)": f"{result['loop_lag_max_ms']:.2f}",
+    }
+    for metric, value in rows.items():
+        table.add_row(metric, value)
+    return table
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Per-request server and HTTP client logs would drown out the results
+    logging.getLogger().setLevel(logging.WARNING)
+
+    human = SimulatedHuman(think_time(args.think, args.think_ms / 1000, args.seed))
+    result = await run_load(
+        args.sessions, args.calls, human, not args.no_memory, args.coalesce
+    )
+    console.print(_render(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=10, help="calls per session")
+    parser.add_argument("--think", choices=THINK_TIME_KINDS, default="exponential")
+    parser.add_argument("--think-ms", type=float, default=5.0, help="mean think time")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip allocation tracing"
+    )
+    parser.add_argument(
+        "--coalesce", action="store_true", help="ask every session the same questions"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,149 @@
+"""
+Picker Benchmark
+
+Measures how the multiple-choice picker scales with the number of options. For each
+option count it opens the picker, waits for the first screen, then presses keys one
+at a time and times each until the screen is redrawn. The answer form is compared
+with the questionary checkbox it replaced, which renders every option on every
+keystroke.
+
+Usage:
+    python -m benchmarks.picker_benchmark [--counts 100 1000 10000 50000] [--presses 20]
+"""
+
+import argparse
+import asyncio
+import io
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import questionary
+from prompt_toolkit.data_structures import Size
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output.vt100 import Vt100_Output
+from rich.console import Console
+from rich.table import Table
+
+from src.answer_form import answer_form
+
+console = Console()
+
+DOWN = "\x1b[B"
+PAGE_DOWN = "\x1b[6~"
+
+# The checkbox gets slower with every option, so it is skipped beyond this
+CHECKBOX_MAX_OPTIONS = 10_000
+
+# Column name and the keys pressed for it, one timing per key
+KEYS: List[Tuple[str, List[str]]] = [
+    ("↓", [DOWN]),
+    ("Space", [" "]),
+    ("PgDn", [PAGE_DOWN]),
+    ("Filter key", ["/", "m", "o", "d", "1", "2"]),
+]
+
+Picker = Callable[[List[str], object, object], questionary.Question]
+
+# Each picker and the key columns it supports
+PICKERS: Dict[str, Tuple[Picker, Tuple[str, ...]]] = {
+    "checkbox": (
+        lambda options, i, o: questionary.checkbox(
+            "Pick files:", choices=options, input=i, output=o
+        ),
+        ("↓", "Space"),
+    ),
+    "answer form": (
+        lambda options, i, o: answer_form("Pick files:", options, input=i, output=o),
+        tuple(column for column, _ in KEYS),
+    ),
+}
+
+
+def make_options(count: int) -> List[str]:
+    """Returns file-like option names, as an agent listing a repository would."""
+    return [f"src/pkg{index % 97}/module_{index}.py" for index in range(count)]
+
+
+async def measure(
+    picker: Picker, supported: Tuple[str, ...], options: List[str], presses: int
+) -> Dict[str, Optional[float]]:
+    """
+    Opens a picker and times the first render and each kind of keystroke.
+
+    Args:
+        picker: Builds the prompt for the options
+        supported: The key columns the picker has keys for
+        options: The choices to offer
+        presses: How many times each non-filter key is pressed
+
+    Returns:
+        Milliseconds to open, and the median milliseconds per key for each column,
+        or None where the picker has no such key
+    """
+    result: Dict[str, Optional[float]] = {}
+    with create_pipe_input() as pipe:
+        output = Vt100_Output(io.StringIO(), lambda: Size(rows=40, columns=100))
+        started = time.perf_counter()
+        question = picker(options, pipe, output)
+        rendered = asyncio.Event()
+        question.application.after_render += lambda _: rendered.set()
+        prompt = asyncio.ensure_future(question.unsafe_ask_async())
+        await rendered.wait()
+        result["Open"] = (time.perf_counter() - started) * 1000
+
+        for column, keys in KEYS:
+            if column not in supported:
+                result[column] = None
+                continue
+            timings = []
+            for key in keys if len(keys) > 1 else keys * presses:
+                rendered.clear()
+                pressed = time.perf_counter()
+                pipe.send_text(key)
+                try:
+                    await asyncio.wait_for(rendered.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    break
+                timings.append((time.perf_counter() - pressed) * 1000)
+            result[column] = statistics.median(timings) if timings else None
+
+        question.application.exit()
+        await prompt
+    return result
+
+
+async def main(counts: List[int], presses: int) -> None:
+    table = Table(title="Multiple-choice picker latency by option count (ms)")
+    table.add_column("Options", justify="right")
+    table.add_column("Picker")
+    for column in ["Open"] + [column for column, _ in KEYS]:
+        table.add_column(column, justify="right")
+
+    for count in counts:
+        options = make_options(count)
+        for name, (picker, supported) in PICKERS.items():
+            if name == "checkbox" and count > CHECKBOX_MAX_OPTIONS:
+                table.add_row(f"{count:,}", name, *["skipped"] * (len(KEYS) + 1))
+                continue
+            result = await measure(picker, supported, options, presses)
+            table.add_row(
+                f"{count:,}",
+                name,
+                *(
+                    "—" if value is None else f"{value:.2f}"
+                    for value in result.values()
+                ),
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--counts", type=int, nargs="+", default=[100, 1_000, 10_000, 50_000]
+    )
+    parser.add_argument("--presses", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.counts, args.presses))
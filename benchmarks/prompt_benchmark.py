@@ -0,0 +1,166 @@
+"""
+Prompt Benchmark
+
+Compares the two-step prompts (a questionary confirm or checkbox followed by a
+separate comment prompt) with the single-screen answer form. For a set of typical
+answers it reports the keystrokes needed, the time until the first screen is drawn and
+the total time to get through the prompts with the keys already typed, so only
+prompt_toolkit start-up and rendering are measured.
+
+Usage:
+    python -m benchmarks.prompt_benchmark [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import io
+import statistics
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import questionary
+from prompt_toolkit.data_structures import Size
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output.vt100 import Vt100_Output
+from rich.console import Console
+from rich.table import Table
+
+from src.answer_form import answer_form
+
+console = Console()
+
+ENTER = "\r"
+TAB = "\t"
+SPACE = " "
+DOWN = "\x1b[B"
+
+OPTIONS = ["Postgres", "MySQL", "SQLite", "DuckDB", "MongoDB"]
+COMMENT = "use the managed one"
+
+# A prompt factory taking (input, output), and the keys typed into it
+Step = Tuple[Callable[[Any, Any], questionary.Question], List[str]]
+
+
+class Scenario(NamedTuple):
+    name: str
+    before: List[Step]
+    after: List[Step]
+
+
+def _comment(keys: List[str]) -> Step:
+    return (
+        lambda i, o: questionary.text(
+            "Additional comments (optional, press Enter to skip): ", input=i, output=o
+        ),
+        keys,
+    )
+
+
+def _confirm(keys: List[str]) -> Step:
+    return (lambda i, o: questionary.confirm("Deploy?", input=i, output=o), keys)
+
+
+def _checkbox(keys: List[str]) -> Step:
+    return (
+        lambda i, o: questionary.checkbox(
+            "Select an option:", choices=OPTIONS, input=i, output=o
+        ),
+        keys,
+    )
+
+
+def _form(keys: List[str], options: Optional[List[str]] = None) -> Step:
+    return (lambda i, o: answer_form("Deploy?", options, input=i, output=o), keys)
+
+
+SCENARIOS = [
+    Scenario(
+        "yes/no, default, no comment",
+        before=[_confirm([ENTER]), _comment([ENTER])],
+        after=[_form([ENTER])],
+    ),
+    Scenario(
+        "yes/no, no, with comment",
+        before=[_confirm(["n"]), _comment(list(COMMENT) + [ENTER])],
+        after=[_form(["n"] + list(COMMENT) + [ENTER])],
+    ),
+    Scenario(
+        "pick 3rd of 5, no comment",
+        before=[_checkbox([DOWN, DOWN, SPACE, ENTER]), _comment([ENTER])],
+        after=[_form(["3", ENTER], OPTIONS)],
+    ),
+    Scenario(
+        "pick 1st and 4th, with comment",
+        before=[
+            _checkbox([SPACE, DOWN, DOWN, DOWN, SPACE, ENTER]),
+            _comment(list(COMMENT) + [ENTER]),
+        ],
+        after=[_form(["1", "4", TAB] + list(COMMENT) + [ENTER], OPTIONS)],
+    ),
+]
+
+
+async def _run(steps: List[Step]) -> Tuple[float, float]:
+    """Runs the prompts of one side and returns (first render, total) in ms."""
+    first_render: Optional[float] = None
+    started = time.perf_counter()
+    for make, keys in steps:
+        with create_pipe_input() as pipe:
+            output = Vt100_Output(io.StringIO(), lambda: Size(rows=40, columns=100))
+            question = make(pipe, output)
+
+            def rendered(_: Any) -> None:
+                nonlocal first_render
+                if first_render is None:
+                    first_render = time.perf_counter() - started
+
+            question.application.after_render += rendered
+            pipe.send_text("".join(keys))
+            await question.unsafe_ask_async()
+    return (first_render or 0.0) * 1000, (time.perf_counter() - started) * 1000
+
+
+async def benchmark(scenario: Scenario, repeat: int) -> Dict[str, float]:
+    """
+    Measures one scenario before and after the combined form.
+
+    Args:
+        scenario: The prompts and keys to compare
+        repeat: Number of timed runs of each side
+
+    Returns:
+        Keystrokes, median first-render time and median total time for each side
+    """
+    result: Dict[str, float] = {}
+    for side, steps in (("before", scenario.before), ("after", scenario.after)):
+        timings = [await _run(steps) for _ in range(repeat)]
+        result[f"{side}_keys"] = sum(len(keys) for _, keys in steps)
+        result[f"{side}_render"] = statistics.median(t[0] for t in timings)
+        result[f"{side}_total"] = statistics.median(t[1] for t in timings)
+    return result
+
+
+async def main(repeat: int) -> None:
+    table = Table(title="Two prompts (before) vs. single-screen form (after)")
+    table.add_column("Scenario")
+    table.add_column("Keys", justify="right")
+    table.add_column("First render (ms)", justify="right")
+    table.add_column("Total (ms)", justify="right")
+
+    for scenario in SCENARIOS:
+        result = await benchmark(scenario, repeat)
+        table.add_row(
+            scenario.name,
+            f"{result['before_keys']:.0f} → {result['after_keys']:.0f}",
+            f"{result['before_render']:.2f} → {result['after_render']:.2f}",
+            f"{result['before_total']:.2f} → {result['after_total']:.2f}",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
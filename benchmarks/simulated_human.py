@@ -0,0 +1,143 @@
+"""
+Simulated Human
+
+A scriptable stand-in for the person at the terminal. It replaces the questionary
+prompts used by the CLI handler, so everything above them (deadlines, cancellation,
+panels, scheduling) runs unchanged while answers arrive after a configurable think
+time instead of from a keyboard.
+
+Usage:
+    human = SimulatedHuman(think_time("exponential", mean_seconds=0.05))
+    with human.installed():
+        ...  # prompts are now answered by the simulated human
+"""
+
+import asyncio
+import contextlib
+import random
+from typing import Any, Callable, Iterator, List, Optional
+from unittest.mock import patch
+
+ThinkTime = Callable[[], float]
+
+THINK_TIME_KINDS = ("none", "constant", "uniform", "exponential")
+
+
+def think_time(
+    kind: str = "none", mean_seconds: float = 0.0, seed: Optional[int] = None
+) -> ThinkTime:
+    """
+    Builds a think-time distribution.
+
+    Args:
+        kind: One of "none", "constant", "uniform" (0 to twice the mean) or
+            "exponential"
+        mean_seconds: Mean time the simulated human takes to answer
+        seed: Seed for reproducible samples
+
+    Returns:
+        A function returning the next think time in seconds
+    """
+    rng = random.Random(seed)
+    if kind == "none" or mean_seconds <= 0:
+        return lambda: 0.0
+    if kind == "constant":
+        return lambda: mean_seconds
+    if kind == "uniform":
+        return lambda: rng.uniform(0, 2 * mean_seconds)
+    if kind == "exponential":
+        return lambda: rng.expovariate(1 / mean_seconds)
+    raise ValueError(
+        f"Unknown think time '{kind}', expected one of: {', '.join(THINK_TIME_KINDS)}"
+    )
+
+
+class _Application:
+    """The part of a prompt_toolkit application the CLI handler uses on timeout."""
+
+    def __init__(self) -> None:
+        self.is_running = False
+        self.exited: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+
+    def exit(self, result: Any = None) -> None:
+        if not self.exited.done():
+            self.exited.set_result(result)
+
+
+class _SimulatedQuestion:
+    """A questionary Question answered by the simulated human."""
+
+    def __init__(self, answer: Any, seconds: float) -> None:
+        self._answer = answer
+        self._seconds = seconds
+        self.application = _Application()
+
+    async def ask_async(self) -> Any:
+        self.application.is_running = True
+        try:
+            done, _ = await asyncio.wait(
+                {self.application.exited}, timeout=self._seconds
+            )
+            if done:
+                return self.application.exited.result()
+            return self._answer
+        finally:
+            self.application.is_running = False
+
+
+class SimulatedHuman:
+    """
+    Answers prompts after a think time drawn from a distribution.
+
+    Free-form prompts are answered with free_form_answer, confirmations with yes, and
+    checkboxes with the first option. The combined answer form gets the same answers
+    with an empty comment.
+    """
+
+    def __init__(
+        self,
+        think: Optional[ThinkTime] = None,
+        free_form_answer: str = "",
+        yes: bool = True,
+    ) -> None:
+        self.think = think or think_time()
+        self.free_form_answer = free_form_answer
+        self.yes = yes
+        self.prompts = 0
+        self._questions: List[_SimulatedQuestion] = []
+
+    @property
+    def on_screen(self) -> int:
+        """Prompts currently waiting for the simulated human."""
+        return sum(question.application.is_running for question in self._questions)
+
+    def _question(self, answer: Any) -> _SimulatedQuestion:
+        self.prompts += 1
+        question = _SimulatedQuestion(answer, self.think())
+        self._questions.append(question)
+        return question
+
+    def text(self, message: str, **kwargs: Any) -> _SimulatedQuestion:
+        return self._question(self.free_form_answer)
+
+    def confirm(self, message: str, **kwargs: Any) -> _SimulatedQuestion:
+        return self._question(self.yes)
+
+    def checkbox(
+        self, message: str, choices: List[str], **kwargs: Any
+    ) -> _SimulatedQuestion:
+        return self._question(choices[:1])
+
+    def answer_form(
+        self, message: str, options: Optional[List[str]] = None, **kwargs: Any
+    ) -> _SimulatedQuestion:
+        answer = self.yes if options is None else options[:1]
+        return self._question({"answer": answer, "comments": ""})
+
+    @contextlib.contextmanager
+    def installed(self) -> Iterator["SimulatedHuman"]:
+        """Routes the CLI handler's prompts to this simulated human."""
+        with patch("src.cli_handler.questionary", self), patch(
+            "src.cli_handler.answer_form", self.answer_form
+        ):
+            yield self
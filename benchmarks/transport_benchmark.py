@@ -0,0 +1,187 @@
+"""
+Transport Benchmark
+
+Compares connection overhead and per-call latency across the transports the server
+supports. The server runs in-process with the terminal prompts replaced by instant
+answers, so only transport and protocol costs are measured.
+
+Usage:
+    python -m benchmarks.transport_benchmark [--connections 20] [--calls 200]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import socket
+import statistics
+import time
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple
+from unittest.mock import AsyncMock, patch
+
+import uvicorn
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+from rich.console import Console
+from rich.table import Table
+from sse_starlette.sse import AppStatus
+
+from src.main import mcp
+
+console = Console()
+
+
+class Variant(NamedTuple):
+    name: str
+    transport: str
+    stateless: bool = False
+    json_response: bool = False
+
+
+VARIANTS = [
+    Variant("sse", "sse"),
+    Variant("streamable-http", "streamable-http"),
+    Variant("streamable-http stateless", "streamable-http", stateless=True),
+    Variant(
+        "streamable-http stateless+json",
+        "streamable-http",
+        stateless=True,
+        json_response=True,
+    ),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@contextlib.asynccontextmanager
+async def _serve(variant: Variant) -> AsyncIterator[str]:
+    """Runs the server for one variant and yields its endpoint URL."""
+    if variant.transport == "sse":
+        app = mcp.sse_app()
+        path = mcp.settings.sse_path
+    else:
+        mcp.settings.stateless_http = variant.stateless
+        mcp.settings.json_response = variant.json_response
+        # A session manager can only run once, so every variant gets a fresh one
+        mcp._session_manager = None
+        app = mcp.streamable_http_app()
+        path = mcp.settings.streamable_http_path
+
+    # sse-starlette keeps its shutdown event in a global bound to the event loop that
+    # first used it, so a server started from another loop needs a fresh one
+    AppStatus.should_exit_event = None
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}{path}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+@contextlib.asynccontextmanager
+async def _connect(variant: Variant, url: str) -> AsyncIterator[ClientSession]:
+    """Opens and initializes a client session over the variant's transport."""
+    if variant.transport == "sse":
+        client = sse_client(url)
+    else:
+        client = streamablehttp_client(url)
+    async with client as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            yield session
+
+
+async def _time(call: Callable) -> float:
+    started = time.perf_counter()
+    await call()
+    return (time.perf_counter() - started) * 1000
+
+
+async def benchmark(variant: Variant, connections: int, calls: int) -> Dict[str, float]:
+    """
+    Measures one transport variant.
+
+    Args:
+        variant: The transport configuration to measure
+        connections: Number of connect-initialize-disconnect cycles to time
+        calls: Number of tool calls to time over a single session
+
+    Returns:
+        Mean connection time and tool call latency percentiles, in milliseconds
+    """
+    async with _serve(variant) as url:
+
+        async def connect_once() -> None:
+            async with _connect(variant, url):
+                pass
+
+        connect_ms = [await _time(connect_once) for _ in range(connections)]
+
+        async with _connect(variant, url) as session:
+            arguments = {"question": "Proceed?"}
+            call_ms = [
+                await _time(
+                    lambda: session.call_tool("request_yes_no_input", arguments)
+                )
+                for _ in range(calls)
+            ]
+
+    return {
+        "connect_mean": statistics.mean(connect_ms),
+        "call_p50": _percentile(call_ms, 50),
+        "call_p95": _percentile(call_ms, 95),
+        "calls_per_second": calls / (sum(call_ms) / 1000),
+    }
+
+
+async def main(connections: int, calls: int) -> None:
+    # Per-request server and HTTP client logs would drown out the results
+    logging.getLogger().setLevel(logging.WARNING)
+
+    table = Table(title="PairPilot transport benchmark")
+    table.add_column("Transport")
+    table.add_column("Connect (ms)", justify="right")
+    table.add_column("Call p50 (ms)", justify="right")
+    table.add_column("Call p95 (ms)", justify="right")
+    table.add_column("Calls/s", justify="right")
+
+    # Answer every prompt instantly so only the transport is measured
+    with patch(
+        "src.cli_handler.ask_yes_no_with_comments", AsyncMock(return_value=(True, ""))
+    ), patch("src.main.console.print"):
+        for variant in VARIANTS:
+            result = await benchmark(variant, connections, calls)
+            table.add_row(
+                variant.name,
+                f"{result['connect_mean']:.2f}",
+                f"{result['call_p50']:.2f}",
+                f"{result['call_p95']:.2f}",
+                f"{result['calls_per_second']:.0f}",
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.connections, args.calls))
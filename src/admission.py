@@ -0,0 +1,147 @@
+"""
+Admission Module
+
+This module decides whether a question tool call is let in before it is queued for
+the human. A runaway agent loop could otherwise queue hundreds of prompts and starve
+every other session on a shared server. Three limits apply, each disabled when set
+to 0: the number of questions pending across all sessions, the number pending for
+one session, and how fast one session may ask, as a token bucket that refills at a
+steady rate and allows short bursts. A call over a limit is not queued; the caller
+gets a busy result saying when to retry.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Literal, Optional, TypedDict
+
+BusyReason = Literal["queue_full", "session_pending_limit", "rate_limited"]
+
+# Sessions whose state is kept before idle ones are dropped
+MAX_TRACKED_SESSIONS = 1024
+
+
+class BusyReturnType(TypedDict):
+    busy: bool
+    reason: BusyReason
+    retry_after_seconds: float
+
+
+class TokenBucket:
+    """Allows burst calls at once, refilling at rate calls per second."""
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """
+        Takes a token if one is available.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is available
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+@dataclass
+class _Session:
+    bucket: Optional[TokenBucket]
+    pending: int = 0
+
+
+class AdmissionController:
+    """Limits pending questions and per-session call rates; 0 disables a limit."""
+
+    def __init__(
+        self,
+        max_pending: int = 0,
+        max_pending_per_session: int = 0,
+        rate_per_minute: float = 0,
+        burst: int = 1,
+        retry_estimate: Callable[[], float] = lambda: 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_pending = max_pending
+        self.max_pending_per_session = max_pending_per_session
+        self.rate_per_minute = rate_per_minute
+        self.burst = max(1, burst)
+        # Seconds until a pending question is likely answered, suggested as the
+        # retry delay when a pending limit is hit
+        self.retry_estimate = retry_estimate
+        self.clock = clock
+        self.pending = 0
+        self._sessions: Dict[str, _Session] = {}
+
+    def admit(self, session_id: str) -> Optional[BusyReturnType]:
+        """
+        Lets a call in, counting it as pending until release() is called.
+
+        Args:
+            session_id: Identifier of the calling session
+
+        Returns:
+            None if the call is admitted, otherwise the busy result for the caller
+        """
+        now = self.clock()
+        session = self._sessions.get(session_id)
+        if session is None:
+            if len(self._sessions) >= MAX_TRACKED_SESSIONS:
+                self._forget_idle(now)
+            bucket = (
+                TokenBucket(self.rate_per_minute / 60, self.burst, now)
+                if self.rate_per_minute > 0
+                else None
+            )
+            session = self._sessions[session_id] = _Session(bucket)
+
+        if self.max_pending and self.pending >= self.max_pending:
+            return self._busy("queue_full", self.retry_estimate())
+        if (
+            self.max_pending_per_session
+            and session.pending >= self.max_pending_per_session
+        ):
+            return self._busy("session_pending_limit", self.retry_estimate())
+        if session.bucket is not None:
+            wait = session.bucket.take(now)
+            if wait:
+                return self._busy("rate_limited", wait)
+
+        session.pending += 1
+        self.pending += 1
+        return None
+
+    def release(self, session_id: str) -> None:
+        """Ends an admitted call, whether it was answered, failed or cancelled."""
+        session = self._sessions.get(session_id)
+        if session is not None and session.pending:
+            session.pending -= 1
+            self.pending -= 1
+
+    def _busy(self, reason: BusyReason, retry_after: float) -> BusyReturnType:
+        return {
+            "busy": True,
+            "reason": reason,
+            "retry_after_seconds": round(max(retry_after, 0.1), 1),
+        }
+
+    def _forget_idle(self, now: float) -> None:
+        # A session with nothing pending and a full bucket has no state worth keeping
+        for session_id, session in list(self._sessions.items()):
+            if not session.pending and (
+                session.bucket is None or session.bucket.full(now)
+            ):
+                del self._sessions[session_id]
@@ -0,0 +1,136 @@
+"""
+Answer Cache Module
+
+This module remembers answers the user asked to reuse, so an agent repeating the same
+question (e.g., "Run the test suite?") gets the answer back without another prompt.
+Entries expire after a TTL and the least recently used entry is evicted once the cache
+is full. Entries can be scoped to the asking session or shared by all sessions.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+# Typing this in the comments prompt stores the answer for reuse
+REMEMBER_MARKER = "!remember"
+
+SCOPE_SESSION = "session"
+SCOPE_GLOBAL = "global"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalizes a question so trivially different phrasings share a cache entry.
+
+    Args:
+        question: The question as asked by the agent
+
+    Returns:
+        The question lower-cased, with collapsed whitespace and trailing punctuation removed
+    """
+    return _WHITESPACE.sub(" ", question).strip().rstrip("?.!: ").lower()
+
+
+def extract_remember(comments: str) -> Tuple[str, bool]:
+    """
+    Strips the remember marker from the user's comments.
+
+    Args:
+        comments: The comments typed by the user
+
+    Returns:
+        The comments without the marker, and whether the marker was present
+    """
+    if REMEMBER_MARKER not in comments:
+        return comments, False
+    return " ".join(comments.replace(REMEMBER_MARKER, " ").split()), True
+
+
+class AnswerCache:
+    """An LRU cache of answers with a time-to-live, keyed on the normalized question."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 256,
+        scope: str = SCOPE_SESSION,
+    ) -> None:
+        if scope not in (SCOPE_SESSION, SCOPE_GLOBAL):
+            raise ValueError(f"Unknown answer cache scope: {scope}")
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.scope = scope
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(
+        self, session_id: str, tool: str, question: str, options: Sequence[str]
+    ) -> Hashable:
+        owner = session_id if self.scope == SCOPE_SESSION else None
+        return (owner, tool, normalize_question(question), tuple(options))
+
+    def get(
+        self, session_id: str, tool: str, question: str, options: Sequence[str] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Looks up a remembered answer.
+
+        Args:
+            session_id: The session asking the question
+            tool: Name of the tool being called
+            question: The question being asked
+            options: The options offered, for multiple-choice questions
+
+        Returns:
+            A copy of the remembered answer, or None if absent or expired
+        """
+        key = self._key(session_id, tool, question, options)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, answer = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return dict(answer)
+
+    def put(
+        self,
+        session_id: str,
+        tool: str,
+        question: str,
+        answer: Dict[str, Any],
+        options: Sequence[str] = (),
+    ) -> None:
+        """
+        Remembers an answer, evicting the least recently used entry when full.
+
+        Args:
+            session_id: The session that asked the question
+            tool: Name of the tool that was called
+            question: The question that was asked
+            answer: The answer to return for repeats of this question
+            options: The options offered, for multiple-choice questions
+        """
+        if self.max_entries <= 0:
+            return
+
+        key = self._key(session_id, tool, question, options)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, dict(answer))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forgets all remembered answers."""
+        self._entries.clear()
@@ -0,0 +1,452 @@
+"""
+Answer Form Module
+
+This module builds a single-screen prompt_toolkit form where the user picks the answer
+to a yes/no or multiple-choice question and types an optional comment, instead of
+going through two separate prompts. Single keys pick the answer and Enter submits:
+
+    yes/no:           y / n pick the answer and move to the comment, ←/→ toggle
+    multiple choice:  1-9 toggle an option on screen, ↑/↓ move, Space toggles,
+                      a toggles all matching, PgUp/PgDn page, / filters,
+                      s picks the next suggested earlier answer
+    both:             Tab switches between answer and comment, Enter submits,
+                      Ctrl+C or Esc cancels
+
+A line under the keys tells the user that adding the remember marker to the comment
+saves the answer for repeats of the question.
+
+Long option lists stay responsive: only the current page of options is rendered, and
+the filter narrows the matches of the previous query as the user types.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Set, Union
+
+import questionary
+from prompt_toolkit.application import Application
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.filters import Condition, has_focus
+from prompt_toolkit.formatted_text import StyleAndTextTuples
+from prompt_toolkit.input import Input
+from prompt_toolkit.key_binding import KeyBindings, merge_key_bindings
+from prompt_toolkit.key_binding.bindings.basic import load_basic_bindings
+from prompt_toolkit.key_binding.bindings.emacs import load_emacs_bindings
+from prompt_toolkit.key_binding.key_processor import KeyPressEvent
+from prompt_toolkit.layout import HSplit, Layout, VSplit, Window
+from prompt_toolkit.layout.containers import ConditionalContainer
+from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
+from prompt_toolkit.output import Output
+from prompt_toolkit.styles import Style
+
+from .answer_cache import REMEMBER_MARKER
+
+FORM_STYLE = Style.from_dict(
+    {
+        "qmark": "fg:#5f819d",
+        "question": "bold",
+        "pointer": "fg:#673ab7 bold",
+        "highlighted": "fg:#673ab7 bold",
+        "selected": "fg:#cc5454",
+        "key": "fg:#5f819d bold",
+        "label": "",
+        "instruction": "fg:#858585 italic",
+        "bottom-toolbar": "noreverse fg:#858585",
+    }
+)
+
+# Options beyond this can still be reached with the arrow keys
+MAX_DIGIT_SHORTCUTS = 9
+
+# Options shown at once; longer lists are paged and get a filter
+PAGE_SIZE = MAX_DIGIT_SHORTCUTS
+
+FormResult = Dict[str, Union[bool, List[str], str]]
+
+
+class _FormState:
+    """What the user has picked so far, and which options match the filter."""
+
+    def __init__(
+        self, options: Optional[List[str]], default: bool, page_size: int
+    ) -> None:
+        self.options = options
+        self.answer = default
+        self.page_size = page_size
+        self.selected: Set[int] = set()
+        # Indices of the options matching the filter, in display order
+        self.matches: List[int] = list(range(len(options or [])))
+        # Position of the pointer within the matches
+        self.cursor = 0
+        self.query = ""
+        self._lowered: Optional[List[str]] = None
+        # Selections suggested from earlier answers, and which one was picked last
+        self.suggestions: List[Set[int]] = []
+        self.suggestion = -1
+
+    @property
+    def page_start(self) -> int:
+        return self.cursor - self.cursor % self.page_size
+
+    def page(self) -> List[int]:
+        return self.matches[self.page_start : self.page_start + self.page_size]
+
+    def move(self, step: int) -> None:
+        if self.matches:
+            self.cursor = (self.cursor + step) % len(self.matches)
+
+    def turn_page(self, pages: int) -> None:
+        if self.matches:
+            target = self.cursor + pages * self.page_size
+            self.cursor = max(0, min(target, len(self.matches) - 1))
+
+    def toggle(self, position: int) -> None:
+        if 0 <= position < len(self.matches):
+            index = self.matches[position]
+            if index in self.selected:
+                self.selected.discard(index)
+            else:
+                self.selected.add(index)
+            self.cursor = position
+
+    def toggle_matching(self) -> None:
+        if self.selected.issuperset(self.matches):
+            self.selected.difference_update(self.matches)
+        else:
+            self.selected.update(self.matches)
+
+    def suggest(self, suggestions: List[List[str]]) -> None:
+        """Preselects the first suggested selection, keeping the rest for later."""
+        positions = {option: index for index, option in enumerate(self.options or [])}
+        for suggestion in suggestions:
+            selected = {
+                positions[option] for option in suggestion if option in positions
+            }
+            if selected and selected not in self.suggestions:
+                self.suggestions.append(selected)
+        if self.suggestions:
+            self.next_suggestion()
+
+    def next_suggestion(self) -> None:
+        if self.suggestions:
+            self.suggestion = (self.suggestion + 1) % len(self.suggestions)
+            self.selected = set(self.suggestions[self.suggestion])
+
+    def filter(self, text: str) -> None:
+        """
+        Keeps the options containing the query's characters in order, ignoring case
+        and whitespace. Options containing the query as a whole come first.
+        """
+        query = "".join(text.lower().split())
+        if query == self.query:
+            return
+        options = self.options or []
+        if self._lowered is None:
+            self._lowered = [option.lower() for option in options]
+
+        # Typing another character can only narrow the previous matches
+        if self.query and query.startswith(self.query):
+            candidates: Any = sorted(self.matches)
+        else:
+            candidates = range(len(options))
+        self.query = query
+        self.cursor = 0
+        if not query:
+            self.matches = list(candidates)
+            return
+
+        fuzzy = re.compile(".*?".join(map(re.escape, query)))
+        contiguous, scattered = [], []
+        for index in candidates:
+            lowered = self._lowered[index]
+            if query in lowered:
+                contiguous.append(index)
+            elif fuzzy.search(lowered):
+                scattered.append(index)
+        self.matches = contiguous + scattered
+
+    def result(self, comments: str) -> FormResult:
+        if self.options is None:
+            answer: Union[bool, List[str]] = self.answer
+        else:
+            answer = [self.options[index] for index in sorted(self.selected)]
+        return {"answer": answer, "comments": comments}
+
+
+def answer_form(
+    message: str,
+    options: Optional[List[str]] = None,
+    default: bool = True,
+    bottom_toolbar: Any = None,
+    refresh_interval: Optional[float] = None,
+    page_size: int = PAGE_SIZE,
+    suggestions: Optional[List[List[str]]] = None,
+    remember_hint: bool = True,
+    input: Optional[Input] = None,
+    output: Optional[Output] = None,
+) -> questionary.Question:
+    """
+    Builds the combined answer and comment form.
+
+    Args:
+        message: The question shown at the top of the form
+        options: Choices for a multiple-choice question, or None for yes/no
+        default: The preselected yes/no answer
+        bottom_toolbar: Optional callable returning text for a toolbar under the form
+        refresh_interval: Seconds between redraws, e.g. to update a countdown
+        page_size: Options shown at once; longer lists are paged and can be filtered
+        suggestions: Selections given to similar questions before, best first; the
+            first is preselected and s moves to the next
+        remember_hint: Explain how to save the answer for repeats of the question
+        input: Input to read keys from, defaults to the terminal
+        output: Output to render to, defaults to the terminal
+
+    Returns:
+        A question whose answer is {"answer": bool | List[str], "comments": str}, or
+        None if the user cancelled
+    """
+    state = _FormState(options, default, page_size)
+    state.suggest(suggestions or [])
+    paged = options is not None and len(options) > page_size
+    comment = Buffer(multiline=False)
+    query = Buffer(multiline=False, on_text_changed=lambda _: state.filter(query.text))
+
+    def choice_fragments() -> StyleAndTextTuples:
+        if options is None:
+            fragments: StyleAndTextTuples = [("", "  ")]
+            for value, key, label in ((True, "Y", "es"), (False, "N", "o")):
+                style = "class:highlighted" if state.answer is value else "class:label"
+                marker = "●" if state.answer is value else "○"
+                fragments += [
+                    (style, f"{marker} "),
+                    ("class:key", key),
+                    (style, label),
+                    ("", "   "),
+                ]
+            return fragments
+
+        # Only the current page is rendered, however many options there are
+        fragments = []
+        start = state.page_start
+        for row, index in enumerate(state.page()):
+            pointer = "»" if start + row == state.cursor else " "
+            key = str(row + 1) if row < MAX_DIGIT_SHORTCUTS else " "
+            chosen = index in state.selected
+            mark = "◉" if chosen else "○"
+            style = "class:selected" if chosen else "class:label"
+            if start + row == state.cursor:
+                style += " class:highlighted"
+            fragments += [
+                ("class:pointer", f" {pointer} "),
+                ("class:key", key),
+                (style, f" {mark} {options[index]}\n"),
+            ]
+        if not fragments:
+            return [("class:instruction", "   No matching options")] if options else []
+        return fragments[:-1] + [(fragments[-1][0], fragments[-1][1].rstrip("\n"))]
+
+    def suggestion_text() -> StyleAndTextTuples:
+        position = f"{state.suggestion + 1} of {len(state.suggestions)}"
+        return [
+            ("class:instruction", f"  Preselected from an earlier answer ({position})")
+        ]
+
+    def status_text() -> StyleAndTextTuples:
+        start, total = state.page_start, len(state.matches)
+        shown = f"{start + 1}-{min(start + page_size, total)} of {total:,}"
+        if not total:
+            shown = "0"
+        if state.query:
+            shown += " matching"
+        return [("class:instruction", f"  {shown} · {len(state.selected):,} selected")]
+
+    def help_text() -> StyleAndTextTuples:
+        if options is None:
+            keys = "y/n answer"
+        else:
+            keys = "1-9 toggle · ↑↓ move · Space toggle · a all"
+            if paged:
+                keys += " matching · PgUp/PgDn page · / filter"
+            if len(state.suggestions) > 1:
+                keys += " · s next suggestion"
+        fragments: StyleAndTextTuples = [
+            (
+                "class:instruction",
+                f"  {keys} · Tab comment · Enter submit · Esc cancel",
+            )
+        ]
+        if remember_hint:
+            fragments.append(
+                (
+                    "class:instruction",
+                    f"\n  Add {REMEMBER_MARKER} to the comment to reuse this answer "
+                    "when the question is asked again",
+                )
+            )
+        return fragments
+
+    choices = FormattedTextControl(choice_fragments, focusable=True)
+    answering = has_focus(choices)
+    filtering = has_focus(query)
+
+    bindings = KeyBindings()
+
+    @bindings.add("enter", filter=~filtering, eager=True)
+    def _submit(event: KeyPressEvent) -> None:
+        event.app.exit(result=state.result(comment.text.strip()))
+
+    @bindings.add("c-c", eager=True)
+    @bindings.add("escape", eager=True)
+    def _cancel(event: KeyPressEvent) -> None:
+        event.app.exit(exception=KeyboardInterrupt, style="class:aborting")
+
+    @bindings.add("tab")
+    @bindings.add("s-tab")
+    def _switch(event: KeyPressEvent) -> None:
+        event.app.layout.focus_next()
+
+    if options is None:
+
+        def _pick(value: bool) -> Any:
+            def handler(event: KeyPressEvent) -> None:
+                state.answer = value
+                event.app.layout.focus(comment)
+
+            return handler
+
+        for key in ("y", "Y"):
+            bindings.add(key, filter=answering)(_pick(True))
+        for key in ("n", "N"):
+            bindings.add(key, filter=answering)(_pick(False))
+
+        @bindings.add("left", filter=answering)
+        @bindings.add("right", filter=answering)
+        def _flip(event: KeyPressEvent) -> None:
+            state.answer = not state.answer
+
+    else:
+
+        def _toggle(row: int) -> Any:
+            def handler(event: KeyPressEvent) -> None:
+                if row < len(state.page()):
+                    state.toggle(state.page_start + row)
+
+            return handler
+
+        for row in range(min(page_size, MAX_DIGIT_SHORTCUTS)):
+            bindings.add(str(row + 1), filter=answering)(_toggle(row))
+
+        # The list can also be moved through while typing a filter
+        browsing = answering | filtering
+
+        @bindings.add("up", filter=browsing)
+        def _up(event: KeyPressEvent) -> None:
+            state.move(-1)
+
+        @bindings.add("down", filter=browsing)
+        def _down(event: KeyPressEvent) -> None:
+            state.move(1)
+
+        @bindings.add("pageup", filter=browsing)
+        def _previous_page(event: KeyPressEvent) -> None:
+            state.turn_page(-1)
+
+        @bindings.add("pagedown", filter=browsing)
+        def _next_page(event: KeyPressEvent) -> None:
+            state.turn_page(1)
+
+        @bindings.add(" ", filter=answering)
+        def _toggle_current(event: KeyPressEvent) -> None:
+            state.toggle(state.cursor)
+
+        @bindings.add("a", filter=answering)
+        def _toggle_all(event: KeyPressEvent) -> None:
+            state.toggle_matching()
+
+        @bindings.add("s", filter=answering)
+        def _next_suggestion(event: KeyPressEvent) -> None:
+            state.next_suggestion()
+
+        if paged:
+
+            @bindings.add("/", filter=answering)
+            def _start_filter(event: KeyPressEvent) -> None:
+                event.app.layout.focus(query)
+
+            @bindings.add("enter", filter=filtering, eager=True)
+            def _end_filter(event: KeyPressEvent) -> None:
+                event.app.layout.focus(choices)
+
+    has_toolbar = Condition(lambda: bottom_toolbar is not None)
+    has_suggestions = Condition(lambda: bool(state.suggestions))
+    is_paged = Condition(lambda: paged)
+    layout = Layout(
+        HSplit(
+            [
+                Window(
+                    FormattedTextControl(
+                        [("class:qmark", "? "), ("class:question", message)]
+                    ),
+                    dont_extend_height=True,
+                ),
+                ConditionalContainer(
+                    Window(
+                        FormattedTextControl(suggestion_text), dont_extend_height=True
+                    ),
+                    filter=has_suggestions,
+                ),
+                ConditionalContainer(
+                    VSplit(
+                        [
+                            Window(
+                                FormattedTextControl("  Filter: "),
+                                dont_extend_width=True,
+                            ),
+                            Window(BufferControl(buffer=query), height=1),
+                        ]
+                    ),
+                    filter=is_paged,
+                ),
+                Window(choices, dont_extend_height=True),
+                ConditionalContainer(
+                    Window(FormattedTextControl(status_text), dont_extend_height=True),
+                    filter=is_paged,
+                ),
+                VSplit(
+                    [
+                        Window(
+                            FormattedTextControl("  Comment (optional): "),
+                            dont_extend_width=True,
+                        ),
+                        Window(BufferControl(buffer=comment), height=1),
+                    ]
+                ),
+                Window(
+                    FormattedTextControl(help_text),
+                    dont_extend_height=True,
+                    wrap_lines=True,
+                ),
+                ConditionalContainer(
+                    Window(
+                        FormattedTextControl(
+                            lambda: [("class:bottom-toolbar", bottom_toolbar())]
+                        ),
+                        dont_extend_height=True,
+                    ),
+                    filter=has_toolbar,
+                ),
+            ]
+        ),
+        focused_element=choices,
+    )
+
+    application: Application[FormResult] = Application(
+        layout=layout,
+        key_bindings=merge_key_bindings(
+            [load_basic_bindings(), load_emacs_bindings(), bindings]
+        ),
+        style=FORM_STYLE,
+        refresh_interval=refresh_interval,
+        input=input,
+        output=output,
+    )
+    return questionary.Question(application)
@@ -0,0 +1,227 @@
+"""
+Answer Index Module
+
+This module suggests answers to a question from the answers given to similar questions
+before. Past questions are kept in an incremental TF-IDF index: each question is split
+into word tokens, and every token points to the questions containing it, most recent
+last. A lookup scores a bounded number of candidates, taken from the most recent
+postings of the question's rarest tokens, so it stays well under a millisecond with
+tens of thousands of entries. Repeats of a question update its entry instead of adding
+another one, and the least recently answered entry is dropped once the index is full.
+"""
+
+import heapq
+import itertools
+import math
+import operator
+import re
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+from .answer_cache import normalize_question
+
+# Only the start of a question is indexed, so pasted diffs and logs stay cheap
+MAX_INDEXED_CHARS = 1000
+MAX_TOKENS = 64
+
+# Past questions scored per lookup, taken from the postings of the rarest tokens
+MAX_CANDIDATES = 64
+
+# Distinct answers kept per question, latest first
+MAX_ANSWERS_PER_QUESTION = 3
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lower-cased word tokens, looking only at its start."""
+    return _TOKEN.findall(text[:MAX_INDEXED_CHARS].lower())[:MAX_TOKENS]
+
+
+@dataclass(eq=False)
+class _Entry:
+    id: int
+    key: Hashable
+    question_type: str
+    # Term frequency of each token, divided by the number of tokens
+    weights: Dict[str, float]
+    # Length of the TF-IDF vector, with the IDF at the time the entry was indexed
+    norm: float
+    answers: List[Any]
+
+
+class AnswerIndex:
+    """Incremental TF-IDF index of answered questions, suggesting past answers."""
+
+    def __init__(self, max_entries: int = 20000, min_score: float = 0.3) -> None:
+        self.max_entries = max_entries
+        # Cosine similarity a past question needs for its answers to be suggested
+        self.min_score = min_score
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        # Question type -> token -> entries containing it, in insertion order
+        self._postings: Dict[str, Dict[str, Dict[int, _Entry]]] = {}
+        self._counts: Counter = Counter()
+        self._ids = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _idf(self, question_type: str, token: str) -> float:
+        postings = self._postings.get(question_type, {}).get(token)
+        documents = len(postings) if postings else 0
+        return math.log((1 + self._counts[question_type]) / (1 + documents)) + 1
+
+    def add(
+        self,
+        question_type: str,
+        question: str,
+        answer: Any,
+        options: Sequence[str] = (),
+    ) -> None:
+        """
+        Records the answer given to a question.
+
+        Args:
+            question_type: One of "free_form", "yes_no" or "multiple_choice"
+            question: The question that was asked
+            answer: The answer the user gave
+            options: The options offered, for multiple-choice questions
+        """
+        if self.max_entries <= 0:
+            return
+        key = (question_type, normalize_question(question), tuple(options))
+        answers = [answer]
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._unindex(previous)
+            answers += [given for given in previous.answers if given != answer]
+
+        tokens = tokenize(question)
+        if not tokens:
+            return
+        weights = {
+            token: count / len(tokens) for token, count in Counter(tokens).items()
+        }
+        norm = math.sqrt(
+            sum(
+                (self._idf(question_type, token) * weight) ** 2
+                for token, weight in weights.items()
+            )
+        )
+        entry = _Entry(
+            id=next(self._ids),
+            key=key,
+            question_type=question_type,
+            weights=weights,
+            norm=norm,
+            answers=answers[:MAX_ANSWERS_PER_QUESTION],
+        )
+        self._entries[key] = entry
+        postings = self._postings.setdefault(question_type, {})
+        for token in weights:
+            postings.setdefault(token, {})[entry.id] = entry
+        self._counts[question_type] += 1
+
+        while len(self._entries) > self.max_entries:
+            _, oldest = self._entries.popitem(last=False)
+            self._unindex(oldest)
+
+    def suggest(
+        self,
+        question_type: str,
+        question: str,
+        options: Sequence[str] = (),
+        limit: int = 3,
+    ) -> List[Any]:
+        """
+        Suggests answers from the most similar questions answered before.
+
+        Args:
+            question_type: One of "free_form", "yes_no" or "multiple_choice"
+            question: The question being asked
+            options: The options offered, for multiple-choice questions; suggested
+                selections only contain these
+            limit: Most suggestions returned
+
+        Returns:
+            Distinct past answers, best match first
+        """
+        postings = self._postings.get(question_type)
+        tokens = tokenize(question)
+        if not postings or not tokens:
+            return []
+
+        counts = Counter(tokens)
+        # Query weights multiplied by the IDF twice, so a dot product with an
+        # entry's term frequencies is the TF-IDF dot product
+        query: Dict[str, float] = {}
+        query_norm = 0.0
+        # Tokens never seen before only lengthen the query vector
+        unseen_idf = math.log(1 + self._counts[question_type]) + 1
+        for token, count in counts.items():
+            posting = postings.get(token)
+            idf = self._idf(question_type, token) if posting else unseen_idf
+            weight = idf * count / len(tokens)
+            query_norm += weight * weight
+            if posting:
+                query[token] = idf * weight
+        if not query:
+            return []
+
+        # Candidates come from the rarest tokens' most recent postings
+        candidates: Dict[int, _Entry] = {}
+        for token in sorted(query, key=lambda token: len(postings[token])):
+            for entry in reversed(postings[token].values()):
+                candidates[entry.id] = entry
+                if len(candidates) >= MAX_CANDIDATES:
+                    break
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+
+        query_norm = math.sqrt(query_norm)
+        scored: List[Tuple[float, int, _Entry]] = []
+        for entry in candidates.values():
+            # Multiplied out in C: the entry's weights by the query's, 0 if absent
+            dot = sum(
+                map(
+                    operator.mul,
+                    map(query.get, entry.weights, itertools.repeat(0.0)),
+                    entry.weights.values(),
+                )
+            )
+            score = dot / (entry.norm * query_norm)
+            if score >= self.min_score:
+                scored.append((score, entry.id, entry))
+        # Similar questions often share answers, so rank more than are returned
+        ranked = heapq.nlargest(
+            limit * MAX_ANSWERS_PER_QUESTION, scored, key=lambda item: item[:2]
+        )
+
+        offered = set(options)
+        suggestions: List[Any] = []
+        for _, _, entry in ranked:
+            for answer in entry.answers:
+                if question_type == "multiple_choice":
+                    answer = [option for option in answer if option in offered]
+                if answer in ("", []) or answer in suggestions:
+                    continue
+                suggestions.append(answer)
+                if len(suggestions) == limit:
+                    return suggestions
+        return suggestions
+
+    def clear(self) -> None:
+        """Forgets every indexed question."""
+        self._entries.clear()
+        self._postings.clear()
+        self._counts.clear()
+
+    def _unindex(self, entry: _Entry) -> None:
+        postings = self._postings[entry.question_type]
+        for token in entry.weights:
+            posting = postings[token]
+            del posting[entry.id]
+            if not posting:
+                del postings[token]
+        self._counts[entry.question_type] -= 1
@@ -0,0 +1,136 @@
+"""
+Console Attach Module
+
+Operator console for a headless PairPilot server. It connects to the server's console
+address, shows each question it is given and sends the answers back. Several consoles
+can attach to one server; if the server restarts, each reconnects and carries on.
+
+Usage:
+    python -m src.attach [--address unix:/tmp/pairpilot.sock] [--name alice]
+                         [--tags backend,infra]
+"""
+
+import argparse
+import asyncio
+import getpass
+import os
+from typing import Any, Dict, Optional, Sequence
+
+from .console_link import (
+    DEFAULT_CONSOLE_ADDRESS,
+    open_connection,
+    read_frame,
+    write_frame,
+)
+from .errors import PromptCancelledError, PromptTimeoutError
+from .terminal import console, present_question
+
+# Seconds between attempts to reach the server
+RECONNECT_SECONDS = 2.0
+
+
+async def _answer(frame: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+    """Presents one question from the server and sends back the reply or error."""
+    try:
+        reply = await present_question(frame["request"])
+    except PromptCancelledError:
+        response = {"kind": "error", "id": frame["id"], "error": "cancelled"}
+    except PromptTimeoutError:
+        response = {"kind": "error", "id": frame["id"], "error": "timeout"}
+    except Exception as error:
+        response = {"kind": "error", "id": frame["id"], "error": str(error)}
+    else:
+        response = {"kind": "answer", "id": frame["id"], "reply": reply}
+
+    try:
+        await write_frame(writer, response)
+    except ConnectionError:
+        # The server is gone; it will ask again once we reconnect
+        pass
+
+
+async def _withdraw(prompt: Optional[asyncio.Task]) -> None:
+    """Closes a prompt nobody is waiting for and waits until it is gone."""
+    if prompt is None or prompt.done():
+        return
+    prompt.cancel()
+    await asyncio.wait({prompt})
+
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answers questions until the server disconnects."""
+    prompt: Optional[asyncio.Task] = None
+    prompt_id: Optional[int] = None
+    try:
+        while True:
+            frame = await read_frame(reader)
+            if frame is None:
+                return
+            if frame["kind"] == "ask":
+                prompt_id = frame["id"]
+                prompt = asyncio.create_task(_answer(frame, writer))
+            elif frame["kind"] == "cancel" and frame["id"] == prompt_id:
+                # The agent stopped waiting; the terminal is restored before the
+                # next question is read
+                await _withdraw(prompt)
+    finally:
+        # Tear down a prompt nobody is waiting for anymore
+        if prompt is not None and not prompt.done():
+            prompt.cancel()
+        writer.close()
+
+
+async def attach(address: str, name: str, tags: Sequence[str] = ()) -> None:
+    """
+    Attaches to a server and keeps reconnecting until interrupted.
+
+    Args:
+        address: The server's console address
+        name: Operator name shown by the server
+        tags: Topics this operator handles; an untagged operator handles anything
+    """
+    waiting_shown = False
+    while True:
+        try:
+            reader, writer = await open_connection(address)
+        except OSError:
+            if not waiting_shown:
+                console.print(
+                    f"[dim]Waiting for PairPilot server at {address}...[/dim]"
+                )
+                waiting_shown = True
+            await asyncio.sleep(RECONNECT_SECONDS)
+            continue
+
+        waiting_shown = False
+        await write_frame(writer, {"kind": "hello", "name": name, "tags": list(tags)})
+        console.print(
+            f"🔌 Attached to PairPilot at [bold cyan]{address}[/bold cyan] as {name}. "
+            "[italic]Press Ctrl+C to detach.[/italic]",
+            style="green",
+        )
+        await _serve(reader, writer)
+        console.print("[yellow]Server disconnected, reconnecting...[/yellow]")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Attach to a headless PairPilot server."
+    )
+    parser.add_argument(
+        "--address",
+        default=os.environ.get("CONSOLE_ADDRESS", DEFAULT_CONSOLE_ADDRESS),
+        help="unix:/path/to.sock or tcp:host:port (default: $CONSOLE_ADDRESS)",
+    )
+    parser.add_argument("--name", default=getpass.getuser(), help="Operator name")
+    parser.add_argument(
+        "--tags",
+        default="",
+        help="Comma-separated topics to handle, e.g. backend,infra (default: all)",
+    )
+    args = parser.parse_args()
+    tags = [tag.strip() for tag in args.tags.split(",") if tag.strip()]
+    try:
+        asyncio.run(attach(args.address, args.name, tags))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,277 @@
+"""
+Auto-Responder Module
+
+This module answers routine questions from a policy file so the human only sees the
+ones that need judgement. The policy is a JSON file with a list of rules, checked in
+order; the first rule matching a question answers it:
+
+    {
+      "rules": [
+        {
+          "name": "run-tests",
+          "tool": "yes_no",
+          "question": "re:^(may|can|should) i run (py)?tests?\\b",
+          "answer": true,
+          "comments": "Tests are always fine to run."
+        },
+        {
+          "name": "formatter",
+          "tool": "multiple_choice",
+          "question": "*format*",
+          "options": ["black", "*"],
+          "answer": ["black"]
+        }
+      ]
+    }
+
+Questions are matched case-insensitively, with "re:" patterns searched as regular
+expressions and anything else matched as a glob against the whole question. "tool" is
+"yes_no" or "multiple_choice" and may be left out, since the answer implies it. For
+multiple choice, "options" globs must each match one of the offered options, and the
+globs in "answer" select which offered options are returned. The file is reloaded
+when it changes, and every automatic answer is logged.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+TOOLS = ("yes_no", "multiple_choice")
+
+REGEX_PREFIX = "re:"
+
+# How often the policy file is checked for changes
+RELOAD_CHECK_SECONDS = 1.0
+
+# A numbered backreference (an unescaped backslash and digit) or a conditional on a
+# numbered group, both of which point at the wrong group once patterns are combined
+_NUMBERED_GROUP_REFERENCE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(\d")
+
+
+@dataclass(frozen=True)
+class AutoRule:
+    name: str
+    tool: str
+    pattern: Pattern[str]
+    options: Tuple[str, ...]
+    answer: Union[bool, Tuple[str, ...]]
+    comments: str
+
+
+@dataclass(frozen=True)
+class AutoAnswer:
+    rule: str
+    answer: Union[bool, List[str]]
+    comments: str
+
+
+def _compile_question(question: str) -> str:
+    """Turns a rule's question pattern into a regular expression."""
+    if question.startswith(REGEX_PREFIX):
+        expression = question[len(REGEX_PREFIX) :]
+        re.compile(expression)
+        return f"[\\s\\S]*?(?:{expression})"
+    return fnmatch.translate(question)
+
+
+def parse_rules(policy: Dict[str, Any]) -> List[AutoRule]:
+    """
+    Validates and compiles the rules of a policy.
+
+    Args:
+        policy: The decoded policy file
+
+    Returns:
+        The rules, in the order they are checked
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    if not isinstance(policy, dict) or not isinstance(policy.get("rules", []), list):
+        raise ValueError('Auto-responder policy must be an object with a "rules" list')
+
+    rules = []
+    for index, raw in enumerate(policy.get("rules", [])):
+        if not isinstance(raw, dict):
+            raise ValueError(f"Auto-responder rule {index + 1} must be an object")
+        name = str(raw.get("name") or f"rule {index + 1}")
+        try:
+            answer = raw["answer"]
+            if isinstance(answer, bool):
+                implied = "yes_no"
+            elif isinstance(answer, list):
+                implied = "multiple_choice"
+                answer = tuple(str(option) for option in answer)
+            else:
+                raise ValueError("answer must be true, false or a list of options")
+            tool = raw.get("tool", implied)
+            if tool not in TOOLS:
+                raise ValueError(f"unknown tool '{tool}'")
+            if tool != implied:
+                raise ValueError(f"answer does not fit a {tool} question")
+            rules.append(
+                AutoRule(
+                    name=name,
+                    tool=tool,
+                    pattern=re.compile(
+                        _compile_question(str(raw["question"])), re.IGNORECASE
+                    ),
+                    options=tuple(str(option) for option in raw.get("options", [])),
+                    answer=answer,
+                    comments=str(raw.get("comments", "")),
+                )
+            )
+        except (KeyError, re.error, ValueError) as error:
+            raise ValueError(
+                f"Invalid auto-responder rule '{name}': {error}"
+            ) from error
+    return rules
+
+
+class _Matcher:
+    """
+    Finds the first rule matching a question for each tool.
+
+    All question patterns of a tool are combined into a single regular expression,
+    anchored at the start, so one scan finds the first rule in policy order whose
+    question matches. Only when that rule's options do not fit are later rules tried
+    one by one. Patterns referring to groups by number are never combined, since
+    wrapping every rule in a group of its own renumbers their groups.
+    """
+
+    def __init__(self, rules: List[AutoRule]) -> None:
+        self._rules: Dict[str, List[AutoRule]] = {tool: [] for tool in TOOLS}
+        for rule in rules:
+            self._rules[rule.tool].append(rule)
+        self._combined: Dict[str, Optional[Pattern[str]]] = {}
+        for tool, tool_rules in self._rules.items():
+            if any(
+                _NUMBERED_GROUP_REFERENCE.search(rule.pattern.pattern)
+                for rule in tool_rules
+            ):
+                self._combined[tool] = None
+                continue
+            alternatives = "|".join(
+                f"(?P<r{index}>{rule.pattern.pattern})"
+                for index, rule in enumerate(tool_rules)
+            )
+            try:
+                self._combined[tool] = (
+                    re.compile(alternatives, re.IGNORECASE) if tool_rules else None
+                )
+            except re.error:
+                # Group names clash once combined
+                self._combined[tool] = None
+
+    def match(
+        self, tool: str, question: str, options: Sequence[str]
+    ) -> Optional[Tuple[AutoRule, Union[bool, List[str]]]]:
+        rules = self._rules.get(tool, [])
+        start = 0
+        combined = self._combined.get(tool)
+        if combined is not None:
+            found = combined.match(question)
+            if found is None:
+                return None
+            start = int(found.lastgroup[1:]) if found.lastgroup else 0
+
+        for rule in rules[start:]:
+            if not rule.pattern.match(question):
+                continue
+            answer = self._answer(rule, options)
+            if answer is not None:
+                return rule, answer
+        return None
+
+    @staticmethod
+    def _answer(
+        rule: AutoRule, options: Sequence[str]
+    ) -> Optional[Union[bool, List[str]]]:
+        if isinstance(rule.answer, bool):
+            return rule.answer
+        lowered = [option.lower() for option in options]
+        for pattern in rule.options:
+            if not fnmatch.filter(lowered, pattern.lower()):
+                return None
+        selection = [
+            option
+            for option in options
+            if any(fnmatch.fnmatch(option.lower(), p.lower()) for p in rule.answer)
+        ]
+        return selection or None
+
+
+class AutoResponder:
+    """Answers questions matching a policy file, reloading it when it changes."""
+
+    def __init__(self, path: str, check_interval: float = RELOAD_CHECK_SECONDS) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._matcher = _Matcher([])
+        self._version: Optional[Tuple[int, int]] = None
+        self._checked_at = float("-inf")
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Loads the policy file if it changed since it was last loaded.
+
+        A policy that fails to load is logged and the previous rules stay in force.
+        """
+        self._checked_at = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._version is not None:
+                logger.warning("Auto-responder policy %s was removed", self.path)
+                self._matcher, self._version = _Matcher([]), None
+            return
+
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self._version:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as policy:
+                rules = parse_rules(json.load(policy))
+        except (OSError, ValueError) as error:
+            logger.error("Keeping previous auto-responder rules: %s", error)
+            return
+        self._matcher, self._version = _Matcher(rules), version
+        logger.info("Loaded %d auto-responder rule(s) from %s", len(rules), self.path)
+
+    def match(
+        self, tool: str, question: str, options: Sequence[str] = ()
+    ) -> Optional[AutoAnswer]:
+        """
+        Answers a question from the policy, if a rule matches it.
+
+        Args:
+            tool: "yes_no" or "multiple_choice"
+            question: The question as asked by the agent
+            options: The offered choices, for multiple choice
+
+        Returns:
+            The automatic answer, or None if the human should be asked
+        """
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.reload()
+
+        found = self._matcher.match(tool, question.strip(), options)
+        if found is None:
+            return None
+        rule, answer = found
+        logger.info(
+            "Auto-answered %s question %r with %r (rule '%s')",
+            tool,
+            question,
+            answer,
+            rule.name,
+        )
+        return AutoAnswer(rule=rule.name, answer=answer, comments=rule.comments)
@@ -5,56 +5,242 @@ This module contains asynchronous functions responsible for interacting with the
 via the CLI using the questionary library for a polished experience.
 """
 
-from typing import List
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import questionary
+from prompt_toolkit.application import get_app
+from prompt_toolkit.auto_suggest import AutoSuggest, Suggestion
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
+from prompt_toolkit.filters import Condition
+from prompt_toolkit.history import InMemoryHistory
+from prompt_toolkit.key_binding import KeyBindings, KeyPressEvent
 
+from .answer_form import answer_form
+from .errors import PromptCancelledError, PromptTimeoutError
+from .metrics import PROMPT_DURATION
 
-async def ask_free_form(prompt_message: str) -> str:
+
+def _countdown_kwargs(timeout_seconds: Optional[float]) -> Dict[str, Any]:
+    """
+    Builds prompt options that show a live countdown in the bottom toolbar.
+
+    Args:
+        timeout_seconds: Seconds left to answer, or None for no deadline
+
+    Returns:
+        Keyword arguments for a questionary prompt, empty when there is no deadline
+    """
+    if timeout_seconds is None:
+        return {}
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_seconds
+
+    def toolbar() -> str:
+        remaining = max(0, round(deadline - loop.time()))
+        return f" ⏱ No answer in {remaining}s uses the agent's default"
+
+    return {"bottom_toolbar": toolbar, "refresh_interval": 1.0}
+
+
+class _SuggestAnswers(AutoSuggest):
+    """Suggests the best earlier answer that starts with what was typed so far."""
+
+    def __init__(self, answers: Sequence[str]) -> None:
+        self.answers = answers
+
+    def get_suggestion(
+        self, buffer: Buffer, document: Document
+    ) -> Optional[Suggestion]:
+        typed = document.text
+        for answer in self.answers:
+            if answer.startswith(typed) and answer != typed:
+                return Suggestion(answer[len(typed) :])
+        return None
+
+
+def _suggestion_kwargs(suggestions: Sequence[str]) -> Dict[str, Any]:
+    """
+    Builds prompt options offering earlier answers to similar questions.
+
+    The best suggestion matching what was typed so far is shown greyed out after the
+    cursor and accepted with →, and ↑/↓ go through all of them, best first.
+
+    Args:
+        suggestions: Earlier answers, best match first
+
+    Returns:
+        Keyword arguments for a questionary text prompt, empty without suggestions
+    """
+    if not suggestions:
+        return {}
+
+    # Auto-suggest only runs once something is typed, so the empty prompt shows the
+    # best suggestion as a placeholder, accepted with the same key
+    bindings = KeyBindings()
+
+    @bindings.add("right", filter=Condition(lambda: not get_app().current_buffer.text))
+    def _accept(event: KeyPressEvent) -> None:
+        event.current_buffer.insert_text(suggestions[0])
+
+    return {
+        "auto_suggest": _SuggestAnswers(suggestions),
+        "placeholder": [("fg:#858585", suggestions[0])],
+        "key_bindings": bindings,
+        # History is read newest first, so the best suggestion goes last
+        "history": InMemoryHistory(list(reversed(suggestions))),
+        "instruction": "(→ accepts the suggested earlier answer, ↑/↓ for more)",
+    }
+
+
+async def _ask_with_deadline(
+    question: questionary.Question, timeout_seconds: Optional[float], prompt: str
+) -> Any:
+    """
+    Asks a questionary question, tearing the prompt down if the deadline passes.
+
+    Args:
+        question: The question to ask
+        timeout_seconds: Seconds to wait for an answer, or None to wait forever
+        prompt: Kind of prompt ("text", "confirm", "checkbox" or "form"), for metrics
+
+    Returns:
+        The answer, or None if the user cancelled
+
+    Raises:
+        PromptTimeoutError: If the user did not answer in time
+        asyncio.CancelledError: If the caller stopped waiting, once the prompt is gone
+    """
+    started = time.perf_counter()
+    outcome = "timeout"
+    try:
+        answer = await _run_with_deadline(question, timeout_seconds)
+        outcome = "cancelled" if answer is None else "answered"
+        return answer
+    except asyncio.CancelledError:
+        outcome = "withdrawn"
+        raise
+    finally:
+        PROMPT_DURATION.observe(
+            time.perf_counter() - started, prompt=prompt, outcome=outcome
+        )
+
+
+async def _close_prompt(
+    question: questionary.Question, task: "asyncio.Future[Any]"
+) -> None:
+    """Exits a running prompt and waits until the terminal is restored."""
+    if question.application.is_running:
+        question.application.exit(result=None)
+    else:
+        task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def _run_with_deadline(
+    question: questionary.Question, timeout_seconds: Optional[float]
+) -> Any:
+    task = asyncio.ensure_future(question.ask_async())
+    try:
+        done, _ = await asyncio.wait({task}, timeout=timeout_seconds)
+    except asyncio.CancelledError:
+        # Nobody is waiting for the answer anymore, e.g. the agent disconnected
+        await _close_prompt(question, task)
+        raise
+    if task in done:
+        return task.result()
+
+    await _close_prompt(question, task)
+    raise PromptTimeoutError(f"No answer within {timeout_seconds:.1f}s")
+
+
+async def ask_free_form(
+    prompt_message: str,
+    raise_on_cancel: bool = False,
+    timeout_seconds: Optional[float] = None,
+    suggestions: Sequence[str] = (),
+) -> str:
     """
     Asks the user a free-form question and returns their textual response.
 
     Args:
         prompt_message: The question/prompt to display to the user
+        raise_on_cancel: Raise PromptCancelledError instead of returning on cancel
+        timeout_seconds: Raise PromptTimeoutError if not answered within this time
+        suggestions: Earlier answers to similar questions, best first, offered as
+            one-key completions
 
     Returns:
         The user's text response, or empty string if cancelled
     """
-    response = await questionary.text(prompt_message).ask_async()
+    question = questionary.text(
+        prompt_message,
+        **_countdown_kwargs(timeout_seconds),
+        **_suggestion_kwargs(suggestions),
+    )
+    response = await _ask_with_deadline(question, timeout_seconds, "text")
 
     # If response is None (user cancelled, e.g., Ctrl+C), return empty string
     if response is None:
+        if raise_on_cancel:
+            raise PromptCancelledError(prompt_message)
         return ""
 
     return response
 
 
-async def ask_yes_no(prompt_message: str) -> bool:
+async def ask_yes_no(
+    prompt_message: str,
+    raise_on_cancel: bool = False,
+    timeout_seconds: Optional[float] = None,
+    default: bool = True,
+) -> bool:
     """
     Asks the user a yes/no question and returns a boolean.
 
     Args:
         prompt_message: The yes/no question to display to the user
+        raise_on_cancel: Raise PromptCancelledError instead of returning on cancel
+        timeout_seconds: Raise PromptTimeoutError if not answered within this time
+        default: The answer selected when the user just presses Enter
 
     Returns:
         True for yes, False for no or if cancelled
     """
-    confirmation = await questionary.confirm(prompt_message, default=True).ask_async()
+    question = questionary.confirm(
+        prompt_message, default=default, **_countdown_kwargs(timeout_seconds)
+    )
+    confirmation = await _ask_with_deadline(question, timeout_seconds, "confirm")
 
     # If confirmation is None (user cancelled), return False as default
     if confirmation is None:
+        if raise_on_cancel:
+            raise PromptCancelledError(prompt_message)
         return False
 
     return confirmation
 
 
-async def ask_multiple_choice(prompt_message: str, options: List[str]) -> List[str]:
+async def ask_multiple_choice(
+    prompt_message: str,
+    options: List[str],
+    raise_on_cancel: bool = False,
+    timeout_seconds: Optional[float] = None,
+) -> List[str]:
     """
     Presents the user with multiple choices and returns the selected options as a list of strings.
 
     Args:
         prompt_message: The question to display to the user
         options: List of choice options to present
+        raise_on_cancel: Raise PromptCancelledError instead of returning on cancel
+        timeout_seconds: Raise PromptTimeoutError if not answered within this time
 
     Returns:
         The selected choices as a list of strings, or empty list if cancelled or no options
@@ -63,10 +249,87 @@ async def ask_multiple_choice(prompt_message: str, options: List[str]) -> List[s
     if not options:
         return "ERROR_NO_OPTIONS"
 
-    choice = await questionary.checkbox(prompt_message, choices=options).ask_async()
+    # The checkbox prompt has no toolbar, so the deadline is only shown by the caller
+    question = questionary.checkbox(prompt_message, choices=options)
+    choice = await _ask_with_deadline(question, timeout_seconds, "checkbox")
 
     # If choice is None (user cancelled), return empty string
     if choice is None:
+        if raise_on_cancel:
+            raise PromptCancelledError(prompt_message)
         return []
 
     return choice
+
+
+async def ask_yes_no_with_comments(
+    prompt_message: str,
+    raise_on_cancel: bool = False,
+    timeout_seconds: Optional[float] = None,
+    remember_hint: bool = True,
+) -> Tuple[bool, str]:
+    """
+    Asks a yes/no question and an optional comment on a single screen.
+
+    Args:
+        prompt_message: The yes/no question to display to the user
+        raise_on_cancel: Raise PromptCancelledError instead of returning on cancel
+        timeout_seconds: Raise PromptTimeoutError if not answered within this time
+        remember_hint: Explain how to save the answer for repeats of the question
+
+    Returns:
+        The answer (True for yes) and the comment, or (False, "") if cancelled
+    """
+    question = answer_form(
+        prompt_message,
+        remember_hint=remember_hint,
+        **_countdown_kwargs(timeout_seconds),
+    )
+    response = await _ask_with_deadline(question, timeout_seconds, "form")
+
+    if response is None:
+        if raise_on_cancel:
+            raise PromptCancelledError(prompt_message)
+        return False, ""
+
+    return response["answer"], response["comments"]
+
+
+async def ask_multiple_choice_with_comments(
+    prompt_message: str,
+    options: List[str],
+    raise_on_cancel: bool = False,
+    timeout_seconds: Optional[float] = None,
+    suggestions: Sequence[List[str]] = (),
+    remember_hint: bool = True,
+) -> Tuple[List[str], str]:
+    """
+    Asks a multiple-choice question and an optional comment on a single screen.
+
+    Args:
+        prompt_message: The question to display to the user
+        options: List of choice options to present
+        raise_on_cancel: Raise PromptCancelledError instead of returning on cancel
+        timeout_seconds: Raise PromptTimeoutError if not answered within this time
+        suggestions: Earlier selections for similar questions, best first; the first
+            is preselected
+        remember_hint: Explain how to save the answer for repeats of the question
+
+    Returns:
+        The selected choices and the comment, or ([], "") if cancelled
+    """
+    question = answer_form(
+        prompt_message,
+        options,
+        suggestions=list(suggestions),
+        remember_hint=remember_hint,
+        **_countdown_kwargs(timeout_seconds),
+    )
+    response = await _ask_with_deadline(question, timeout_seconds, "form")
+
+    if response is None:
+        if raise_on_cancel:
+            raise PromptCancelledError(prompt_message)
+        return [], ""
+
+    return response["answer"], response["comments"]
@@ -0,0 +1,261 @@
+"""
+Console Link Module
+
+This module connects a headless server to the operator consoles that show its
+questions. They talk over a Unix domain socket or a localhost TCP port using small
+frames: a 4-byte big-endian length followed by a UTF-8 JSON object.
+
+Frames sent by the console:
+    {"kind": "hello", "name": str, "tags": List[str]}
+    {"kind": "answer", "id": int, "reply": QuestionReply}
+    {"kind": "error", "id": int, "error": "cancelled" | "timeout" | str}
+
+Frames sent by the server:
+    {"kind": "ask", "id": int, "request": QuestionRequest}
+    {"kind": "cancel", "id": int}
+
+A cancel frame withdraws a question the agent is no longer waiting for; the console
+closes its prompt and sends nothing back for it.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import stat
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+from .errors import PromptCancelledError, PromptTimeoutError
+from .scheduler import PromptScheduler
+from .terminal import QuestionReply, QuestionRequest
+
+DEFAULT_CONSOLE_ADDRESS = "unix:/tmp/pairpilot.sock"
+
+# Refuse frames larger than this, which can only come from a broken peer
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+_HEADER = struct.Struct("!I")
+
+
+class ConsoleDisconnectedError(Exception):
+    """Raised when the console goes away while a question is being answered."""
+
+
+def parse_address(address: str) -> Tuple[str, str, Optional[int]]:
+    """
+    Parses a console address.
+
+    Args:
+        address: Either "unix:/path/to.sock" or "tcp:host:port"
+
+    Returns:
+        The scheme and either (path, None) or (host, port)
+    """
+    scheme, _, location = address.partition(":")
+    if scheme == "unix" and location:
+        return scheme, location, None
+    if scheme == "tcp":
+        host, _, port = location.rpartition(":")
+        if host and port.isdigit():
+            return scheme, host, int(port)
+    raise ValueError(
+        f"Invalid console address '{address}', "
+        "expected 'unix:/path/to.sock' or 'tcp:host:port'"
+    )
+
+
+async def open_connection(
+    address: str,
+) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connects to a console address."""
+    scheme, location, port = parse_address(address)
+    if scheme == "unix":
+        return await asyncio.open_unix_connection(location)
+    return await asyncio.open_connection(location, port)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    """
+    Reads one frame.
+
+    Args:
+        reader: The stream to read from
+
+    Returns:
+        The decoded frame, or None once the peer has closed the connection
+    """
+    try:
+        (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+        if length > MAX_FRAME_BYTES:
+            raise ConnectionError(f"Frame of {length} bytes exceeds the limit")
+        return json.loads(await reader.readexactly(length))
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        return None
+
+
+async def write_frame(writer: asyncio.StreamWriter, frame: Dict[str, Any]) -> None:
+    """
+    Writes one frame.
+
+    Args:
+        writer: The stream to write to
+        frame: A JSON-serializable object
+    """
+    writer.write(_encode(frame))
+    await writer.drain()
+
+
+def _encode(frame: Dict[str, Any]) -> bytes:
+    payload = json.dumps(frame, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(payload)) + payload
+
+
+class _Console:
+    """An attached console and the questions it is answering."""
+
+    def __init__(
+        self, name: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.name = name
+        self.reader = reader
+        self.writer = writer
+        self.pending: Dict[int, "asyncio.Future[QuestionReply]"] = {}
+        self._ids = itertools.count(1)
+
+    async def ask(self, request: QuestionRequest) -> QuestionReply:
+        question_id = next(self._ids)
+        reply = asyncio.get_running_loop().create_future()
+        self.pending[question_id] = reply
+        try:
+            await write_frame(
+                self.writer, {"kind": "ask", "id": question_id, "request": request}
+            )
+            return await reply
+        except ConnectionError as error:
+            raise ConsoleDisconnectedError(self.name) from error
+        except asyncio.CancelledError:
+            self.withdraw(question_id)
+            raise
+        finally:
+            self.pending.pop(question_id, None)
+
+    def withdraw(self, question_id: int) -> None:
+        """Tells the console to close the prompt for a question nobody waits for."""
+        if self.writer.is_closing():
+            return
+        # Written without waiting for the buffer to drain, as the caller is cancelled
+        self.writer.write(_encode({"kind": "cancel", "id": question_id}))
+
+    def resolve(self, frame: Dict[str, Any]) -> None:
+        reply = self.pending.get(frame.get("id"))
+        if reply is None or reply.done():
+            return
+        if frame["kind"] == "answer":
+            reply.set_result(frame["reply"])
+        elif frame.get("error") == "cancelled":
+            reply.set_exception(PromptCancelledError(self.name))
+        elif frame.get("error") == "timeout":
+            reply.set_exception(PromptTimeoutError(self.name))
+        else:
+            reply.set_exception(RuntimeError(frame.get("error")))
+
+    def disconnected(self) -> None:
+        for reply in self.pending.values():
+            if not reply.done():
+                reply.set_exception(ConsoleDisconnectedError(self.name))
+
+
+class ConsoleServer:
+    """
+    Accepts operator consoles and forwards questions to them.
+
+    Every attached console is registered with the scheduler as an operator, so
+    questions asked while no console is attached wait in the scheduler's queue. A
+    console that disconnects mid-question fails that question with
+    ConsoleDisconnectedError so the caller can queue it again.
+    """
+
+    def __init__(
+        self, scheduler: PromptScheduler, address: str = DEFAULT_CONSOLE_ADDRESS
+    ) -> None:
+        parse_address(address)
+        self.address = address
+        self._scheduler = scheduler
+        self._consoles: Dict[str, _Console] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def attached(self) -> List[str]:
+        """Operator names of the attached consoles."""
+        return list(self._consoles)
+
+    async def start(self) -> None:
+        """Starts listening for consoles on the configured address."""
+        scheme, location, port = parse_address(self.address)
+        if scheme == "unix":
+            # A socket left behind by a previous run would make the bind fail
+            if os.path.exists(location) and stat.S_ISSOCK(os.stat(location).st_mode):
+                os.unlink(location)
+            self._server = await asyncio.start_unix_server(self._handle, location)
+        else:
+            self._server = await asyncio.start_server(self._handle, location, port)
+
+    async def stop(self) -> None:
+        """Stops listening and drops the attached consoles."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for console in list(self._consoles.values()):
+            console.writer.close()
+
+    async def ask(self, operator: str, request: QuestionRequest) -> QuestionReply:
+        """
+        Presents a question on an operator's console.
+
+        Args:
+            operator: The operator granted the question by the scheduler
+            request: The question to present
+
+        Returns:
+            The console's reply
+
+        Raises:
+            ConsoleDisconnectedError: If the console is gone or leaves before replying
+        """
+        console = self._consoles.get(operator)
+        if console is None:
+            raise ConsoleDisconnectedError(operator)
+        return await console.ask(request)
+
+    def _unique_name(self, name: str) -> str:
+        unique = name
+        for suffix in itertools.count(2):
+            if unique not in self._consoles:
+                return unique
+            unique = f"{name}#{suffix}"
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        hello = await read_frame(reader)
+        if hello is None or hello.get("kind") != "hello":
+            writer.close()
+            return
+
+        name = self._unique_name(str(hello.get("name") or "console"))
+        console = _Console(name, reader, writer)
+        self._consoles[name] = console
+        self._scheduler.add_operator(name, hello.get("tags") or ())
+
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                console.resolve(frame)
+        finally:
+            del self._consoles[name]
+            self._scheduler.remove_operator(name)
+            console.disconnected()
+            writer.close()
@@ -0,0 +1,14 @@
+"""
+Errors Module
+
+Exceptions raised by the terminal prompts and handled by the server. They live apart
+from the prompts so the server can handle them without loading the prompt UI.
+"""
+
+
+class PromptCancelledError(Exception):
+    """Raised when the user cancels a prompt (e.g., Ctrl+C) and the caller asked to know."""
+
+
+class PromptTimeoutError(Exception):
+    """Raised when the user does not answer a prompt before its deadline."""
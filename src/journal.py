@@ -0,0 +1,278 @@
+"""
+Question Journal Module
+
+This module keeps an append-only journal of questions and answers on disk, so a
+server restart does not throw away the human's work. Each question is recorded when
+it is asked and again when it is answered; once the answer has been returned to the
+agent, or the question failed or timed out, it is closed. On restart, open questions
+are loaded back: unanswered ones can be asked again and answered ones are returned to
+the agent when it retries, without asking the human twice. Questions left open for
+longer than the retention period are dropped.
+
+Records are JSON lines written in batches with a single fsync per batch. The file is
+rewritten with only the open questions whenever it has mostly closed ones, so it
+stays bounded.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Questions that are never answered or collected are dropped after this long
+DEFAULT_RETENTION_SECONDS = 24 * 3600
+
+# Never compact journals smaller than this many records
+COMPACT_MIN_RECORDS = 1000
+
+QuestionKey = Tuple[str, str, Tuple[str, ...]]
+
+
+@dataclass
+class JournalEntry:
+    id: str
+    tool: str
+    question: str
+    options: List[str]
+    arguments: Dict[str, Any]
+    asked_at: float
+    answered_at: Optional[float] = None
+    result: Any = None
+
+    @property
+    def answered(self) -> bool:
+        return self.answered_at is not None
+
+    @property
+    def key(self) -> QuestionKey:
+        return (self.tool, self.question, tuple(self.options))
+
+
+@dataclass
+class _Batch:
+    lines: List[str] = field(default_factory=list)
+    synced: "Optional[asyncio.Future[None]]" = None
+
+
+class QuestionJournal:
+    """Durable record of open questions, indexed by id and by question."""
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = 0.05,
+        retention_seconds: float = DEFAULT_RETENTION_SECONDS,
+        compact_min_records: int = COMPACT_MIN_RECORDS,
+    ) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.retention_seconds = retention_seconds
+        self.compact_min_records = compact_min_records
+        self._entries: Dict[str, JournalEntry] = {}
+        self._by_key: Dict[QuestionKey, str] = {}
+        self._records = 0
+        self._file: Optional[Any] = None
+        self._batch = _Batch()
+        self._flusher: "Optional[asyncio.Task[None]]" = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> List[JournalEntry]:
+        """
+        Reads the journal left by a previous run and opens it for appending.
+
+        Returns:
+            The questions that were still open, oldest first
+        """
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        # A torn write at the end of a crashed run
+                        continue
+        self._expire(time.time())
+        self._compact()
+        return sorted(self._entries.values(), key=lambda entry: entry.asked_at)
+
+    async def close(self) -> None:
+        """Writes out any buffered records and closes the journal."""
+        while self._flusher is not None:
+            await asyncio.shield(self._flusher)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def lookup(
+        self, tool: str, question: str, options: Sequence[str] = ()
+    ) -> Optional[JournalEntry]:
+        """Returns the open entry for a question, if there is one."""
+        entry_id = self._by_key.get((tool, question, tuple(options)))
+        return None if entry_id is None else self._entries.get(entry_id)
+
+    def asked(
+        self,
+        tool: str,
+        question: str,
+        options: Sequence[str] = (),
+        arguments: Optional[Dict[str, Any]] = None,
+    ) -> JournalEntry:
+        """
+        Records a question being asked.
+
+        Args:
+            tool: Name of the tool asking the question
+            question: The question text
+            options: Choices, for multiple choice
+            arguments: The remaining tool arguments, used to ask it again on restart
+
+        Returns:
+            The new journal entry
+        """
+        record = {
+            "op": "ask",
+            "id": uuid.uuid4().hex,
+            "tool": tool,
+            "question": question,
+            "options": list(options),
+            "arguments": arguments or {},
+            "at": time.time(),
+        }
+        self._append(record)
+        return self._entries[record["id"]]
+
+    async def answered(self, entry_id: str, result: Any) -> None:
+        """Records an answer and waits until it is safely on disk."""
+        await self._append({"op": "answer", "id": entry_id, "result": result})
+
+    def closed(self, entry_id: str) -> None:
+        """Records that a question no longer needs to be kept."""
+        self._append({"op": "close", "id": entry_id})
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        self._records += 1
+        op, entry_id = record["op"], record["id"]
+        if op == "ask":
+            entry = JournalEntry(
+                id=entry_id,
+                tool=record["tool"],
+                question=record["question"],
+                options=record["options"],
+                arguments=record["arguments"],
+                asked_at=record["at"],
+            )
+            self._entries[entry_id] = entry
+            self._by_key[entry.key] = entry_id
+        elif op == "answer" and entry_id in self._entries:
+            entry = self._entries[entry_id]
+            entry.result = record["result"]
+            entry.answered_at = record.get("at", time.time())
+        elif op == "close":
+            entry = self._entries.pop(entry_id, None)
+            if entry is not None and self._by_key.get(entry.key) == entry_id:
+                del self._by_key[entry.key]
+
+    def _append(self, record: Dict[str, Any]) -> "asyncio.Future[None]":
+        if self._file is None:
+            raise RuntimeError(
+                f"Journal {self.path} is not open: call load() before recording"
+            )
+        record.setdefault("at", time.time())
+        self._apply(record)
+        self._batch.lines.append(json.dumps(record, separators=(",", ":")))
+
+        loop = asyncio.get_running_loop()
+        if self._batch.synced is None:
+            self._batch.synced = loop.create_future()
+        if self._flusher is None:
+            self._flusher = loop.create_task(self._flush())
+        return self._batch.synced
+
+    async def _flush(self) -> None:
+        try:
+            while self._batch.lines:
+                # Let records from concurrent tool calls join the same fsync
+                await asyncio.sleep(self.flush_interval)
+                batch, self._batch = self._batch, _Batch()
+                try:
+                    await asyncio.to_thread(self._write, batch.lines)
+                    # Compact once closed questions make up most of the journal
+                    if self._records > max(
+                        self.compact_min_records, 4 * len(self._entries)
+                    ):
+                        self._expire(time.time())
+                        records = self._snapshot()
+                        await asyncio.to_thread(self._rewrite, records)
+                        self._records = len(records) + len(self._batch.lines)
+                except Exception as error:
+                    # Whoever waits for the batch learns it was not written
+                    batch.synced.set_exception(error)
+                    # Asks and closes are not awaited, so mark the failure as seen
+                    batch.synced.exception()
+                else:
+                    batch.synced.set_result(None)
+        finally:
+            self._flusher = None
+
+    def _write(self, lines: List[str]) -> None:
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _expire(self, now: float) -> None:
+        for entry in list(self._entries.values()):
+            last_seen = entry.answered_at if entry.answered else entry.asked_at
+            if now - last_seen > self.retention_seconds:
+                self._apply({"op": "close", "id": entry.id})
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        """Returns the records that recreate the open questions."""
+        records = []
+        for entry in self._entries.values():
+            records.append(
+                {
+                    "op": "ask",
+                    "id": entry.id,
+                    "tool": entry.tool,
+                    "question": entry.question,
+                    "options": entry.options,
+                    "arguments": entry.arguments,
+                    "at": entry.asked_at,
+                }
+            )
+            if entry.answered:
+                records.append(
+                    {
+                        "op": "answer",
+                        "id": entry.id,
+                        "result": entry.result,
+                        "at": entry.answered_at,
+                    }
+                )
+        return records
+
+    def _compact(self) -> None:
+        records = self._snapshot()
+        self._rewrite(records)
+        self._records = len(records)
+
+    def _rewrite(self, records: List[Dict[str, Any]]) -> None:
+        """Atomically replaces the journal with the given records."""
+        if self._file is not None:
+            self._file.close()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as journal:
+            for record in records:
+                journal.write(json.dumps(record, separators=(",", ":")) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
@@ -0,0 +1,62 @@
+"""
+Loop Lag Module
+
+This module reports how long the event loop was blocked. A monitor task sleeps for a
+short interval over and over; whenever it wakes up later than it asked to, something
+held the loop for that long, and every connected session waited with it. Each lag is
+recorded in a histogram for /metrics, and lags above a threshold are logged. The
+load test keeps every sample as well, to report percentiles.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from .metrics import LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task sleeping at an interval."""
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        warn_after: float = 0.25,
+        keep_samples: bool = False,
+    ) -> None:
+        self.interval = interval
+        self.warn_after = warn_after
+        self.keep_samples = keep_samples
+        # Longest lag seen since the monitor started, in seconds
+        self.max_lag = 0.0
+        # Every lag measured, in seconds, when keeping samples
+        self.lags: List[float] = []
+        self._task: "Optional[asyncio.Task[None]]" = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            LOOP_LAG.observe(lag)
+            if self.keep_samples:
+                self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.warn_after:
+                logger.warning("Event loop was blocked for %.0f ms", lag * 1000)
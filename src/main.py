@@ -5,29 +5,124 @@ Core MCP server setup, tool definitions, and rich output for enhanced user exper
 This server allows AI agents to interact with a human user via CLI for feedback.
 """
 
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
 import os
-from typing import List, TypedDict
+import time
+import weakref
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    TypedDict,
+    TypeVar,
+    Union,
+)
 
+import anyio
+import uvicorn
 from mcp.server.fastmcp import FastMCP
-from rich.console import Console
+from pydantic import BaseModel, Field
 from rich.panel import Panel
-from rich.text import Text
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from . import startup
+from .admission import AdmissionController, BusyReturnType
+from .answer_cache import AnswerCache, extract_remember, normalize_question
+from .auto_responder import AutoResponder
+from .console_link import ConsoleDisconnectedError, ConsoleServer
+from .errors import PromptCancelledError, PromptTimeoutError
+from .journal import JournalEntry, QuestionJournal
+from .loop_lag import LoopLagMonitor
+from .metrics import (
+    ADMITTED_CALLS,
+    CONTENT_TYPE,
+    HUMAN_RESPONSE,
+    NOTIFICATIONS,
+    QUEUE_WAIT,
+    REGISTRY,
+    REJECTED_CALLS,
+    timed_tool,
+)
+from .notifications import Notification, NotificationBoard, NotificationLevel
+from .scheduler import (
+    DEFAULT_SESSION_ID,
+    LOCAL_OPERATOR,
+    PromptScheduler,
+)
+from .single_flight import SingleFlight
+from .terminal import (
+    QuestionReply,
+    QuestionRequest,
+    console,
+    load_prompts,
+    present_question,
+    question_request,
+    renderer,
+    show,
+)
+from .tickets import TicketResult, TicketStore
+
+logger = logging.getLogger(__name__)
 
-from .cli_handler import ask_free_form, ask_multiple_choice, ask_yes_no
+
+class FreeFormAnswerReturnType(TypedDict):
+    answer: str
+    timed_out: bool
 
 
 class YesNoAnswerReturnType(TypedDict):
     answer: bool
     comments: str
+    timed_out: bool
 
 
 class MultipleChoiceAnswerReturnType(TypedDict):
     selection: List[str]
     comments: str
+    timed_out: bool
+
+
+QuestionType = Literal["free_form", "yes_no", "multiple_choice"]
+
+
+class BatchQuestion(BaseModel):
+    type: QuestionType
+    question: str
+    options: List[str] = Field(
+        default_factory=list, description="Choices, only for multiple_choice"
+    )
+
+
+class BatchAnswer(TypedDict):
+    type: QuestionType
+    question: str
+    answer: Union[str, bool, List[str]]
+    comments: str
+
 
+class BatchAnswerReturnType(TypedDict):
+    answers: List[BatchAnswer]
+    completed: bool
+
+
+class SubmitQuestionReturnType(TypedDict):
+    ticket_id: str
+    expires_in_seconds: float
+
+
+class NotifyReturnType(TypedDict):
+    notification_id: int
+    coalesced: bool
 
-# Initialize Rich Console for enhanced output
-console = Console()
 
 # Initialize FastMCP Server
 mcp = FastMCP(
@@ -36,107 +131,1003 @@ mcp = FastMCP(
     description="MCP server for interactive CLI-based user feedback with an enhanced UI.",
 )
 
+# When set, questions are shown on attached consoles instead of this terminal
+CONSOLE_ADDRESS = os.environ.get("CONSOLE_ADDRESS")
+
+# Hands questions from concurrent tool calls to the humans answering them: this
+# terminal, or the consoles attached to a headless server
+scheduler = PromptScheduler(operators=() if CONSOLE_ADDRESS else (LOCAL_OPERATOR,))
+
+console_server: Optional[ConsoleServer] = (
+    ConsoleServer(scheduler, CONSOLE_ADDRESS) if CONSOLE_ADDRESS else None
+)
+
+# Answers the user asked to remember, returned without prompting again
+answer_cache = AnswerCache(
+    ttl_seconds=float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", 3600)),
+    max_entries=int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 256)),
+    scope=os.environ.get("ANSWER_CACHE_SCOPE", "session"),
+)
+
+# When set, routine questions matching this policy file are answered automatically
+auto_responder: Optional[AutoResponder] = (
+    AutoResponder(os.environ["AUTO_RESPONDER_POLICY"])
+    if os.environ.get("AUTO_RESPONDER_POLICY")
+    else None
+)
+
+# Turns question calls away as busy once a session or the whole server has too many
+# pending, or a session asks too fast
+admission = AdmissionController(
+    max_pending=int(os.environ.get("MAX_PENDING_QUESTIONS", 100)),
+    max_pending_per_session=int(os.environ.get("MAX_PENDING_PER_SESSION", 10)),
+    rate_per_minute=float(os.environ.get("SESSION_RATE_PER_MINUTE", 0)),
+    burst=int(os.environ.get("SESSION_BURST", 10)),
+    retry_estimate=lambda: _typical_response_seconds(),
+)
+
+# Reports how long the event loop is blocked, logging lags above the threshold
+loop_lag = LoopLagMonitor(
+    warn_after=float(os.environ.get("LOOP_LAG_WARN_SECONDS", 0.25)),
+)
+
+# Status messages from agents, shown between prompts in rate-limited batches and
+# kept in a ring buffer for the scrollback
+notifications = NotificationBoard(
+    write=show,
+    history=int(os.environ.get("NOTIFICATION_HISTORY", 200)),
+    flush_interval=float(os.environ.get("NOTIFY_INTERVAL_SECONDS", 1.0)),
+    # Writing while this terminal prompts would break up the prompt
+    hold=lambda: console_server is None and scheduler.busy,
+)
+
+# Questions submitted to be answered in the background, collected by ticket id
+tickets = TicketStore(
+    ttl_seconds=float(os.environ.get("TICKET_TTL_SECONDS", 3600)),
+)
+
+
+# When set, questions and answers are journaled to this file to survive restarts
+journal: Optional[QuestionJournal] = (
+    QuestionJournal(
+        os.environ["JOURNAL_PATH"],
+        flush_interval=float(os.environ.get("JOURNAL_FLUSH_SECONDS", 0.05)),
+        retention_seconds=float(os.environ.get("JOURNAL_RETENTION_SECONDS", 86400)),
+    )
+    if os.environ.get("JOURNAL_PATH")
+    else None
+)
+
+# Identical questions waiting for an answer, asked once and answered together
+questions_in_flight = SingleFlight()
+
+# Questions left unanswered by the previous run, being asked again by journal entry id
+recovered_questions: "Dict[str, asyncio.Task[Any]]" = {}
+
+# Set once the server starts stopping, before it cancels the calls still running, so
+# their journaled questions stay open for the agent's retry after a restart
+_stopping = False
+
+# Re-asks a journaled question with its original arguments, by tool name
+_journaled_tools: Dict[str, Callable[[JournalEntry], Awaitable[Any]]] = {}
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+# Seconds between checks that the agent waiting for a question is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Seconds between progress notifications sent while a call waits for the human, so
+# clients that time out quiet calls keep waiting instead of retrying; 0 disables them
+PROGRESS_INTERVAL_SECONDS = float(os.environ.get("PROGRESS_INTERVAL_SECONDS", 10))
+
+# Set for questions asked by submit_question, whose tasks outlive the request that
+# started them; its progress token must not be used once it has returned
+_answering_ticket: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "answering_ticket", default=False
+)
+
+# MCP sessions that have called a tool, dropped once their connection is gone
+connected_sessions: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+REGISTRY.gauge(
+    "pairpilot_pending_questions",
+    "Questions waiting for an operator.",
+    lambda: scheduler.pending,
+)
+REGISTRY.gauge(
+    "pairpilot_operators",
+    "Operators available to answer questions.",
+    lambda: len(scheduler.operators),
+)
+REGISTRY.gauge(
+    "pairpilot_busy_operators",
+    "Operators currently answering a question.",
+    lambda: sum(stats["busy"] for stats in scheduler.operator_stats()),
+)
+REGISTRY.gauge(
+    "pairpilot_coalesced_questions",
+    "Tool calls waiting for the answer to the same question asked by another call.",
+    lambda: questions_in_flight.waiting,
+)
+REGISTRY.gauge(
+    "pairpilot_pending_renders",
+    "Terminal output waiting for the render worker.",
+    lambda: renderer.pending,
+)
+REGISTRY.gauge(
+    "pairpilot_held_notifications",
+    "Agent notifications waiting to be shown in the terminal.",
+    lambda: notifications.pending,
+)
+REGISTRY.gauge(
+    "pairpilot_connected_sessions",
+    "Connected MCP sessions that have called a tool.",
+    lambda: len(connected_sessions),
+)
+
+
+def _session_id() -> str:
+    """Returns an identifier for the MCP session of the current tool call."""
+    try:
+        session = mcp.get_context().session
+    except ValueError:
+        # Called outside of an MCP request, e.g. directly from tests
+        return DEFAULT_SESSION_ID
+    connected_sessions.add(session)
+    return str(id(session))
+
+
+# Whether disconnect detection was found unsupported by the installed mcp version
+_disconnect_detection_missing = False
+
+
+def _agent_connected(session: Any) -> bool:
+    """Whether the agent of an MCP session can still receive tool results."""
+    global _disconnect_detection_missing
+    try:
+        # The transport closes its end of the session's outgoing stream when the
+        # connection drops, e.g. an SSE client going away
+        return session._write_stream.statistics().open_receive_streams > 0
+    except AttributeError:
+        if not _disconnect_detection_missing:
+            _disconnect_detection_missing = True
+            logger.warning(
+                "This mcp version does not expose the session's write stream: "
+                "questions of disconnected agents are not withdrawn"
+            )
+        return True
+
+
+async def _cancel_on_disconnect(session: Any, call: "asyncio.Task[Any]") -> None:
+    while _agent_connected(session):
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+    call.cancel()
+
+
+def _withdraw_on_disconnect(handler: F) -> F:
+    """
+    Decorates a question tool so its question is withdrawn if the agent disconnects.
+
+    Cancelling the call closes the prompt, tells the human and frees the operator for
+    the next question. A request cancelled by the agent is cancelled by the MCP
+    session itself.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            session = mcp.get_context().session
+        except ValueError:
+            # Called outside of an MCP request, e.g. directly from tests
+            return await handler(*args, **kwargs)
+        watcher = asyncio.create_task(
+            _cancel_on_disconnect(session, asyncio.current_task())
+        )
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            watcher.cancel()
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _progress_message(session_id: str, elapsed: float) -> str:
+    """Describes where a waiting call's question is, for a progress notification."""
+    ahead = scheduler.position(session_id)
+    if ahead is None:
+        state = "Waiting for the human to answer"
+    elif ahead == 0:
+        state = "Queued, next in line for the human"
+    else:
+        state = f"Queued behind {ahead} question(s)"
+    return f"{state} · {elapsed:.0f}s elapsed"
+
+
+async def _send_progress(context: Any, progress_token: Union[str, int]) -> None:
+    session_id = _session_id()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+        elapsed = loop.time() - started
+        try:
+            await context.session.send_progress_notification(
+                progress_token,
+                # Elapsed seconds, which only ever increase as the protocol requires
+                round(elapsed, 1),
+                message=_progress_message(session_id, elapsed),
+                # Sent on the call's own stream with streamable HTTP
+                related_request_id=context.request_id,
+            )
+        except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+            # The agent is gone; the disconnect watcher withdraws the question
+            return
+
+
+def _report_progress(handler: F) -> F:
+    """
+    Decorates a tool that waits for the human so the agent hears from it meanwhile.
+
+    When the call carries a progress token, a progress notification with the queue
+    position and elapsed time is sent every PROGRESS_INTERVAL_SECONDS until the call
+    returns. Clients that reset their timeout on progress then keep waiting for the
+    human instead of giving up and sending the call again. Questions answered by
+    ticket send none, since submit_question has already returned.
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            context = mcp.get_context().request_context
+        except ValueError:
+            # Called outside of an MCP request, e.g. directly from tests
+            return await handler(*args, **kwargs)
+        progress_token = context.meta.progressToken if context.meta else None
+        if (
+            progress_token is None
+            or PROGRESS_INTERVAL_SECONDS <= 0
+            or _answering_ticket.get()
+        ):
+            return await handler(*args, **kwargs)
+        heartbeat = asyncio.create_task(_send_progress(context, progress_token))
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            heartbeat.cancel()
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _typical_response_seconds() -> float:
+    """Returns the operators' mean time to answer, or 5 seconds before any answer."""
+    means = [
+        stats["mean_response_seconds"]
+        for stats in scheduler.operator_stats()
+        if stats["mean_response_seconds"] is not None
+    ]
+    return sum(means) / len(means) if means else 5.0
+
+
+def _admitted(tool: str) -> Callable[[F], F]:
+    """
+    Decorates a question tool so calls over the admission limits are turned away.
+
+    A call that is turned away returns a busy result at once instead of queueing.
+
+    Args:
+        tool: The tool name used as the metric label
+
+    Returns:
+        A decorator keeping the handler's signature, so tool schemas are unchanged
+    """
+
+    def decorator(handler: F) -> F:
+        @functools.wraps(handler)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            session_id = _session_id()
+            busy = admission.admit(session_id)
+            if busy is not None:
+                REJECTED_CALLS.inc(tool=tool, reason=busy["reason"])
+                return busy
+            ADMITTED_CALLS.inc(tool=tool)
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                admission.release(session_id)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _deadline(timeout_seconds: Optional[float]) -> Optional[float]:
+    """Returns the event loop time by which a question must be answered, if any."""
+    if timeout_seconds is None:
+        return None
+    return asyncio.get_running_loop().time() + timeout_seconds
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    """Returns the seconds left until the deadline, or None if there is none."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - asyncio.get_running_loop().time())
+
+
+async def _present(operator: str, request: QuestionRequest) -> QuestionReply:
+    """Presents a question on the local terminal, or on an operator's console."""
+    with HUMAN_RESPONSE.time(type=request["type"], operator=operator):
+        if console_server is None:
+            return await present_question(request)
+        return await console_server.ask(operator, request)
+
+
+async def _record_answer(entry: JournalEntry, answer: Awaitable[Any]) -> Any:
+    """
+    Waits for a journaled question's answer and records it durably.
+
+    Every journaled tool returns a result with a timed_out flag, which tells a real
+    answer from the agent's default. A question cancelled while the server stops is
+    left open, so the agent's retry after a restart finds it; one withdrawn by the
+    agent, e.g. on disconnect or when its ticket expires, is closed.
+    """
+    try:
+        result = await answer
+    except asyncio.CancelledError:
+        if not _stopping:
+            journal.closed(entry.id)
+        raise
+    except BaseException:
+        journal.closed(entry.id)
+        raise
+    if result["timed_out"]:
+        # A default is not worth replaying; ask the human again on retry
+        journal.closed(entry.id)
+    else:
+        await journal.answered(entry.id, result)
+    return result
+
+
+def _journaled(tool: str) -> Callable[[F], F]:
+    """
+    Decorates a question tool so its answer survives a server restart.
+
+    When the agent retries a question after a restart, an answer already given is
+    returned without asking again, and a question that was still open waits for the
+    re-asked one instead of queueing a second copy.
+
+    Args:
+        tool: The tool name recorded in the journal
+
+    Returns:
+        A decorator keeping the handler's signature, so tool schemas are unchanged
+    """
+
+    def decorator(handler: F) -> F:
+        signature = inspect.signature(handler)
+
+        def ask_again(entry: JournalEntry) -> Awaitable[Any]:
+            arguments = dict(entry.arguments, question=entry.question)
+            if "options" in signature.parameters:
+                arguments["options"] = entry.options
+            if arguments.get("timeout_seconds") is not None:
+                # The deadline keeps counting from when the question was first asked
+                elapsed = time.time() - entry.asked_at
+                arguments["timeout_seconds"] = max(
+                    0.0, arguments["timeout_seconds"] - elapsed
+                )
+            return handler(**arguments)
+
+        _journaled_tools[tool] = ask_again
+
+        @functools.wraps(handler)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if journal is None:
+                return await handler(*args, **kwargs)
+
+            arguments = signature.bind(*args, **kwargs).arguments
+            question = arguments.pop("question")
+            options = arguments.pop("options", None) or []
+
+            entry = journal.lookup(tool, question, options)
+            if entry is not None and entry.answered:
+                journal.closed(entry.id)
+                return entry.result
+
+            recovered = recovered_questions.pop(entry.id, None) if entry else None
+            if recovered is not None:
+                try:
+                    result = await asyncio.shield(recovered)
+                except asyncio.CancelledError:
+                    # The agent gave up again; keep asking for its next retry
+                    if not recovered.done():
+                        recovered_questions[entry.id] = recovered
+                    raise
+            else:
+                entry = journal.asked(tool, question, options, arguments)
+                result = await _record_answer(entry, handler(*args, **kwargs))
+
+            journal.closed(entry.id)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _recover_questions() -> None:
+    """Loads the journal and asks the previous run's open questions again."""
+    for entry in journal.load():
+        if entry.answered or entry.tool not in _journaled_tools:
+            continue
+        recovered_questions[entry.id] = asyncio.create_task(
+            _record_answer(entry, _journaled_tools[entry.tool](entry))
+        )
+
+
+async def _ask_operator(
+    question_type: QuestionType,
+    question: str,
+    options: Optional[List[str]],
+    priority: int,
+    deadline: Optional[float],
+    tags: Optional[List[str]],
+) -> QuestionReply:
+    """Waits for a free operator and presents the question to them."""
+    while True:
+        queued_at = time.perf_counter()
+        async with scheduler.turn(
+            _session_id(), priority, timeout=_remaining(deadline), tags=tags or ()
+        ) as grant:
+            QUEUE_WAIT.observe(time.perf_counter() - queued_at)
+            request = question_request(
+                question_type,
+                question,
+                options,
+                queued=grant.queued,
+                timeout_seconds=_remaining(deadline),
+            )
+            try:
+                reply = await _present(grant.operator, request)
+            except ConsoleDisconnectedError:
+                # Queue the question again for the next free operator
+                continue
+            grant.record_answer()
+            return reply
+
+
+async def _ask_human(
+    question_type: QuestionType,
+    question: str,
+    options: Optional[List[str]] = None,
+    priority: int = 0,
+    deadline: Optional[float] = None,
+    tags: Optional[List[str]] = None,
+) -> QuestionReply:
+    """
+    Waits for a free operator and presents the question to them.
+
+    A question asked again while the same question is still waiting for an answer,
+    by any session, is not asked twice: the caller waits for the question already
+    asked, until its own deadline. The shared question is asked with the priority,
+    deadline and tags of the caller that asked it first; a caller with time left
+    when it times out asks it again.
+
+    Args:
+        question_type: One of "free_form", "yes_no" or "multiple_choice"
+        question: The question to ask the user
+        options: List of choices, only for multiple choice
+        priority: Questions with a higher priority are asked first
+        deadline: Event loop time by which the question must be answered, if any
+        tags: Topics used to route the question to matching operators
+
+    Returns:
+        The operator's answer and any comments
+
+    Raises:
+        asyncio.TimeoutError: If no operator was free before the deadline
+        PromptTimeoutError: If the operator did not answer before the deadline
+    """
+    key = (question_type, normalize_question(question), tuple(options or ()))
+    while True:
+        asked = False
+
+        def ask() -> Awaitable[QuestionReply]:
+            nonlocal asked
+            asked = True
+            return _ask_operator(
+                question_type, question, options, priority, deadline, tags
+            )
+
+        try:
+            return await asyncio.wait_for(
+                questions_in_flight.do(key, ask), _remaining(deadline)
+            )
+        except (asyncio.TimeoutError, PromptTimeoutError):
+            if asked or _remaining(deadline) == 0:
+                raise
+            # The question we waited for timed out before our own deadline
+
 
 @mcp.tool(
     name="request_free_form_input",
-    description="Asks the user a free-form question and returns their textual response.",
+    description="Asks the user a free-form question and returns their textual response. If timeout_seconds is set and the user does not answer in time, the default is returned with timed_out set. The response is a dictionary: {'answer': str, 'timed_out': bool}. If the server is too busy to take the question, the response is {'busy': True, 'reason': str, 'retry_after_seconds': float} instead; ask again after that many seconds.",
 )
-async def request_free_form_input_tool(question: str) -> str:
+@timed_tool("request_free_form_input")
+@_admitted("request_free_form_input")
+@_withdraw_on_disconnect
+@_report_progress
+@_journaled("request_free_form_input")
+async def request_free_form_input_tool(
+    question: str,
+    priority: int = 0,
+    timeout_seconds: Optional[float] = None,
+    default: str = "",
+    tags: Optional[List[str]] = None,
+) -> Union[FreeFormAnswerReturnType, BusyReturnType]:
     """
     Tool for requesting free-form text input from the user.
 
     Args:
         question: The question to ask the user
+        priority: Questions with a higher priority are asked first
+        timeout_seconds: Seconds to wait for an answer, including time spent queued
+        default: The response returned if the user does not answer in time
+        tags: Topics used to route the question to matching operators
 
     Returns:
-        The user's text response
+        A dictionary containing the user's text response, or the default, and whether
+        the deadline passed.
+        Example: {"answer": "main", "timed_out": False}
     """
-    console.print(
-        Panel(
-            Text(question, style="italic white"),
-            title="[bold blue]🤖 Agent Asks (Free-form)[/bold blue]",
-            border_style="green",
-            expand=False,
+    deadline = _deadline(timeout_seconds)
+    try:
+        reply = await _ask_human(
+            "free_form", question, priority=priority, deadline=deadline, tags=tags
         )
-    )
-    return await ask_free_form("Your answer: ")
+    except (asyncio.TimeoutError, PromptTimeoutError):
+        return {"answer": default, "timed_out": True}
+    return {"answer": reply["answer"], "timed_out": False}
 
 
 @mcp.tool(
     name="request_yes_no_input",
-    description="Asks the user a yes/no question and returns their answer along with any optional comments. The response is a dictionary: {'answer': bool, 'comments': str}.",
+    description="Asks the user a yes/no question and returns their answer along with any optional comments. If timeout_seconds is set and the user does not answer in time, the default is returned with timed_out set. The response is a dictionary: {'answer': bool, 'comments': str, 'timed_out': bool}. If the server is too busy to take the question, the response is {'busy': True, 'reason': str, 'retry_after_seconds': float} instead; ask again after that many seconds.",
 )
-async def request_yes_no_input_tool(question: str) -> YesNoAnswerReturnType:
+@timed_tool("request_yes_no_input")
+@_admitted("request_yes_no_input")
+@_withdraw_on_disconnect
+@_report_progress
+@_journaled("request_yes_no_input")
+async def request_yes_no_input_tool(
+    question: str,
+    priority: int = 0,
+    timeout_seconds: Optional[float] = None,
+    default: bool = False,
+    tags: Optional[List[str]] = None,
+) -> Union[YesNoAnswerReturnType, BusyReturnType]:
     """
     Tool for requesting yes/no confirmation from the user, with optional comments.
 
     Args:
         question: The yes/no question to ask the user
+        priority: Questions with a higher priority are asked first
+        timeout_seconds: Seconds to wait for an answer, including time spent queued
+        default: The answer returned if the user does not answer in time
+        tags: Topics used to route the question to matching operators
 
     Returns:
-        A dictionary containing the boolean answer and any textual comments.
-        Example: {"answer": True, "comments": "This looks good."}
+        A dictionary containing the boolean answer, any textual comments and whether
+        the deadline passed.
+        Example: {"answer": True, "comments": "This looks good.", "timed_out": False}
     """
-    console.print(
-        Panel(
-            Text(question, style="italic white"),
-            title="[bold blue]🤖 Agent Asks (Yes/No)[/bold blue]",
-            border_style="yellow",
-            expand=False,
+    auto = auto_responder.match("yes_no", question) if auto_responder else None
+    if auto is not None:
+        return {"answer": auto.answer, "comments": auto.comments, "timed_out": False}
+
+    session_id = _session_id()
+    cached = answer_cache.get(session_id, "request_yes_no_input", question)
+    if cached is not None:
+        return cached
+
+    deadline = _deadline(timeout_seconds)
+    try:
+        reply = await _ask_human(
+            "yes_no", question, priority=priority, deadline=deadline, tags=tags
         )
-    )
-    answer = await ask_yes_no(f"{question} (yes/no):")
-    comments = await ask_free_form(
-        "Additional comments (optional, press Enter to skip): "
-    )
-    return {"answer": answer, "comments": comments or ""}
+    except (asyncio.TimeoutError, PromptTimeoutError):
+        return {"answer": default, "comments": "", "timed_out": True}
+
+    comments, remember = extract_remember(reply["comments"])
+    result: YesNoAnswerReturnType = {
+        "answer": reply["answer"],
+        "comments": comments,
+        "timed_out": False,
+    }
+    if remember:
+        answer_cache.put(session_id, "request_yes_no_input", question, result)
+    return result
 
 
 @mcp.tool(
     name="request_multiple_choice_input",
-    description="Presents the user with a list of options, returns their selected choices and any optional comments. The response is a dictionary: {'selection': List[str], 'comments': str}.",
+    description="Presents the user with a list of options, returns their selected choices and any optional comments. If timeout_seconds is set and the user does not answer in time, the default selection is returned with timed_out set. The response is a dictionary: {'selection': List[str], 'comments': str, 'timed_out': bool}. If the server is too busy to take the question, the response is {'busy': True, 'reason': str, 'retry_after_seconds': float} instead; ask again after that many seconds.",
 )
+@timed_tool("request_multiple_choice_input")
+@_admitted("request_multiple_choice_input")
+@_withdraw_on_disconnect
+@_report_progress
+@_journaled("request_multiple_choice_input")
 async def request_multiple_choice_input_tool(
-    question: str, options: List[str]
-) -> MultipleChoiceAnswerReturnType:
+    question: str,
+    options: List[str],
+    priority: int = 0,
+    timeout_seconds: Optional[float] = None,
+    default: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None,
+) -> Union[MultipleChoiceAnswerReturnType, BusyReturnType]:
     """
     Tool for requesting multiple choice selection from the user, with optional comments.
 
     Args:
         question: The question to ask the user
         options: List of choices to present
+        priority: Questions with a higher priority are asked first
+        timeout_seconds: Seconds to wait for an answer, including time spent queued
+        default: The selection returned if the user does not answer in time
+        tags: Topics used to route the question to matching operators
 
     Returns:
-        A dictionary containing the selected choices (list of strings) and any textual comments.
-        Example: {"selection": ["Option A"], "comments": "Option A is preferred because..."}
-        Returns {"selection": [], "comments": "ERROR_NO_OPTIONS"} if no options are provided.
+        A dictionary containing the selected choices (list of strings), any textual
+        comments and whether the deadline passed.
+        Example: {"selection": ["Option A"], "comments": "Option A is preferred because...", "timed_out": False}
+        Returns {"selection": [], "comments": "ERROR_NO_OPTIONS", "timed_out": False} if no options are provided.
     """
     if not options:
         error_message = (
             "Error: No options provided by the agent for the multiple-choice question."
         )
-        console.print(
+        await show(
             Panel(
                 error_message,
                 title="[bold red]Server Error[/bold red]",
                 border_style="red",
             )
         )
-        return {"selection": [], "comments": "ERROR_NO_OPTIONS"}
+        return {"selection": [], "comments": "ERROR_NO_OPTIONS", "timed_out": False}
 
-    console.print(
-        Panel(
-            Text(question, style="italic white"),
-            title="[bold blue]🤖 Agent Asks (Multiple Choice)[/bold blue]",
-            border_style="magenta",
-            expand=False,
-        )
+    auto = (
+        auto_responder.match("multiple_choice", question, options)
+        if auto_responder
+        else None
     )
-    selection = await ask_multiple_choice("Select an option:", options)
-    comments = await ask_free_form(
-        "Additional comments (optional, press Enter to skip): "
+    if auto is not None:
+        return {"selection": auto.answer, "comments": auto.comments, "timed_out": False}
+
+    session_id = _session_id()
+    cached = answer_cache.get(
+        session_id, "request_multiple_choice_input", question, options
     )
-    return {"selection": selection, "comments": comments or ""}
+    if cached is not None:
+        return cached
+
+    deadline = _deadline(timeout_seconds)
+    try:
+        reply = await _ask_human(
+            "multiple_choice", question, options, priority, deadline, tags
+        )
+    except (asyncio.TimeoutError, PromptTimeoutError):
+        return {"selection": default or [], "comments": "", "timed_out": True}
+
+    comments, remember = extract_remember(reply["comments"])
+    result: MultipleChoiceAnswerReturnType = {
+        "selection": reply["answer"],
+        "comments": comments,
+        "timed_out": False,
+    }
+    if remember:
+        answer_cache.put(
+            session_id, "request_multiple_choice_input", question, result, options
+        )
+    return result
+
+
+@mcp.tool(
+    name="request_batch_input",
+    description="Asks the user several free-form, yes/no and multiple-choice questions back-to-back in a single call. Each item is {'type': 'free_form' | 'yes_no' | 'multiple_choice', 'question': str, 'options': List[str]}, where options is only needed for multiple choice. The response is a dictionary: {'answers': [{'type', 'question', 'answer', 'comments'}], 'completed': bool}. If the server is too busy to take the question, the response is {'busy': True, 'reason': str, 'retry_after_seconds': float} instead; ask again after that many seconds.",
+)
+@timed_tool("request_batch_input")
+@_admitted("request_batch_input")
+@_withdraw_on_disconnect
+@_report_progress
+async def request_batch_input_tool(
+    questions: List[BatchQuestion],
+    priority: int = 0,
+    tags: Optional[List[str]] = None,
+) -> Union[BatchAnswerReturnType, BusyReturnType]:
+    """
+    Tool for asking several questions of mixed types in one round trip.
+
+    Args:
+        questions: The questions to ask, in order
+        priority: Questions with a higher priority are asked first
+        tags: Topics used to route the questions to matching operators
+
+    Returns:
+        A dictionary with the answers in question order and whether all were answered.
+        If the user cancels midway, the answers given so far are returned with
+        completed set to False.
+        Example: {"answers": [{"type": "yes_no", "question": "Run tests?",
+        "answer": True, "comments": ""}], "completed": True}
+    """
+    answers: List[BatchAnswer] = []
+    while len(answers) < len(questions):
+        # The whole batch is answered by one operator; if their console goes away,
+        # the remaining questions are queued again for the next free operator
+        queued_at = time.perf_counter()
+        async with scheduler.turn(_session_id(), priority, tags=tags or ()) as grant:
+            QUEUE_WAIT.observe(time.perf_counter() - queued_at)
+            try:
+                for position, item in enumerate(
+                    questions[len(answers) :], start=len(answers) + 1
+                ):
+                    if item.type == "multiple_choice" and not item.options:
+                        answers.append(
+                            {
+                                "type": item.type,
+                                "question": item.question,
+                                "answer": [],
+                                "comments": "ERROR_NO_OPTIONS",
+                            }
+                        )
+                        continue
+
+                    reply = await _present(
+                        grant.operator,
+                        question_request(
+                            item.type,
+                            item.question,
+                            item.options,
+                            queued=grant.queued,
+                            raise_on_cancel=True,
+                            position=f"{position} of {len(questions)}",
+                        ),
+                    )
+                    grant.record_answer()
+                    answers.append(
+                        {
+                            "type": item.type,
+                            "question": item.question,
+                            "answer": reply["answer"],
+                            "comments": reply["comments"],
+                        }
+                    )
+            except PromptCancelledError:
+                return {"answers": answers, "completed": False}
+            except ConsoleDisconnectedError:
+                continue
+
+    return {"answers": answers, "completed": True}
+
+
+@mcp.tool(
+    name="submit_question",
+    description="Submits a free-form, yes/no or multiple-choice question and returns a ticket id at once, so the agent can keep working while the user answers. Collect the answer with get_answer. Uncollected tickets expire. The response is a dictionary: {'ticket_id': str, 'expires_in_seconds': float}.",
+)
+@timed_tool("submit_question")
+async def submit_question_tool(
+    question: str,
+    type: QuestionType = "free_form",
+    options: Optional[List[str]] = None,
+    priority: int = 0,
+    tags: Optional[List[str]] = None,
+) -> SubmitQuestionReturnType:
+    """
+    Tool for asking a question without waiting for the answer.
+
+    Args:
+        question: The question to ask the user
+        type: One of "free_form", "yes_no" or "multiple_choice"
+        options: List of choices, only for multiple choice
+        priority: Questions with a higher priority are asked first
+        tags: Topics used to route the question to matching operators
+
+    Returns:
+        A dictionary containing the ticket id and how long the ticket is kept.
+        Example: {"ticket_id": "9f1c...", "expires_in_seconds": 3600.0}
+    """
+    if type == "yes_no":
+        pending = request_yes_no_input_tool(question, priority, tags=tags)
+    elif type == "multiple_choice":
+        pending = request_multiple_choice_input_tool(
+            question, options or [], priority, tags=tags
+        )
+    else:
+        pending = request_free_form_input_tool(question, priority, tags=tags)
+
+    # The ticket's task starts with a copy of this context
+    detached = _answering_ticket.set(True)
+    try:
+        ticket_id = tickets.submit(pending)
+    finally:
+        _answering_ticket.reset(detached)
+    return {"ticket_id": ticket_id, "expires_in_seconds": tickets.ttl_seconds}
+
+
+@mcp.tool(
+    name="get_answer",
+    description="Returns the answer for a ticket from submit_question. With wait_seconds=0 (the default) it returns at once; otherwise it waits up to wait_seconds for the user. status is 'pending', 'answered', 'failed' or 'not_found' (unknown, expired or already collected), and result holds the same answer the matching request_* tool returns. The response is a dictionary: {'ticket_id': str, 'status': str, 'result': Any}.",
+)
+@timed_tool("get_answer")
+@_report_progress
+async def get_answer_tool(ticket_id: str, wait_seconds: float = 0) -> TicketResult:
+    """
+    Tool for collecting the answer to a submitted question.
+
+    Args:
+        ticket_id: The ticket id returned by submit_question
+        wait_seconds: Seconds to wait for the answer, 0 to return immediately
+
+    Returns:
+        A dictionary with the ticket status and, once answered, the answer.
+        Example: {"ticket_id": "9f1c...", "status": "answered", "result": {"answer": True, "comments": "", "timed_out": False}}
+    """
+    return await tickets.collect(ticket_id, wait_seconds)
+
+
+@mcp.tool(
+    name="notify_user",
+    description="Tells the user something that needs no reply, such as progress ('starting migration...') or a finished step, and returns at once. Use this instead of the request_* tools when you do not need an answer. Messages are shown between questions, never over one; repeats of a recent message are folded into it. level is 'info', 'success', 'warning' or 'error'. The response is a dictionary: {'notification_id': int, 'coalesced': bool}.",
+)
+@timed_tool("notify_user")
+async def notify_user_tool(
+    message: str, level: NotificationLevel = "info"
+) -> NotifyReturnType:
+    """
+    Tool for telling the user something without waiting for them.
+
+    Args:
+        message: The message to show the user
+        level: One of "info", "success", "warning" or "error"
+
+    Returns:
+        A dictionary with the notification id and whether it was folded into a recent
+        identical message.
+        Example: {"notification_id": 12, "coalesced": False}
+    """
+    notification, coalesced = notifications.notify(_session_id(), message, level)
+    NOTIFICATIONS.inc(level=level)
+    return {"notification_id": notification["id"], "coalesced": coalesced}
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_route(request: Request) -> Response:
+    """Exposes latency histograms and queue gauges in the Prometheus format."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@mcp.custom_route("/operators", methods=["GET"])
+async def operators_route(request: Request) -> JSONResponse:
+    """Reports the operators answering questions, with their throughput."""
+    return JSONResponse(scheduler.operator_stats())
+
+
+@mcp.custom_route("/notifications", methods=["GET"])
+async def notifications_route(request: Request) -> JSONResponse:
+    """Returns the scrollback of agent notifications, oldest first."""
+    try:
+        since = int(request.query_params.get("since", 0))
+        limit = request.query_params.get("limit")
+        history: List[Notification] = notifications.history(
+            since, int(limit) if limit is not None else None
+        )
+    except ValueError:
+        return JSONResponse(
+            {"error": "since and limit must be integers"}, status_code=400
+        )
+    return JSONResponse(history)
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Reads a boolean environment variable such as "true", "1" or "yes"."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Network transports the server can be started with, mapped to their endpoint path.
+# stdio is only offered when running headless, since it would otherwise share stdin
+# with the prompts.
+TRANSPORT_PATHS = {
+    "sse": mcp.settings.sse_path,
+    "streamable-http": mcp.settings.streamable_http_path,
+}
+
+
+class _HTTPServer(uvicorn.Server):
+    """Marks the server as stopping before uvicorn closes the agents' connections."""
+
+    async def shutdown(self, sockets: Optional[List[Any]] = None) -> None:
+        global _stopping
+        _stopping = True
+        await super().shutdown(sockets)
+
+
+async def _serve_stdio() -> None:
+    """
+    Serves MCP over stdio. When the server is interrupted, it is marked as stopping
+    before the calls still running are cancelled.
+    """
+    global _stopping
+    serving = asyncio.create_task(mcp.run_stdio_async())
+    try:
+        await asyncio.shield(serving)
+    except asyncio.CancelledError:
+        _stopping = True
+        serving.cancel()
+        await asyncio.gather(serving, return_exceptions=True)
+        raise
+
+
+async def _serve_http(transport: str) -> None:
+    """
+    Serves MCP over HTTP. Once the listener accepts connections, the terminal prompts
+    are loaded in the background so the first question does not wait for them.
+    """
+    app = mcp.sse_app() if transport == "sse" else mcp.streamable_http_app()
+    server = _HTTPServer(
+        uvicorn.Config(
+            app,
+            host=mcp.settings.host,
+            port=mcp.settings.port,
+            log_level=mcp.settings.log_level.lower(),
+        )
+    )
+    serving = asyncio.create_task(server.serve())
+    with startup.phase("bind listener"):
+        while not server.started and not serving.done():
+            await asyncio.sleep(0.005)
+    if server.started:
+        startup.listening()
+        if console_server is None:
+            with startup.phase("load prompts (after listening)"):
+                await asyncio.to_thread(load_prompts)
+        if startup.finish(console):
+            server.should_exit = True
+    await serving
+
+
+async def _serve(transport: str) -> None:
+    """Starts the console listener and journal recovery, then serves MCP."""
+    global _stopping
+    startup.initialized()
+    loop_lag.start()
+    if console_server is not None:
+        with startup.phase("console listener"):
+            await console_server.start()
+    if journal is not None:
+        with startup.phase("journal recovery"):
+            _recover_questions()
+    try:
+        if transport == "stdio":
+            startup.listening()
+            if not startup.finish(console):
+                await _serve_stdio()
+        else:
+            await _serve_http(transport)
+    finally:
+        _stopping = True
+        # Withdraw questions still waiting to be collected by ticket
+        await tickets.cancel_all()
+        await loop_lag.stop()
+        await notifications.close()
+        if console_server is not None:
+            await console_server.stop()
+        if journal is not None:
+            await journal.close()
+        # Last, so notices written while shutting down still reach the terminal
+        await renderer.stop()
 
 
 if __name__ == "__main__":
@@ -145,18 +1136,41 @@ if __name__ == "__main__":
         "HOST", "0.0.0.0"
     )  # Listen on all interfaces, crucial for Docker
     port = int(os.environ.get("PORT", 8100))  # Default port, can be configured
+    transport = os.environ.get("TRANSPORT", "sse")
+    transports = list(TRANSPORT_PATHS) + (["stdio"] if console_server else [])
+    if transport not in transports:
+        raise SystemExit(
+            f"Unsupported TRANSPORT '{transport}', "
+            f"expected one of: {', '.join(transports)}"
+        )
+
+    # Only used by streamable HTTP: no session state between requests, and plain
+    # JSON responses instead of an SSE stream per call
+    mcp.settings.stateless_http = _env_flag("STATELESS_HTTP")
+    mcp.settings.json_response = _env_flag("JSON_RESPONSE")
+
+    if transport == "stdio":
+        # stdout carries the protocol, so messages for humans go to stderr
+        console.stderr = True
+        listening = "stdio"
+    else:
+        url = f"http://{host}:{port}{TRANSPORT_PATHS[transport]}"
+        listening = f"[link={url}]{url}[/link] ({transport})"
 
     console.print(
         f"🚀 Starting Interactive MCP Server ([bold cyan]{mcp.name}[/bold cyan])...",
         style="green",
     )
-    console.print(
-        f"   Listening on [link=http://{host}:{port}/sse]http://{host}:{port}/sse[/link]"
-    )
+    console.print(f"   Listening on {listening}")
+    if console_server is not None:
+        console.print(
+            f"   Questions go to the console attached at {console_server.address}. "
+            "Attach with: [bold]python -m src.attach[/bold]"
+        )
     console.print(
         "   [italic]Waiting for agent connections. Press Ctrl+C to stop.[/italic]"
     )
 
     mcp.settings.host = host
     mcp.settings.port = port
-    mcp.run(transport="sse")
+    asyncio.run(_serve(transport))
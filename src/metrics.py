@@ -0,0 +1,296 @@
+"""
+Metrics Module
+
+This module records where time goes while a human answers an agent: how long
+questions wait for an operator, how long the human takes, how long panels take to
+render and how long each tool call takes end to end. Metrics are kept in memory and
+rendered in the Prometheus text exposition format for the /metrics route.
+"""
+
+import bisect
+import contextlib
+import functools
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# Bucket upper bounds in seconds, from fast renders up to a human thinking for minutes
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+    600.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return f"{{{pairs}}}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """A Prometheus histogram with optional labels."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: the count in each bucket (plus +Inf), the sum and the count
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Records one observation.
+
+        Args:
+            value: The observed value, in seconds for the built-in metrics
+            labels: A value for each of the histogram's label names
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observes the time spent in the block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Returns the number of observations for a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_number(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    """A Prometheus counter with optional labels."""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Adds to the counter for a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Returns the count for a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for key, value in sorted(self._values.items()):
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_number(value)}")
+        return lines
+
+
+class Gauge:
+    """A Prometheus gauge whose value is read from a callback at scrape time."""
+
+    def __init__(
+        self, name: str, documentation: str, function: Callable[[], float]
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format_number(self.function())}",
+        ]
+
+
+class Registry:
+    """The set of metrics exposed together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Creates and registers a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Creates and registers a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, function: Callable[[], float]
+    ) -> Gauge:
+        """Creates and registers a gauge read from a callback."""
+        return self._register(Gauge(name, documentation, function))
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Any) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = Registry()
+
+TOOL_LATENCY = REGISTRY.histogram(
+    "pairpilot_tool_latency_seconds",
+    "End-to-end time to handle a tool call.",
+    ["tool"],
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "pairpilot_queue_wait_seconds",
+    "Time a question waited for an operator to be free.",
+)
+HUMAN_RESPONSE = REGISTRY.histogram(
+    "pairpilot_human_response_seconds",
+    "Time from presenting a question to receiving the answer.",
+    ["type", "operator"],
+)
+PROMPT_DURATION = REGISTRY.histogram(
+    "pairpilot_prompt_seconds",
+    "Time spent in a single terminal prompt, by how it ended.",
+    ["prompt", "outcome"],
+)
+RENDER_DURATION = REGISTRY.histogram(
+    "pairpilot_render_seconds",
+    "Time to render a question panel in the terminal.",
+    ["type"],
+)
+ADMITTED_CALLS = REGISTRY.counter(
+    "pairpilot_admitted_calls_total",
+    "Question tool calls let in by admission control.",
+    ["tool"],
+)
+REJECTED_CALLS = REGISTRY.counter(
+    "pairpilot_rejected_calls_total",
+    "Question tool calls turned away as busy, by the limit they hit.",
+    ["tool", "reason"],
+)
+NOTIFICATIONS = REGISTRY.counter(
+    "pairpilot_notifications_total",
+    "Notifications sent by agents with notify_user, by level.",
+    ["level"],
+)
+LOOP_LAG = REGISTRY.histogram(
+    "pairpilot_event_loop_lag_seconds",
+    "How late the event loop ran a timer, i.e. how long the loop was blocked.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def timed_tool(name: str) -> Callable[[F], F]:
+    """
+    Decorates an async tool handler to record its end-to-end latency.
+
+    Args:
+        name: The tool name used as the metric label
+
+    Returns:
+        A decorator keeping the handler's signature, so tool schemas are unchanged
+    """
+
+    def decorator(handler: F) -> F:
+        @functools.wraps(handler)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with TOOL_LATENCY.time(tool=name):
+                return await handler(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,261 @@
+"""
+Notifications Module
+
+This module shows status messages from agents, such as "starting migration...",
+without making the agent wait for the human. Messages are kept in a bounded ring buffer
+and written to the terminal in batches, at most once per flush interval, as a compact
+status panel. A message repeated by the same session while its earlier copy is recent
+is folded into it with a count instead of being shown again, and of a burst of messages
+only the latest few are shown. Nothing is written while a question prompt is on
+screen; held messages are shown once it closes. The ring buffer can be read back as a
+scrollback of everything that was sent.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import (
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+from rich.console import Group, RenderableType
+from rich.panel import Panel
+from rich.text import Text
+
+from .answer_cache import normalize_question
+
+logger = logging.getLogger(__name__)
+
+NotificationLevel = Literal["info", "success", "warning", "error"]
+
+# Icon and style for each level
+LEVEL_STYLES = {
+    "info": ("ℹ", "cyan"),
+    "success": ("✔", "green"),
+    "warning": ("⚠", "yellow"),
+    "error": ("✖", "red"),
+}
+
+# Messages are cut to this many characters
+MAX_MESSAGE_CHARS = 500
+
+# Seconds between checks whether the prompt holding back notifications has closed
+HOLD_POLL_SECONDS = 0.1
+
+# Sessions given a label before labels of sessions no longer in the buffer are dropped
+MAX_TRACKED_SESSIONS = 1024
+
+
+class Notification(TypedDict):
+    id: int
+    session: str
+    level: NotificationLevel
+    message: str
+    count: int
+    first_at: float
+    last_at: float
+
+
+def _key(notification: Notification) -> Tuple[str, str, str]:
+    return (
+        notification["session"],
+        notification["level"],
+        normalize_question(notification["message"]),
+    )
+
+
+class NotificationBoard:
+    """Ring buffer of agent notifications, written in rate-limited batches."""
+
+    def __init__(
+        self,
+        write: Callable[[RenderableType], Awaitable[None]],
+        history: int = 200,
+        flush_interval: float = 1.0,
+        max_lines: int = 5,
+        coalesce_seconds: float = 30.0,
+        hold: Callable[[], bool] = lambda: False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.write = write
+        self.history_size = max(1, history)
+        self.flush_interval = flush_interval
+        self.max_lines = max(1, max_lines)
+        self.coalesce_seconds = coalesce_seconds
+        # Whether writing now would interrupt a prompt
+        self.hold = hold
+        self.clock = clock
+        self._history: Deque[Notification] = deque()
+        self._latest: Dict[Tuple[str, str, str], Notification] = {}
+        self._pending: Dict[int, Notification] = {}
+        self._labels: Dict[str, str] = {}
+        self._ids = itertools.count(1)
+        self._agents = itertools.count(1)
+        self._next_flush = 0.0
+        self._flusher: "Optional[asyncio.Task[None]]" = None
+
+    def __len__(self) -> int:
+        return len(self._history)
+
+    @property
+    def pending(self) -> int:
+        """Notifications not written to the terminal yet."""
+        return len(self._pending)
+
+    def notify(
+        self, session_id: str, message: str, level: NotificationLevel = "info"
+    ) -> Tuple[Notification, bool]:
+        """
+        Records a notification and schedules it to be shown.
+
+        Args:
+            session_id: Identifier of the sending session
+            message: The text to show
+            level: One of "info", "success", "warning" or "error"
+
+        Returns:
+            The notification, and whether it was folded into a recent identical one
+        """
+        message = message.strip()
+        if len(message) > MAX_MESSAGE_CHARS:
+            message = message[: MAX_MESSAGE_CHARS - 1] + "…"
+        now = self.clock()
+        notification: Notification = {
+            "id": 0,
+            "session": self._label(session_id),
+            "level": level,
+            "message": message,
+            "count": 1,
+            "first_at": now,
+            "last_at": now,
+        }
+        key = _key(notification)
+        latest = self._latest.get(key)
+        if latest is not None and now - latest["last_at"] <= self.coalesce_seconds:
+            latest["count"] += 1
+            latest["last_at"] = now
+            return latest, True
+
+        notification["id"] = next(self._ids)
+        if len(self._history) >= self.history_size:
+            self._evict(self._history.popleft())
+        self._history.append(notification)
+        self._latest[key] = notification
+        self._pending[notification["id"]] = notification
+        self._schedule()
+        return notification, False
+
+    def history(
+        self, since: int = 0, limit: Optional[int] = None
+    ) -> List[Notification]:
+        """
+        Returns the notifications in the ring buffer, oldest first.
+
+        Args:
+            since: Only return notifications with a higher id
+            limit: Only return this many of the latest notifications
+
+        Returns:
+            Copies of the notifications
+        """
+        found = [dict(item) for item in self._history if item["id"] > since]
+        if limit is not None:
+            found = found[-limit:] if limit > 0 else []
+        return found  # type: ignore[return-value]
+
+    def render(self, notifications: List[Notification], skipped: int = 0) -> Panel:
+        """Lays out notifications as a status panel, noting how many were left out."""
+        lines: List[RenderableType] = []
+        if skipped:
+            lines.append(
+                Text(f"… {skipped} earlier update(s) not shown", style="dim italic")
+            )
+        for notification in notifications:
+            icon, style = LEVEL_STYLES[notification["level"]]
+            line = Text.assemble(
+                (
+                    time.strftime("%H:%M:%S", time.localtime(notification["last_at"])),
+                    "dim",
+                ),
+                " ",
+                (icon, style),
+                " ",
+                (notification["session"], "bold"),
+                " ",
+                # Agent text is never parsed as markup
+                (notification["message"], style),
+            )
+            if notification["count"] > 1:
+                line.append(f" ×{notification['count']}", style="dim")
+            lines.append(line)
+        return Panel(
+            Group(*lines),
+            title="[bold blue]📣 Agent Updates[/bold blue]",
+            title_align="left",
+            border_style="blue",
+        )
+
+    async def close(self) -> None:
+        """Stops writing notifications; ones not shown yet stay in the history."""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+
+    def _label(self, session_id: str) -> str:
+        label = self._labels.get(session_id)
+        if label is None:
+            if len(self._labels) >= MAX_TRACKED_SESSIONS:
+                # Keep labels stable for sessions still in the scrollback
+                in_use = {item["session"] for item in self._history}
+                self._labels = {
+                    session: name
+                    for session, name in self._labels.items()
+                    if name in in_use
+                }
+            label = self._labels[session_id] = f"agent {next(self._agents)}"
+        return label
+
+    def _evict(self, notification: Notification) -> None:
+        key = _key(notification)
+        if self._latest.get(key) is notification:
+            del self._latest[key]
+        self._pending.pop(notification["id"], None)
+
+    def _schedule(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self) -> None:
+        # Runs while there is something to show, so an idle board has no task
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            wait = self._next_flush - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            if self.hold():
+                await asyncio.sleep(HOLD_POLL_SECONDS)
+                continue
+            batch = list(self._pending.values())
+            self._pending.clear()
+            skipped = max(0, len(batch) - self.max_lines)
+            self._next_flush = loop.time() + self.flush_interval
+            try:
+                await self.write(self.render(batch[skipped:], skipped))
+            except Exception:
+                # The notifications stay in the history for the scrollback
+                logger.exception("Could not show %d notification(s)", len(batch))
@@ -0,0 +1,228 @@
+"""
+Question View Module
+
+This module prepares a question for the terminal. Agents often paste whole diffs,
+logs and stack traces into a question, so the text is first cut to a byte limit,
+before any styling work, and then split into prose and code segments: fenced code
+blocks, unified diffs and Python tracebacks are detected and syntax-highlighted. Only
+a size-bounded preview is shown in the question panel; the full text can be read in a
+pager, where code is highlighted in chunks so no single step is unbounded.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from rich.console import RenderableType
+from rich.syntax import Syntax
+from rich.text import Text
+
+QUESTION_STYLE = "italic white"
+CODE_THEME = "monokai"
+
+# Lines of code highlighted at once in the pager
+HIGHLIGHT_CHUNK_LINES = 200
+
+# Questions shorter than this on a single line are used as the prompt message as is
+MAX_PROMPT_CHARS = 200
+
+_FENCE = re.compile(r"^\s*```\s*([\w+#.-]*)\s*$")
+_HUNK = re.compile(r"^@@ -\d+(,\d+)? \+\d+(,\d+)? @@")
+_DIFF_LINE = re.compile(
+    r"^([ +\-\\]|@@ |diff |index |--- |\+\+\+ |new file|deleted file|similarity"
+    r"|rename |old mode|new mode|Binary files|Index: |====)"
+)
+_TRACEBACK_START = "Traceback (most recent call last):"
+
+
+@dataclass(frozen=True)
+class Segment:
+    # Lexer name for code, or None for prose
+    lexer: Optional[str]
+    body: str
+
+    @property
+    def line_count(self) -> int:
+        return self.body.count("\n") + 1
+
+
+def limit_bytes(text: str, max_bytes: int) -> Tuple[str, int]:
+    """
+    Cuts text to at most max_bytes of UTF-8, without splitting a character.
+
+    Returns:
+        The text that fits and the number of bytes left out
+    """
+    if len(text) * 4 <= max_bytes:
+        return text, 0
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text, 0
+    kept = encoded[:max_bytes].decode("utf-8", errors="ignore")
+    return kept, len(encoded) - len(kept.encode("utf-8"))
+
+
+def _starts_diff(lines: List[str], index: int) -> bool:
+    line = lines[index]
+    if line.startswith(("diff --git ", "Index: ")) or _HUNK.match(line):
+        return True
+    return (
+        line.startswith("--- ")
+        and index + 1 < len(lines)
+        and lines[index + 1].startswith("+++ ")
+    )
+
+
+def split_segments(text: str) -> List[Segment]:
+    """
+    Splits a question into prose and code segments.
+
+    Args:
+        text: The question, already cut to the byte limit
+
+    Returns:
+        The segments in order, without the fences around code blocks
+    """
+    lines = text.split("\n")
+    segments: List[Segment] = []
+    prose: List[str] = []
+
+    def add_code(lexer: str, body: List[str]) -> None:
+        if prose:
+            segments.append(Segment(None, "\n".join(prose)))
+            prose.clear()
+        if body:
+            segments.append(Segment(lexer, "\n".join(body)))
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        fence = _FENCE.match(line)
+        if fence:
+            end = index + 1
+            while end < len(lines) and not _FENCE.match(lines[end]):
+                end += 1
+            add_code(fence.group(1).lower() or "text", lines[index + 1 : end])
+            index = end + 1
+        elif _starts_diff(lines, index):
+            end = index + 1
+            while end < len(lines) and (not lines[end] or _DIFF_LINE.match(lines[end])):
+                end += 1
+            # Trailing blank lines belong to the prose that follows
+            while end > index + 1 and not lines[end - 1]:
+                end -= 1
+            add_code("diff", lines[index:end])
+            index = end
+        elif line.startswith(_TRACEBACK_START):
+            end = index + 1
+            while end < len(lines) and lines[end][:1] in (" ", "\t"):
+                end += 1
+            # The exception line closes the traceback
+            end = min(end + 1, len(lines))
+            add_code("pytb", lines[index:end])
+            index = end
+        else:
+            prose.append(line)
+            index += 1
+    if prose:
+        segments.append(Segment(None, "\n".join(prose)))
+    return segments
+
+
+def preview(
+    segments: List[Segment], max_lines: int, max_chars: int
+) -> Tuple[List[Segment], int, int]:
+    """
+    Takes the start of the segments, up to a number of lines and characters.
+
+    Returns:
+        The preview segments, the number of lines left out and the number of
+        characters left out, including those cut from the end of the last line shown
+    """
+    shown: List[Segment] = []
+    lines_left, chars_left = max_lines, max_chars
+    hidden_lines = hidden_chars = 0
+    for segment in segments:
+        if lines_left <= 0 or chars_left <= 0:
+            hidden_lines += segment.line_count
+            hidden_chars += len(segment.body)
+            continue
+        lines = segment.body.split("\n")
+        kept = lines[:lines_left]
+        body = "\n".join(kept)
+        cut = len(body) > chars_left
+        if cut:
+            body = body[:chars_left]
+            kept = body.split("\n")
+        hidden_lines += len(lines) - len(kept)
+        hidden_chars += len(segment.body) - len(body)
+        lines_left -= len(kept)
+        chars_left -= len(body)
+        shown.append(Segment(segment.lexer, body + "…" if cut else body))
+    return shown, hidden_lines, hidden_chars
+
+
+def render(
+    segments: List[Segment], chunk_lines: Optional[int] = None
+) -> Iterator[RenderableType]:
+    """
+    Yields a renderable per prose segment and per chunk of code.
+
+    Args:
+        segments: What to render
+        chunk_lines: Highlight code this many lines at a time, or all at once if None
+    """
+    for segment in segments:
+        if segment.lexer is None:
+            yield Text(segment.body, style=QUESTION_STYLE)
+            continue
+        lines = segment.body.split("\n")
+        step = chunk_lines or len(lines)
+        for start in range(0, len(lines), step):
+            yield Syntax(
+                "\n".join(lines[start : start + step]),
+                segment.lexer,
+                theme=CODE_THEME,
+                background_color="default",
+                word_wrap=True,
+            )
+
+
+def prompt_message(question: str) -> str:
+    """
+    Returns the message to show at the answer prompt: the question itself if it is
+    short, otherwise its first line, since the panel above shows the rest.
+    """
+    if "\n" not in question and len(question) <= MAX_PROMPT_CHARS:
+        return question
+    first = next((line.strip() for line in question.split("\n") if line.strip()), "")
+    if len(first) > 80:
+        first = first[:80].rstrip()
+    return f"{first} …" if first else "Your answer:"
+
+
+class QuestionView:
+    """A question cut to the byte limit and split for rendering."""
+
+    def __init__(
+        self, question: str, max_bytes: int, preview_lines: int, preview_chars: int
+    ) -> None:
+        self.text, self.omitted_bytes = limit_bytes(question, max_bytes)
+        self.segments = split_segments(self.text)
+        self.line_count = self.text.count("\n") + 1
+        self.preview, self.hidden_lines, self.hidden_chars = preview(
+            self.segments, preview_lines, preview_chars
+        )
+
+    @property
+    def truncated(self) -> bool:
+        """Whether the panel shows less than the whole question."""
+        return bool(self.hidden_chars or self.omitted_bytes)
+
+    def omitted_note(self) -> Optional[Text]:
+        if not self.omitted_bytes:
+            return None
+        return Text(
+            f"… {self.omitted_bytes:,} more bytes not shown (QUESTION_MAX_BYTES)",
+            style="dim",
+        )
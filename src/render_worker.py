@@ -0,0 +1,146 @@
+"""
+Render Worker Module
+
+This module moves terminal output off the event loop. Laying out a rich panel and
+writing it to the terminal is synchronous, and a slow terminal or a large panel would
+otherwise stall every connected session: SSE keep-alives, tool calls and console
+frames all wait for the loop. A render worker is a thread that takes output jobs from
+a bounded queue and runs them one at a time, in the order they were submitted, so
+output never interleaves. Callers await their job without blocking the loop. When
+the queue is full, jobs wait their turn in a backlog that a single task feeds into the
+queue as room frees up, so they still run in the order they were submitted.
+"""
+
+import asyncio
+import queue
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_Job = Tuple[
+    Callable[..., Any],
+    Tuple[Any, ...],
+    Any,
+    Optional[asyncio.AbstractEventLoop],
+    Optional[asyncio.Future],
+]
+
+
+def _settle(
+    future: "asyncio.Future[Any]", result: Any, error: Optional[BaseException]
+) -> None:
+    # The caller may have stopped waiting, e.g. its tool call was cancelled
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class RenderWorker:
+    """Thread running terminal output jobs in order, off the event loop."""
+
+    def __init__(self, max_pending: int = 64) -> None:
+        self._jobs: "queue.Queue[Optional[_Job]]" = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Jobs waiting for room in the queue, oldest first
+        self._backlog: Deque[_Job] = deque()
+        self._feeder: "Optional[asyncio.Task[None]]" = None
+
+    @property
+    def pending(self) -> int:
+        """Jobs waiting for the worker."""
+        return self._jobs.qsize() + len(self._backlog)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="render-worker", daemon=True
+                )
+                self._thread.start()
+
+    async def call(self, render: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Runs a rendering function on the worker thread.
+
+        Args:
+            render: Writes to the terminal, e.g. console.print
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            What the function returned, once it has run. Its exception is raised here.
+        """
+        self._start()
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[T]" = loop.create_future()
+        job = (render, args, kwargs, loop, future)
+        if self._backlog or not self._offer(job):
+            # Too much output is backed up: queue behind the jobs already waiting
+            self._backlog.append(job)
+            if self._feeder is None or self._feeder.done():
+                self._feeder = loop.create_task(self._feed())
+        return await future
+
+    def post(self, render: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Queues a rendering function without waiting for it to run.
+
+        For notices that may be written from code that cannot wait, such as a task
+        being cancelled. A notice that does not fit in the queue is dropped.
+        """
+        self._start()
+        if not self._backlog:
+            self._offer((render, args, kwargs, None, None))
+
+    def close(self) -> None:
+        """Stops the worker once the jobs already in its queue have run."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join()
+
+    async def stop(self) -> None:
+        """Stops the worker once every job submitted so far has run, backlog included."""
+        feeder = self._feeder
+        if feeder is not None and not feeder.done():
+            await asyncio.shield(feeder)
+        await asyncio.to_thread(self.close)
+
+    def _offer(self, job: _Job) -> bool:
+        try:
+            self._jobs.put_nowait(job)
+        except queue.Full:
+            return False
+        return True
+
+    async def _feed(self) -> None:
+        # The only task moving the backlog, so its jobs keep their order
+        while self._backlog:
+            await asyncio.to_thread(self._jobs.put, self._backlog[0])
+            self._backlog.popleft()
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            render, args, kwargs, loop, future = job
+            result, error = None, None
+            try:
+                result = render(*args, **kwargs)
+            except BaseException as exception:
+                error = exception
+            if future is None:
+                continue
+            try:
+                loop.call_soon_threadsafe(_settle, future, result, error)
+            except RuntimeError:
+                # The loop has closed, nobody is waiting anymore
+                pass
@@ -0,0 +1,282 @@
+"""
+Prompt Scheduler Module
+
+This module hands out questions to the humans answering them. Each operator (the
+local terminal, or every attached console when running headless) answers one question
+at a time, so prompts never interleave on a terminal. Waiting questions are granted by
+priority first and then round-robin across sessions, so one chatty agent cannot starve
+the others. Whenever an operator becomes free it pulls the best waiting question it is
+eligible for, so idle operators never sit next to a backlog.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterator,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+)
+
+DEFAULT_SESSION_ID = "local"
+
+# Name of the operator answering on the server's own terminal
+LOCAL_OPERATOR = "terminal"
+
+# Upper bound on the number of sessions remembered for round-robin fairness
+MAX_TRACKED_SESSIONS = 1024
+
+# Number of recent response times kept per operator for statistics
+RESPONSE_TIME_WINDOW = 100
+
+
+@dataclass(eq=False)
+class _Ticket:
+    session_id: str
+    priority: int
+    tags: FrozenSet[str]
+    sequence: int
+    granted: "asyncio.Future[str]"
+    # Whether the operator answered during the turn, which is all the stats count
+    answered: bool = False
+
+
+@dataclass(eq=False)
+class _Operator:
+    name: str
+    tags: FrozenSet[str]
+    attached_at: float = field(default_factory=time.monotonic)
+    active: Optional[_Ticket] = None
+    granted_at: float = 0.0
+    last_granted: int = -1
+    answered: int = 0
+    response_times: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=RESPONSE_TIME_WINDOW)
+    )
+
+    def accepts(self, ticket: _Ticket) -> bool:
+        # Untagged operators take anything; tagged ones take untagged questions and
+        # questions sharing a tag with them
+        return not self.tags or not ticket.tags or bool(self.tags & ticket.tags)
+
+
+@dataclass(frozen=True)
+class Grant:
+    operator: str
+    queued: int
+    _ticket: _Ticket = field(repr=False, compare=False)
+
+    def record_answer(self) -> None:
+        """
+        Counts the turn towards the operator's answers and response times.
+
+        Turns that end without an answer, because the caller was cancelled or timed
+        out, are left out of the statistics.
+        """
+        self._ticket.answered = True
+
+
+class OperatorStats(TypedDict):
+    name: str
+    tags: List[str]
+    busy: bool
+    answered: int
+    answers_per_minute: float
+    mean_response_seconds: Optional[float]
+    p95_response_seconds: Optional[float]
+
+
+class PromptScheduler:
+    """
+    Grants each question exclusive use of one operator at a time.
+
+    Waiting questions are ordered by descending priority, then by the session that was
+    served least recently, then by arrival order. Free operators are filled in order of
+    who has waited longest for work.
+    """
+
+    def __init__(self, operators: Iterable[str] = (LOCAL_OPERATOR,)) -> None:
+        self._waiting: List[_Ticket] = []
+        self._operators: Dict[str, _Operator] = {}
+        self._last_served: "OrderedDict[str, int]" = OrderedDict()
+        self._arrivals = itertools.count()
+        self._grants = itertools.count()
+        for name in operators:
+            self.add_operator(name)
+
+    @property
+    def pending(self) -> int:
+        """Number of questions waiting for an operator."""
+        return len(self._waiting)
+
+    @property
+    def busy(self) -> bool:
+        """Whether any operator is currently answering a question."""
+        return any(operator.active for operator in self._operators.values())
+
+    def position(self, session_id: str) -> Optional[int]:
+        """
+        Returns how many waiting questions are ahead of a session's next question.
+
+        Operator tags are not taken into account, so this is an estimate when
+        questions are routed by tag.
+
+        Args:
+            session_id: Identifier of the session
+
+        Returns:
+            The number of questions ahead, or None if the session has none waiting
+        """
+        waiting = [t for t in self._waiting if not t.granted.cancelled()]
+        for ahead, ticket in enumerate(sorted(waiting, key=self._rank)):
+            if ticket.session_id == session_id:
+                return ahead
+        return None
+
+    @property
+    def operators(self) -> List[str]:
+        """Names of the operators currently available."""
+        return list(self._operators)
+
+    def add_operator(self, name: str, tags: Iterable[str] = ()) -> None:
+        """
+        Makes an operator available to answer questions.
+
+        Args:
+            name: Unique name of the operator
+            tags: Topics the operator handles; an untagged operator handles anything
+        """
+        self._operators[name] = _Operator(name=name, tags=frozenset(tags))
+        self._dispatch()
+
+    def remove_operator(self, name: str) -> None:
+        """
+        Stops granting questions to an operator.
+
+        A question the operator was answering keeps its turn until the caller exits
+        it; the caller is expected to ask again (see ConsoleDisconnectedError).
+
+        Args:
+            name: Name of the operator to remove
+        """
+        self._operators.pop(name, None)
+
+    def operator_stats(self) -> List[OperatorStats]:
+        """Returns throughput and response-time statistics for each operator."""
+        now = time.monotonic()
+        stats: List[OperatorStats] = []
+        for operator in self._operators.values():
+            times = sorted(operator.response_times)
+            minutes = max((now - operator.attached_at) / 60, 1 / 60)
+            stats.append(
+                {
+                    "name": operator.name,
+                    "tags": sorted(operator.tags),
+                    "busy": operator.active is not None,
+                    "answered": operator.answered,
+                    "answers_per_minute": round(operator.answered / minutes, 3),
+                    "mean_response_seconds": (
+                        round(sum(times) / len(times), 3) if times else None
+                    ),
+                    "p95_response_seconds": (
+                        round(times[int(0.95 * (len(times) - 1))], 3) if times else None
+                    ),
+                }
+            )
+        return stats
+
+    @asynccontextmanager
+    async def turn(
+        self,
+        session_id: str = DEFAULT_SESSION_ID,
+        priority: int = 0,
+        timeout: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> AsyncIterator[Grant]:
+        """
+        Waits until an eligible operator is free for this question and holds it.
+
+        Args:
+            session_id: Identifier of the calling session, used for fairness
+            priority: Higher values are granted an operator first
+            timeout: Seconds to wait for an operator, or None to wait forever
+            tags: Topics of the question, used to route it to matching operators
+
+        Yields:
+            The granted operator and the number of questions still queued
+
+        Raises:
+            asyncio.TimeoutError: If no operator was granted within the timeout
+        """
+        ticket = _Ticket(
+            session_id=session_id,
+            priority=priority,
+            tags=frozenset(tags),
+            sequence=next(self._arrivals),
+            granted=asyncio.get_running_loop().create_future(),
+        )
+        self._waiting.append(ticket)
+        self._dispatch()
+
+        try:
+            operator = await asyncio.wait_for(ticket.granted, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # The caller gave up, either while queued or right after being granted
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+            elif ticket.granted.done() and not ticket.granted.cancelled():
+                self._release(ticket.granted.result(), ticket)
+            raise
+
+        try:
+            yield Grant(operator=operator, queued=self.pending, _ticket=ticket)
+        finally:
+            self._release(operator, ticket)
+
+    def _rank(self, ticket: _Ticket) -> Tuple[int, int, int]:
+        return (
+            -ticket.priority,
+            self._last_served.get(ticket.session_id, -1),
+            ticket.sequence,
+        )
+
+    def _release(self, name: str, ticket: _Ticket) -> None:
+        operator = self._operators.get(name)
+        if operator is not None and operator.active is ticket:
+            operator.active = None
+            if ticket.answered:
+                operator.answered += 1
+                operator.response_times.append(time.monotonic() - operator.granted_at)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Drop waiters whose task was cancelled but has not resumed to clean up yet
+        self._waiting = [t for t in self._waiting if not t.granted.cancelled()]
+
+        idle = [op for op in self._operators.values() if op.active is None]
+        for operator in sorted(idle, key=lambda op: op.last_granted):
+            eligible = [t for t in self._waiting if operator.accepts(t)]
+            if not eligible:
+                continue
+
+            ticket = min(eligible, key=self._rank)
+            self._waiting.remove(ticket)
+            operator.active = ticket
+            operator.granted_at = time.monotonic()
+            operator.last_granted = grant = next(self._grants)
+
+            self._last_served[ticket.session_id] = grant
+            self._last_served.move_to_end(ticket.session_id)
+            if len(self._last_served) > MAX_TRACKED_SESSIONS:
+                self._last_served.popitem(last=False)
+
+            ticket.granted.set_result(operator.name)
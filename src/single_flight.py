@@ -0,0 +1,73 @@
+"""
+Single Flight Module
+
+This module shares one in-flight call among concurrent callers asking for the same
+thing. Agents retrying a question they gave up on, or several agents hitting the same
+decision, would otherwise each put the same prompt in front of the human. The first
+caller starts the call; callers arriving while it is still running attach to it and
+get the same result. A caller that is cancelled only stops waiting: the call keeps
+running for the others, and is cancelled once nobody is waiting for it any more.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight(Generic[T]):
+    task: "asyncio.Task[T]"
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key, shared by every caller asking while it runs."""
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight[Any]] = {}
+        # Callers that attached to a call started by another caller, since start-up
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    @property
+    def waiting(self) -> int:
+        """Callers currently waiting on a call started by another caller."""
+        return sum(max(flight.waiters - 1, 0) for flight in self._flights.values())
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the result of call(), shared with concurrent callers using the key.
+
+        Args:
+            key: What makes two calls the same
+            call: Starts the call, only invoked if none is running for the key
+
+        Returns:
+            The result of the shared call. Its exception is raised to every caller.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # The last caller gave up, so nobody needs the result. Later callers
+                # start a new call rather than attach to this one.
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key: Hashable, flight: _Flight[Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
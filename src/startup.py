@@ -0,0 +1,216 @@
+"""
+Startup Module
+
+This module measures where server start-up time goes. Running the server through it,
+
+    python -m src.startup [--exit] [--top 15]
+
+times every module import and each initialization step up to the listener accepting
+connections, then prints the slowest of them. Import times include each module's own
+initialization code. With --exit the server stops once the report is printed, so the
+command can be used in scripts.
+
+When the server is started normally, the start-up steps are not measured and cost
+nothing.
+"""
+
+import argparse
+import contextlib
+import importlib.machinery
+import runpy
+import sys
+import time
+from collections import defaultdict
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+# Set by the profiling entry point before src.main is imported
+PROFILE: Optional["StartupProfile"] = None
+
+
+class _ImportTimer:
+    """
+    Meta path finder that times how long each module takes to execute.
+
+    It finds nothing itself: it asks the other finders and wraps the exec_module of the
+    loader they return. Built-in and frozen modules are not timed.
+    """
+
+    def __init__(self, profile: "StartupProfile") -> None:
+        self.profile = profile
+        # Time spent in modules imported by the module being executed
+        self._nested: List[float] = []
+
+    def find_spec(
+        self, name: str, path: Optional[Sequence[str]], target: Any = None
+    ) -> Optional[importlib.machinery.ModuleSpec]:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if isinstance(
+                spec.loader,
+                (
+                    importlib.machinery.SourceFileLoader,
+                    importlib.machinery.SourcelessFileLoader,
+                    importlib.machinery.ExtensionFileLoader,
+                ),
+            ):
+                spec.loader.exec_module = self._timed(  # type: ignore[method-assign]
+                    name, spec.loader.exec_module
+                )
+            return spec
+        return None
+
+    def _timed(self, name: str, exec_module: Any) -> Any:
+        def timed_exec_module(module: ModuleType) -> None:
+            self._nested.append(0.0)
+            started = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = self._nested.pop()
+                if self._nested:
+                    self._nested[-1] += elapsed
+                self.profile.imports[name] = (elapsed - nested, elapsed)
+
+        return timed_exec_module
+
+
+class StartupProfile:
+    """Import times per module and durations of the start-up steps."""
+
+    def __init__(self, exit_when_ready: bool = False, top: int = 15) -> None:
+        self.exit_when_ready = exit_when_ready
+        self.top = top
+        self.started = time.perf_counter()
+        # Module name to (self, cumulative) seconds
+        self.imports: Dict[str, Tuple[float, float]] = {}
+        self.phases: List[Tuple[str, float]] = []
+        self.initialized_after: Optional[float] = None
+        self.listening_after: Optional[float] = None
+        # Imports done by the time connections were accepted
+        self.imports_before_listening: Dict[str, Tuple[float, float]] = {}
+        self._timer = _ImportTimer(self)
+
+    def install(self) -> None:
+        sys.meta_path.insert(0, self._timer)
+
+    def uninstall(self) -> None:
+        if self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+
+    def report(self, console: Console) -> None:
+        """Prints the slowest imports before listening and the start-up steps."""
+        by_package: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        for name, (own, _) in self.imports_before_listening.items():
+            # The server's own modules are listed one by one, anything else by package
+            package = name if name.startswith("src.") else name.split(".")[0]
+            by_package[package][0] += own
+            by_package[package][1] += 1
+
+        imports = Table(title="Slowest imports before accepting connections")
+        imports.add_column("Package or module")
+        imports.add_column("Modules", justify="right")
+        imports.add_column("Import (ms)", justify="right")
+        slowest = sorted(by_package.items(), key=lambda item: item[1][0], reverse=True)
+        for package, (seconds, count) in slowest[: self.top]:
+            imports.add_row(package, str(int(count)), f"{seconds * 1000:.1f}")
+        console.print(imports)
+
+        phases = Table(title="Start-up steps")
+        phases.add_column("Step")
+        phases.add_column("Time (ms)", justify="right")
+        if self.initialized_after is not None:
+            phases.add_row(
+                "import and initialize src.main", f"{self.initialized_after * 1000:.1f}"
+            )
+        for name, seconds in self.phases:
+            phases.add_row(name, f"{seconds * 1000:.1f}")
+        if self.listening_after is not None:
+            phases.add_row(
+                "[bold]accepting connections after[/bold]",
+                f"[bold]{self.listening_after * 1000:.1f}[/bold]",
+            )
+        console.print(phases)
+        console.print(
+            "[dim]Times start when the profiler is installed, after the interpreter "
+            "itself has started.[/dim]"
+        )
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Times a start-up step when profiling."""
+    if PROFILE is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PROFILE.phases.append((name, time.perf_counter() - started))
+
+
+def initialized() -> None:
+    """Records that the server's modules are imported and initialized."""
+    if PROFILE is not None and PROFILE.initialized_after is None:
+        PROFILE.initialized_after = time.perf_counter() - PROFILE.started
+
+
+def listening() -> None:
+    """Records that the server now accepts connections."""
+    if PROFILE is not None and PROFILE.listening_after is None:
+        PROFILE.listening_after = time.perf_counter() - PROFILE.started
+        PROFILE.imports_before_listening = dict(PROFILE.imports)
+
+
+def finish(console: Console) -> bool:
+    """
+    Ends start-up, printing the report when profiling.
+
+    Args:
+        console: Where to print the report
+
+    Returns:
+        True if the server should stop now that the report is printed
+    """
+    if PROFILE is None:
+        return False
+    PROFILE.uninstall()
+    PROFILE.report(console)
+    return PROFILE.exit_when_ready
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    global PROFILE
+
+    parser = argparse.ArgumentParser(
+        description="Start the PairPilot server and report where start-up time goes."
+    )
+    parser.add_argument(
+        "--exit",
+        action="store_true",
+        help="Stop the server once the report is printed",
+    )
+    parser.add_argument(
+        "--top", type=int, default=15, help="Number of packages to list"
+    )
+    args = parser.parse_args(argv)
+
+    PROFILE = StartupProfile(exit_when_ready=args.exit, top=args.top)
+    PROFILE.install()
+    runpy.run_module("src.main", run_name="__main__", alter_sys=True)
+
+
+if __name__ == "__main__":
+    # Run through the importable module, so src.main sees the profile it sets
+    from src.startup import main as profile_startup
+
+    profile_startup()
@@ -0,0 +1,291 @@
+"""
+Terminal Module
+
+This module renders a question in the terminal and prompts the user for the answer.
+It is used by the server itself when it owns the terminal, and by the attached console
+when the server runs headless.
+
+The prompts (questionary and prompt_toolkit) are only imported when the first question
+is presented, or when load_prompts() is called, so a server that does not prompt, or
+has not prompted yet, starts without them.
+"""
+
+import asyncio
+import os
+import time
+from types import ModuleType
+from typing import Any, Dict, List, Optional, TypedDict, Union
+
+from rich.console import Console, Group
+from rich.panel import Panel
+
+from .answer_index import AnswerIndex
+from .metrics import RENDER_DURATION
+from .question_view import (
+    HIGHLIGHT_CHUNK_LINES,
+    QuestionView,
+    prompt_message,
+    render,
+)
+from .render_worker import RenderWorker
+
+# Initialize Rich Console for enhanced output
+console = Console()
+
+# Writes to the console from a thread, so a slow terminal never blocks the event loop
+renderer = RenderWorker(max_pending=int(os.environ.get("RENDER_QUEUE_SIZE", 64)))
+
+# Free-form and multiple-choice answers given so far, suggested for similar questions
+answer_index = AnswerIndex(
+    max_entries=int(os.environ.get("ANSWER_INDEX_MAX_ENTRIES", 20000)),
+)
+
+# Questions are cut to this many bytes before any rendering work
+QUESTION_MAX_BYTES = int(os.environ.get("QUESTION_MAX_BYTES", 256 * 1024))
+
+# Longer questions are previewed in the panel and can be read in full in a pager
+QUESTION_PREVIEW_LINES = int(os.environ.get("QUESTION_PREVIEW_LINES", 40))
+QUESTION_PREVIEW_CHARS = 8000
+
+# Questions longer than this many characters are split up in a worker thread
+THREADED_VIEW_CHARS = 64 * 1024
+
+# Shown when the agent stops waiting while the human is being asked
+WITHDRAWN_NOTICE = (
+    "[yellow]⚠ Question withdrawn: the agent is no longer waiting for an answer."
+    "[/yellow]"
+)
+
+# Panel title and border style for each question type
+PANEL_STYLES = {
+    "free_form": ("Free-form", "green"),
+    "yes_no": ("Yes/No", "yellow"),
+    "multiple_choice": ("Multiple Choice", "magenta"),
+}
+
+
+class QuestionRequest(TypedDict):
+    type: str
+    question: str
+    options: List[str]
+    queued: int
+    timeout_seconds: Optional[float]
+    raise_on_cancel: bool
+    position: Optional[str]
+
+
+class QuestionReply(TypedDict):
+    answer: Union[str, bool, List[str]]
+    comments: str
+
+
+def question_request(
+    question_type: str,
+    question: str,
+    options: Optional[List[str]] = None,
+    queued: int = 0,
+    timeout_seconds: Optional[float] = None,
+    raise_on_cancel: bool = False,
+    position: Optional[str] = None,
+) -> QuestionRequest:
+    """
+    Builds a request to present a question in the terminal.
+
+    Args:
+        question_type: One of "free_form", "yes_no" or "multiple_choice"
+        question: The question to ask the user
+        options: List of choices, only for multiple choice
+        queued: Number of questions waiting behind this one
+        timeout_seconds: Seconds the user has to answer, or None to wait forever
+        raise_on_cancel: Raise PromptCancelledError if the user cancels a prompt
+        position: Position within a batch, e.g. "2 of 5"
+
+    Returns:
+        The request, which is JSON-serializable so it can be sent to a console
+    """
+    return {
+        "type": question_type,
+        "question": question,
+        "options": options or [],
+        "queued": queued,
+        "timeout_seconds": timeout_seconds,
+        "raise_on_cancel": raise_on_cancel,
+        "position": position,
+    }
+
+
+def _panel_subtitle(
+    queued: int, timeout_seconds: Optional[float], view: QuestionView
+) -> Optional[str]:
+    """Returns a panel subtitle with the preview size, queue depth and deadline."""
+    parts = []
+    if view.hidden_lines:
+        shown = view.line_count - view.hidden_lines
+        parts.append(f"showing {shown:,} of {view.line_count:,} lines")
+    elif view.hidden_chars:
+        # Long lines, such as a minified file or a JSON blob, cut in the preview
+        total = len(view.text)
+        shown = total - view.hidden_chars
+        parts.append(f"showing {shown:,} of {total:,} characters")
+    if queued:
+        parts.append(f"{queued} more question(s) queued")
+    if timeout_seconds is not None:
+        parts.append(f"⏱ default answer in {timeout_seconds:.0f}s")
+    if not parts:
+        return None
+    return f"[dim]{' · '.join(parts)}[/dim]"
+
+
+def load_prompts() -> ModuleType:
+    """Imports the terminal prompts, which is slow enough to be worth deferring."""
+    from . import cli_handler
+
+    return cli_handler
+
+
+async def show(*objects: Any, **kwargs: Any) -> None:
+    """Prints to the console from the render worker, returning once it is written."""
+    await renderer.call(console.print, *objects, **kwargs)
+
+
+def _print_panel(panel: Panel, question_type: str) -> None:
+    with RENDER_DURATION.time(type=question_type):
+        console.print(panel)
+
+
+def _page(view: QuestionView) -> None:
+    """Shows the whole question in the system pager, highlighting code in chunks."""
+    with console.pager(styles=True):
+        for renderable in render(view.segments, HIGHLIGHT_CHUNK_LINES):
+            console.print(renderable)
+        note = view.omitted_note()
+        if note is not None:
+            console.print(note)
+
+
+async def present_question(request: QuestionRequest) -> QuestionReply:
+    """
+    Shows a question panel and prompts for the answer and, where relevant, comments.
+
+    Yes/no and multiple-choice answers are entered on one screen together with the
+    comment. A long question is previewed in the panel, and the user is offered to
+    read all of it in a pager first. Free-form and multiple-choice prompts offer the
+    answers given to the most similar questions before.
+
+    Args:
+        request: The question to present
+
+    Returns:
+        The answer and any comments
+
+    Raises:
+        PromptTimeoutError: If the answer was not given before the deadline
+        PromptCancelledError: If the user cancelled and the request asked to know
+        asyncio.CancelledError: If the caller stopped waiting; the prompt is closed
+            and the human is told the question was withdrawn
+    """
+    question_type = request["type"]
+    label, border_style = PANEL_STYLES[question_type]
+    if request["position"]:
+        label = f"{label} · {request['position']}"
+
+    view_args = (
+        request["question"],
+        QUESTION_MAX_BYTES,
+        QUESTION_PREVIEW_LINES,
+        QUESTION_PREVIEW_CHARS,
+    )
+    if len(request["question"]) > THREADED_VIEW_CHARS:
+        # Keep other sessions responsive while a huge question is split
+        view = await asyncio.to_thread(QuestionView, *view_args)
+    else:
+        view = QuestionView(*view_args)
+
+    body = list(render(view.preview))
+    note = view.omitted_note()
+    if note is not None:
+        body.append(note)
+    panel = Panel(
+        Group(*body),
+        title=f"[bold blue]🤖 Agent Asks ({label})[/bold blue]",
+        subtitle=_panel_subtitle(request["queued"], request["timeout_seconds"], view),
+        border_style=border_style,
+        expand=view.truncated,
+    )
+    # Highlighting and layout happen as the panel is printed, on the render worker
+    await renderer.call(_print_panel, panel, question_type)
+    try:
+        reply = await _prompt_for_answer(request, view)
+    except asyncio.CancelledError:
+        # The prompt is already gone; tell the human why it disappeared
+        renderer.post(console.print, WITHDRAWN_NOTICE)
+        raise
+    if question_type != "yes_no" and reply["answer"]:
+        answer_index.add(
+            question_type, request["question"], reply["answer"], request["options"]
+        )
+    return reply
+
+
+def _suggestions(request: QuestionRequest) -> Dict[str, Any]:
+    """
+    Looks up earlier answers to similar questions, for the prompt to offer.
+
+    Returns:
+        Keyword arguments for the prompt, empty when there is nothing to suggest
+    """
+    if request["type"] == "yes_no":
+        return {}
+    suggestions = answer_index.suggest(
+        request["type"], request["question"], request["options"]
+    )
+    return {"suggestions": suggestions} if suggestions else {}
+
+
+async def _prompt_for_answer(
+    request: QuestionRequest, view: QuestionView
+) -> QuestionReply:
+    question_type = request["type"]
+    prompts = load_prompts()
+    timeout_seconds = request["timeout_seconds"]
+    raise_on_cancel = request["raise_on_cancel"]
+    # Looked up once the panel is on screen, so it never delays rendering
+    suggestions = _suggestions(request)
+    if view.truncated:
+        started = time.monotonic()
+        if await prompts.ask_yes_no(
+            "Read the full question in a pager first?",
+            default=False,
+            timeout_seconds=timeout_seconds,
+        ):
+            await renderer.call(_page, view)
+        if timeout_seconds is not None:
+            timeout_seconds = max(0.0, timeout_seconds - (time.monotonic() - started))
+    if question_type == "free_form":
+        answer = await prompts.ask_free_form(
+            "Your answer: ",
+            raise_on_cancel=raise_on_cancel,
+            timeout_seconds=timeout_seconds,
+            **suggestions,
+        )
+        return {"answer": answer, "comments": ""}
+
+    # Answers to batch questions are never remembered
+    remember = {} if request["position"] is None else {"remember_hint": False}
+    if question_type == "yes_no":
+        answer, comments = await prompts.ask_yes_no_with_comments(
+            prompt_message(view.text),
+            raise_on_cancel=raise_on_cancel,
+            timeout_seconds=timeout_seconds,
+            **remember,
+        )
+    else:
+        answer, comments = await prompts.ask_multiple_choice_with_comments(
+            prompt_message(view.text),
+            request["options"],
+            raise_on_cancel=raise_on_cancel,
+            timeout_seconds=timeout_seconds,
+            **suggestions,
+            **remember,
+        )
+    return {"answer": answer, "comments": comments}
@@ -0,0 +1,122 @@
+"""
+Ticket Store Module
+
+This module lets an agent submit a question and collect the answer later instead of
+blocking on it. Each submitted question runs as a background task identified by a
+ticket. Tickets that are not collected before they expire are cancelled and dropped,
+which also withdraws their question from the terminal.
+"""
+
+import asyncio
+import uuid
+from dataclasses import dataclass
+from typing import Any, Coroutine, Dict, Literal, Optional, TypedDict
+
+TicketStatus = Literal["pending", "answered", "failed", "not_found"]
+
+
+class TicketResult(TypedDict):
+    ticket_id: str
+    status: TicketStatus
+    result: Any
+
+
+@dataclass
+class _Ticket:
+    task: "asyncio.Task[Any]"
+    expiry: asyncio.TimerHandle
+
+
+class TicketStore:
+    """In-memory store of questions being answered in the background."""
+
+    def __init__(self, ttl_seconds: float = 3600.0) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._tickets: Dict[str, _Ticket] = {}
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def submit(self, question: Coroutine[Any, Any, Any]) -> str:
+        """
+        Starts answering a question in the background.
+
+        Args:
+            question: Coroutine that asks the question and returns its answer
+
+        Returns:
+            The ticket id used to collect the answer
+        """
+        ticket_id = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        self._tickets[ticket_id] = _Ticket(
+            task=loop.create_task(question),
+            expiry=loop.call_later(self.ttl_seconds, self._expire, ticket_id),
+        )
+        return ticket_id
+
+    async def collect(
+        self, ticket_id: str, wait_seconds: Optional[float] = 0
+    ) -> TicketResult:
+        """
+        Returns the answer for a ticket, optionally waiting for it.
+
+        A ticket is forgotten once its answer (or failure) has been collected.
+
+        Args:
+            ticket_id: The id returned by submit
+            wait_seconds: Seconds to wait for the answer; 0 returns at once and None
+                waits until the question is answered
+
+        Returns:
+            The ticket status and, once answered, the answer
+        """
+        ticket = self._tickets.get(ticket_id)
+        if ticket is None:
+            return {"ticket_id": ticket_id, "status": "not_found", "result": None}
+
+        if not ticket.task.done() and wait_seconds != 0:
+            # asyncio.wait leaves the task running if the wait times out
+            await asyncio.wait({ticket.task}, timeout=wait_seconds)
+
+        if not ticket.task.done():
+            return {"ticket_id": ticket_id, "status": "pending", "result": None}
+
+        self._forget(ticket_id)
+        if ticket.task.cancelled():
+            return {"ticket_id": ticket_id, "status": "failed", "result": "Cancelled"}
+        error = ticket.task.exception()
+        if error is not None:
+            message = str(error) or type(error).__name__
+            return {"ticket_id": ticket_id, "status": "failed", "result": message}
+        return {
+            "ticket_id": ticket_id,
+            "status": "answered",
+            "result": ticket.task.result(),
+        }
+
+    async def cancel_all(self) -> None:
+        """Cancels every outstanding ticket and waits for its question to close."""
+        tasks = []
+        for ticket_id in list(self._tickets):
+            task = self._tickets[ticket_id].task
+            task.cancel()
+            tasks.append(task)
+            self._forget(ticket_id)
+        # Let each question withdraw its prompt before the server goes away
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _forget(self, ticket_id: str) -> None:
+        ticket = self._tickets.pop(ticket_id, None)
+        if ticket is not None:
+            ticket.expiry.cancel()
+
+    def _expire(self, ticket_id: str) -> None:
+        ticket = self._tickets.pop(ticket_id, None)
+        if ticket is None:
+            return
+        if not ticket.task.done():
+            ticket.task.cancel()
+        elif not ticket.task.cancelled():
+            # Mark an uncollected failure as retrieved so asyncio does not log it
+            ticket.task.exception()
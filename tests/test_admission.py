@@ -0,0 +1,125 @@
+"""
+Unit tests for admission control.
+Tests the token bucket, the pending and rate limits, and busy results from the tools.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.admission import AdmissionController, TokenBucket
+from src.main import request_free_form_input_tool, request_yes_no_input_tool
+from src.metrics import ADMITTED_CALLS, REJECTED_CALLS
+
+
+class FakeClock:
+    """Clock the tests move by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdmission:
+    """Test the admission limits."""
+
+    def test_token_bucket_allows_bursts_then_refills(self):
+        """Test that a bucket allows a burst, then one call per refill interval."""
+        bucket = TokenBucket(rate=2, burst=3, now=0)
+
+        assert [bucket.take(0) for _ in range(3)] == [0, 0, 0]
+        assert bucket.take(0) == pytest.approx(0.5)
+        assert bucket.take(0.5) == 0
+        assert not bucket.full(0.5)
+        assert bucket.full(2.0)
+
+    def test_session_pending_limit(self):
+        """Test that a session over its pending limit is busy until a call ends."""
+        admission = AdmissionController(
+            max_pending_per_session=2, retry_estimate=lambda: 12.0
+        )
+
+        assert admission.admit("a") is None
+        assert admission.admit("a") is None
+        assert admission.admit("a") == {
+            "busy": True,
+            "reason": "session_pending_limit",
+            "retry_after_seconds": 12.0,
+        }
+        assert admission.admit("b") is None
+
+        admission.release("a")
+        assert admission.admit("a") is None
+
+    def test_global_queue_limit(self):
+        """Test that the server-wide limit applies across sessions."""
+        admission = AdmissionController(max_pending=2)
+        admission.admit("a")
+        admission.admit("b")
+
+        assert admission.admit("c")["reason"] == "queue_full"
+        assert admission.pending == 2
+
+    def test_rate_limit_per_session(self):
+        """Test that a session asking too fast is told when to retry."""
+        clock = FakeClock()
+        admission = AdmissionController(rate_per_minute=30, burst=2, clock=clock)
+        for _ in range(2):
+            assert admission.admit("a") is None
+            admission.release("a")
+
+        busy = admission.admit("a")
+        assert busy["reason"] == "rate_limited"
+        assert busy["retry_after_seconds"] == 2.0
+        assert admission.admit("b") is None
+
+        clock.now = 2.0
+        assert admission.admit("a") is None
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_tool_returns_busy_instead_of_queueing(
+        self, mock_ask_yes_no, mock_ask_free_form, mock_print
+    ):
+        """Test that a call over the limit returns a busy result and is counted."""
+        release = asyncio.Event()
+
+        async def answer(*args, **kwargs):
+            await release.wait()
+            return True, ""
+
+        mock_ask_yes_no.side_effect = answer
+        admitted = ADMITTED_CALLS.value(tool="request_yes_no_input")
+        rejected = REJECTED_CALLS.value(
+            tool="request_free_form_input", reason="session_pending_limit"
+        )
+
+        with patch(
+            "src.main.admission",
+            AdmissionController(max_pending_per_session=1, retry_estimate=lambda: 3),
+        ):
+            first = asyncio.ensure_future(request_yes_no_input_tool("Deploy?"))
+            await asyncio.sleep(0.05)
+            busy = await request_free_form_input_tool("Which branch?")
+            release.set()
+            answered = await first
+
+        assert busy == {
+            "busy": True,
+            "reason": "session_pending_limit",
+            "retry_after_seconds": 3.0,
+        }
+        assert answered["answer"] is True
+        mock_ask_free_form.assert_not_called()
+        assert ADMITTED_CALLS.value(tool="request_yes_no_input") == admitted + 1
+        assert (
+            REJECTED_CALLS.value(
+                tool="request_free_form_input", reason="session_pending_limit"
+            )
+            == rejected + 1
+        )
@@ -0,0 +1,75 @@
+"""
+Unit tests for the answer cache.
+Tests normalization, TTL expiry, LRU eviction and session scoping.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.answer_cache import AnswerCache, extract_remember, normalize_question
+
+
+class TestAnswerCache:
+    """Test the TTL/LRU answer cache."""
+
+    def test_normalized_questions_share_an_entry(self):
+        """Test that case, whitespace and trailing punctuation are ignored."""
+        cache = AnswerCache()
+        cache.put("s1", "tool", "Run the   test suite?", {"answer": True})
+
+        assert cache.get("s1", "tool", "run the test suite") == {"answer": True}
+        assert normalize_question("  Deploy NOW?! ") == "deploy now"
+
+    def test_options_are_part_of_the_key(self):
+        """Test that the same question with other options is a miss."""
+        cache = AnswerCache()
+        cache.put("s1", "tool", "Pick", {"selection": ["A"]}, ["A", "B"])
+
+        assert cache.get("s1", "tool", "Pick", ["A", "B"]) == {"selection": ["A"]}
+        assert cache.get("s1", "tool", "Pick", ["A", "C"]) is None
+
+    @patch("src.answer_cache.time.monotonic")
+    def test_entries_expire_after_ttl(self, mock_monotonic):
+        """Test that an entry is dropped once its TTL has passed."""
+        cache = AnswerCache(ttl_seconds=10)
+        mock_monotonic.return_value = 100.0
+        cache.put("s1", "tool", "Proceed?", {"answer": True})
+
+        mock_monotonic.return_value = 109.0
+        assert cache.get("s1", "tool", "Proceed?") == {"answer": True}
+        mock_monotonic.return_value = 110.0
+        assert cache.get("s1", "tool", "Proceed?") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache stays within its size bound."""
+        cache = AnswerCache(max_entries=2)
+        cache.put("s1", "tool", "one", {"answer": 1})
+        cache.put("s1", "tool", "two", {"answer": 2})
+        cache.get("s1", "tool", "one")
+        cache.put("s1", "tool", "three", {"answer": 3})
+
+        assert cache.get("s1", "tool", "two") is None
+        assert cache.get("s1", "tool", "one") == {"answer": 1}
+        assert len(cache) == 2
+
+    def test_session_and_global_scope(self):
+        """Test that session scope isolates sessions while global scope shares."""
+        session_cache = AnswerCache(scope="session")
+        global_cache = AnswerCache(scope="global")
+        for cache in (session_cache, global_cache):
+            cache.put("s1", "tool", "Proceed?", {"answer": True})
+
+        assert session_cache.get("s2", "tool", "Proceed?") is None
+        assert global_cache.get("s2", "tool", "Proceed?") == {"answer": True}
+
+    def test_unknown_scope_is_rejected(self):
+        """Test that a misconfigured scope fails fast."""
+        with pytest.raises(ValueError):
+            AnswerCache(scope="cluster")
+
+    def test_extract_remember(self):
+        """Test that the remember marker is detected and stripped."""
+        assert extract_remember("Looks good !remember") == ("Looks good", True)
+        assert extract_remember("Looks good") == ("Looks good", False)
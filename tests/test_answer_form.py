@@ -0,0 +1,199 @@
+"""
+Unit tests for the combined answer form.
+Tests that answers and comments are entered on one screen with single-key shortcuts.
+"""
+
+import functools
+import io
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import questionary
+from prompt_toolkit.data_structures import Size
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output.vt100 import Vt100_Output
+
+from src.answer_form import answer_form
+from src.cli_handler import (
+    PromptCancelledError,
+    ask_free_form,
+    ask_multiple_choice_with_comments,
+    ask_yes_no_with_comments,
+)
+
+DOWN = "\x1b[B"
+PAGE_DOWN = "\x1b[6~"
+
+
+async def _answer(keys, options=None, screen=None, suggestions=None, **kwargs):
+    with create_pipe_input() as pipe:
+        output = Vt100_Output(
+            screen or io.StringIO(), lambda: Size(rows=24, columns=80)
+        )
+        question = answer_form(
+            "Proceed?",
+            options,
+            suggestions=suggestions,
+            input=pipe,
+            output=output,
+            **kwargs,
+        )
+        pipe.send_text(keys)
+        return await question.ask_async()
+
+
+class TestAnswerForm:
+    """Test the keys of the combined answer and comment form."""
+
+    @pytest.mark.asyncio
+    async def test_enter_accepts_default(self):
+        """Test that Enter alone submits the preselected yes."""
+        assert await _answer("\r") == {"answer": True, "comments": ""}
+
+    @pytest.mark.asyncio
+    async def test_yes_no_key_moves_to_comment(self):
+        """Test that n answers and the following text becomes the comment."""
+        assert await _answer("nNot yet\r") == {"answer": False, "comments": "Not yet"}
+
+    @pytest.mark.asyncio
+    async def test_digits_toggle_options(self):
+        """Test that number keys toggle options and Tab moves to the comment."""
+        result = await _answer("13\tC is best\r", ["A", "B", "C"])
+
+        assert result == {"answer": ["A", "C"], "comments": "C is best"}
+
+    @pytest.mark.asyncio
+    async def test_arrows_space_and_select_all(self):
+        """Test arrow navigation, Space toggling and toggling everything."""
+        assert await _answer(f"{DOWN} \r", ["A", "B"]) == {
+            "answer": ["B"],
+            "comments": "",
+        }
+        assert await _answer("a\r", ["A", "B"]) == {
+            "answer": ["A", "B"],
+            "comments": "",
+        }
+
+    @pytest.mark.asyncio
+    async def test_remember_marker_is_explained(self):
+        """Test that the form tells the user how to have the answer remembered."""
+        screen = io.StringIO()
+        await _answer("\r", screen=screen)
+        assert "Add !remember to the comment" in screen.getvalue()
+
+        screen = io.StringIO()
+        await _answer("\r", ["A"], screen, remember_hint=False)
+        assert "!remember" not in screen.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_ctrl_c_cancels(self):
+        """Test that Ctrl+C cancels the form."""
+        assert await _answer("\x03") is None
+
+    @pytest.mark.asyncio
+    @patch("src.cli_handler.answer_form")
+    async def test_handlers_unpack_form_result(self, mock_form):
+        """Test that the CLI handlers return the answer and comment separately."""
+        mock_form.return_value.ask_async = AsyncMock(
+            return_value={"answer": ["B"], "comments": "ok"}
+        )
+        assert await ask_multiple_choice_with_comments("Pick", ["A", "B"]) == (
+            ["B"],
+            "ok",
+        )
+
+        mock_form.return_value.ask_async = AsyncMock(return_value=None)
+        assert await ask_yes_no_with_comments("Proceed?") == (False, "")
+        with pytest.raises(PromptCancelledError):
+            await ask_yes_no_with_comments("Proceed?", raise_on_cancel=True)
+
+
+class TestSuggestedAnswers:
+    """Test offering earlier answers in the prompts."""
+
+    @pytest.mark.asyncio
+    async def test_first_suggestion_is_preselected(self):
+        """Test that Enter alone submits the best suggested selection."""
+        screen = io.StringIO()
+        result = await _answer(
+            "\r", ["A", "B", "C"], screen, suggestions=[["A", "C"], ["B"]]
+        )
+
+        assert result == {"answer": ["A", "C"], "comments": ""}
+        assert "Preselected from an earlier answer (1 of 2)" in screen.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_s_picks_the_next_suggestion(self):
+        """Test that s moves through the suggestions and wraps around."""
+        suggestions = [["A"], ["B", "Gone"]]
+        assert await _answer("s\r", ["A", "B"], suggestions=suggestions) == {
+            "answer": ["B"],
+            "comments": "",
+        }
+        assert await _answer("ss\r", ["A", "B"], suggestions=suggestions) == {
+            "answer": ["A"],
+            "comments": "",
+        }
+
+    @pytest.mark.asyncio
+    async def test_free_form_suggestion_accepted_with_one_key(self):
+        """Test that → accepts the suggested answer and ↑ offers the others."""
+        right, up = "\x1b[C", "\x1b[A"
+        for keys, expected in [
+            (f"{right}\r", "release/1.2"),
+            (f"{up}{up}\r", "main"),
+            ("ma\r", "ma"),
+        ]:
+            with create_pipe_input() as pipe, patch(
+                "src.cli_handler.questionary.text",
+                functools.partial(
+                    questionary.text,
+                    input=pipe,
+                    output=Vt100_Output(io.StringIO(), lambda: Size(24, 80)),
+                ),
+            ):
+                pipe.send_text(keys)
+                answer = await ask_free_form(
+                    "Your answer: ", suggestions=["release/1.2", "main"]
+                )
+            assert answer == expected
+
+
+class TestLongOptionLists:
+    """Test paging and filtering of long option lists."""
+
+    @pytest.mark.asyncio
+    async def test_only_current_page_is_rendered(self):
+        """Test that Page Down shows the next page and digits pick from it."""
+        options = [f"option {index:05d}" for index in range(10_000)]
+        screen = io.StringIO()
+
+        result = await _answer(f"{PAGE_DOWN}1\r", options, screen)
+
+        assert result == {"answer": ["option 00009"], "comments": ""}
+        assert "option 00017" in screen.getvalue()
+        assert "option 00018" not in screen.getvalue()
+        assert "10,000" in screen.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_filter_ranks_contiguous_matches_first(self):
+        """Test that the fuzzy filter puts whole-word matches before scattered ones."""
+        options = ["a_p_p.txt", "app.txt"] + [f"file{index}" for index in range(20)]
+
+        result = await _answer("/app\r1\r", options)
+
+        assert result == {"answer": ["app.txt"], "comments": ""}
+
+    @pytest.mark.asyncio
+    async def test_select_all_matching_keeps_other_selections(self):
+        """Test that a toggles only the matches and earlier picks survive the filter."""
+        options = ["README.md"] + [f"src/module_{index}.py" for index in range(12)]
+
+        result = await _answer("1/module_1\ra\r", options)
+
+        assert result["answer"] == [
+            "README.md",
+            "src/module_1.py",
+            "src/module_10.py",
+            "src/module_11.py",
+        ]
@@ -0,0 +1,150 @@
+"""
+Unit tests for answer suggestions.
+Tests ranking earlier answers by question similarity, bounding the index, and offering
+the suggestions in the prompts.
+"""
+
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.answer_index import AnswerIndex
+from src.terminal import answer_index, present_question, question_request
+
+
+class TestAnswerIndex:
+    """Test suggesting answers from similar questions."""
+
+    def test_similar_question_gets_earlier_answer(self):
+        """Test that a reworded question is matched and an unrelated one is not."""
+        index = AnswerIndex()
+        index.add("free_form", "Which branch should I deploy to staging?", "release")
+        index.add("free_form", "What should the new table be called?", "accounts")
+
+        assert index.suggest("free_form", "Which branch to deploy to staging") == [
+            "release"
+        ]
+        assert index.suggest("free_form", "How many workers?") == []
+        assert index.suggest("multiple_choice", "Which branch to deploy?") == []
+
+    def test_best_match_first_without_duplicates(self):
+        """Test that suggestions are ranked by similarity and distinct."""
+        index = AnswerIndex()
+        index.add("free_form", "Name of the feature flag for search?", "search_v2")
+        index.add("free_form", "Name of the feature flag for billing?", "billing_v2")
+        index.add("free_form", "Name of the flag for search ranking?", "search_v2")
+
+        suggestions = index.suggest("free_form", "Feature flag name for search?")
+
+        assert suggestions == ["search_v2", "billing_v2"]
+
+    def test_repeated_question_keeps_latest_answers_first(self):
+        """Test that answering a question again updates its entry."""
+        index = AnswerIndex()
+        for answer in ["main", "develop", "main", "release"]:
+            index.add("free_form", "Which base branch?", answer)
+
+        assert len(index) == 1
+        assert index.suggest("free_form", "Which base branch?") == [
+            "release",
+            "main",
+            "develop",
+        ]
+
+    def test_multiple_choice_only_suggests_offered_options(self):
+        """Test that earlier selections are cut down to the options offered now."""
+        index = AnswerIndex()
+        index.add(
+            "multiple_choice",
+            "Which databases should the service support?",
+            ["Postgres", "MySQL"],
+            options=["Postgres", "MySQL", "SQLite"],
+        )
+
+        assert index.suggest(
+            "multiple_choice",
+            "Which databases should the service support?",
+            ["Postgres", "SQLite"],
+        ) == [["Postgres"]]
+        assert (
+            index.suggest(
+                "multiple_choice", "Which databases should it support?", ["Redis"]
+            )
+            == []
+        )
+
+    def test_oldest_entries_are_evicted(self):
+        """Test that the index stays within its size limit."""
+        index = AnswerIndex(max_entries=2)
+        index.add("free_form", "Port for the admin server?", "8080")
+        index.add("free_form", "Log level for production?", "info")
+        index.add("free_form", "Timezone for the scheduler?", "UTC")
+
+        assert len(index) == 2
+        assert index.suggest("free_form", "Port for the admin server?") == []
+        assert index.suggest("free_form", "Timezone for the scheduler?") == ["UTC"]
+
+    def test_lookup_is_fast_with_many_entries(self):
+        """Test that a lookup stays around a millisecond with 20,000 entries."""
+        rng = random.Random(7)
+        words = [f"term{n}" for n in range(2000)]
+        common = "should i use the same value for this setting in the new".split()
+        index = AnswerIndex(max_entries=20000)
+        for n in range(20000):
+            question = " ".join(rng.sample(common, 5) + rng.choices(words, k=6))
+            index.add("free_form", question, f"answer {n % 300}")
+        questions = [
+            " ".join(rng.sample(common, 6) + rng.choices(words, k=6))
+            for _ in range(200)
+        ]
+
+        started = time.perf_counter()
+        for question in questions:
+            index.suggest("free_form", question)
+        mean = (time.perf_counter() - started) / len(questions)
+
+        # Typically a third of a millisecond; the bound leaves room for slow CI
+        assert mean < 0.005
+
+
+class TestSuggestionsInPrompts:
+    """Test that answered questions are suggested when a similar one is asked."""
+
+    @pytest.fixture(autouse=True)
+    def forget_earlier_answers(self):
+        """Starts every test with an empty index."""
+        answer_index.clear()
+
+    @pytest.mark.asyncio
+    @patch("src.terminal.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    async def test_free_form_answer_is_suggested_next_time(
+        self, mock_ask_free_form, mock_print
+    ):
+        """Test that an answer is recorded and offered for a similar question."""
+        mock_ask_free_form.return_value = "release/1.2"
+        request = question_request("free_form", "Which branch should I deploy?")
+
+        await present_question(request)
+        await present_question(
+            question_request("free_form", "Which branch do I deploy?")
+        )
+
+        first, second = mock_ask_free_form.call_args_list
+        assert "suggestions" not in first.kwargs
+        assert second.kwargs["suggestions"] == ["release/1.2"]
+
+    @pytest.mark.asyncio
+    @patch("src.terminal.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_yes_no_answers_are_not_indexed(self, mock_ask, mock_print):
+        """Test that yes/no questions neither record nor get suggestions."""
+        mock_ask.return_value = (True, "")
+
+        await present_question(question_request("yes_no", "Run the tests?"))
+        await present_question(question_request("yes_no", "Run the tests?"))
+
+        assert len(answer_index) == 0
+        assert "suggestions" not in mock_ask.call_args.kwargs
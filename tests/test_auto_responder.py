@@ -0,0 +1,185 @@
+"""
+Unit tests for the auto-responder.
+Tests rule parsing, first-match ordering, option handling and hot reloading.
+"""
+
+import json
+import logging
+import os
+from unittest.mock import patch
+
+import pytest
+
+from src.auto_responder import AutoResponder, parse_rules
+from src.main import request_multiple_choice_input_tool, request_yes_no_input_tool
+
+POLICY = {
+    "rules": [
+        {
+            "name": "run-tests",
+            "question": r"re:^(may|can) i run (py)?tests?\b",
+            "answer": True,
+            "comments": "Always fine.",
+        },
+        {"name": "deploy", "question": "*deploy*production*", "answer": False},
+        {
+            "name": "formatter",
+            "question": "*format*",
+            "options": ["black", "*"],
+            "answer": ["black"],
+        },
+        {"name": "fallback-format", "question": "*format*", "answer": ["ruff*"]},
+    ]
+}
+
+
+@pytest.fixture
+def policy_path(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps(POLICY))
+    return path
+
+
+def _rewrite(path, policy):
+    path.write_text(json.dumps(policy))
+    # Make the change visible even on filesystems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestAutoResponder:
+    """Test matching questions against the policy file."""
+
+    def test_yes_no_rules(self, policy_path):
+        """Test regex and glob rules for yes/no questions."""
+        responder = AutoResponder(str(policy_path))
+
+        tests = responder.match("yes_no", "May I run pytest now?")
+        assert (tests.rule, tests.answer, tests.comments) == (
+            "run-tests",
+            True,
+            "Always fine.",
+        )
+        assert (
+            responder.match("yes_no", "Shall we deploy to Production?").answer is False
+        )
+        assert responder.match("yes_no", "Delete the branch?") is None
+        # Yes/no rules never answer multiple-choice questions
+        assert responder.match("multiple_choice", "Can I run tests?", ["a"]) is None
+
+    def test_multiple_choice_rules(self, policy_path):
+        """Test that option globs gate a rule and answer globs pick the selection."""
+        responder = AutoResponder(str(policy_path))
+
+        chosen = responder.match(
+            "multiple_choice", "Which formatter?", ["Black", "yapf"]
+        )
+        assert (chosen.rule, chosen.answer) == ("formatter", ["Black"])
+
+        # Without "black" on offer, the next matching rule answers instead
+        fallback = responder.match("multiple_choice", "Format with?", ["ruff", "yapf"])
+        assert (fallback.rule, fallback.answer) == ("fallback-format", ["ruff"])
+
+        assert responder.match("multiple_choice", "Format with?", ["yapf"]) is None
+
+    def test_first_rule_wins_without_combined_pattern(self, policy_path):
+        """Test that rules that cannot be combined are still checked in order."""
+        policy = {
+            "rules": [
+                {"name": "repeat", "question": r"re:(\w+) \1", "answer": True},
+                {"name": "all", "question": "*", "answer": False},
+            ]
+        }
+        _rewrite(policy_path, policy)
+        responder = AutoResponder(str(policy_path))
+
+        assert responder.match("yes_no", "really really?").rule == "repeat"
+        assert responder.match("yes_no", "once?").rule == "all"
+
+    def test_numbered_backreference_after_another_rule(self, policy_path):
+        """Test that a backreference still matches its own group in a later rule."""
+        policy = {
+            "rules": [
+                {"name": "deploy", "question": "*deploy*", "answer": False},
+                {"name": "repeat", "question": r"re:(\w+) \1", "answer": True},
+            ]
+        }
+        _rewrite(policy_path, policy)
+        responder = AutoResponder(str(policy_path))
+
+        assert responder.match("yes_no", "really really?").rule == "repeat"
+        assert responder.match("yes_no", "really sure?") is None
+
+    def test_invalid_rules_are_rejected(self):
+        """Test that malformed rules are reported by name."""
+        with pytest.raises(ValueError, match="bad-tool"):
+            parse_rules(
+                {
+                    "rules": [
+                        {
+                            "name": "bad-tool",
+                            "question": "*",
+                            "answer": [],
+                            "tool": "yes_no",
+                        }
+                    ]
+                }
+            )
+        with pytest.raises(ValueError, match="bad-regex"):
+            parse_rules(
+                {"rules": [{"name": "bad-regex", "question": "re:(", "answer": True}]}
+            )
+
+    def test_policy_is_hot_reloaded(self, policy_path, caplog):
+        """Test that edits apply without a restart and broken edits are ignored."""
+        responder = AutoResponder(str(policy_path), check_interval=0)
+        assert responder.match("yes_no", "Delete the branch?") is None
+
+        _rewrite(policy_path, {"rules": [{"question": "delete*", "answer": True}]})
+        assert responder.match("yes_no", "Delete the branch?").answer is True
+
+        _rewrite(policy_path, {"rules": [{"question": "*"}]})
+        with caplog.at_level(logging.ERROR):
+            assert responder.match("yes_no", "Delete the branch?").answer is True
+        assert "Keeping previous auto-responder rules" in caplog.text
+
+    def test_auto_answers_are_logged(self, policy_path, caplog):
+        """Test that every automatic answer is logged with its rule."""
+        responder = AutoResponder(str(policy_path))
+
+        with caplog.at_level(logging.INFO, logger="src.auto_responder"):
+            responder.match("yes_no", "Can I run tests?")
+
+        assert "rule 'run-tests'" in caplog.text
+
+
+class TestAutoAnsweredTools:
+    """Test that tools skip the human when a rule matches."""
+
+    @pytest.mark.asyncio
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_yes_no_tool_is_auto_answered(self, mock_ask_yes_no, policy_path):
+        """Test that a matching yes/no question never reaches the terminal."""
+        with patch("src.main.auto_responder", AutoResponder(str(policy_path))):
+            result = await request_yes_no_input_tool("May I run tests?")
+
+        assert result == {
+            "answer": True,
+            "comments": "Always fine.",
+            "timed_out": False,
+        }
+        mock_ask_yes_no.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("src.cli_handler.ask_multiple_choice_with_comments")
+    async def test_multiple_choice_tool_is_auto_answered(
+        self, mock_ask_multiple_choice, policy_path
+    ):
+        """Test that a matching multiple-choice question never reaches the terminal."""
+        with patch("src.main.auto_responder", AutoResponder(str(policy_path))):
+            result = await request_multiple_choice_input_tool(
+                "Which formatter?", ["black", "yapf"]
+            )
+
+        assert result == {"selection": ["black"], "comments": "", "timed_out": False}
+        mock_ask_multiple_choice.assert_not_called()
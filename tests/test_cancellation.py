@@ -0,0 +1,213 @@
+"""
+Cancellation tests for the server.
+Tests that a question is withdrawn from the terminal when its agent cancels the call or
+disconnects, that the next queued question is asked at once, and that no tasks leak.
+"""
+
+import asyncio
+import io
+import logging
+import os
+from unittest.mock import patch
+
+import anyio
+import pytest
+from mcp import types
+from mcp.server.models import InitializationOptions
+from mcp.server.session import ServerSession
+from mcp.shared.exceptions import McpError
+from mcp.types import ServerCapabilities
+from rich.console import Console
+
+import src
+from benchmarks.simulated_human import SimulatedHuman, think_time
+from benchmarks.transport_benchmark import Variant, _connect, _serve
+from src.cli_handler import ask_yes_no
+from src.main import _agent_connected, questions_in_flight, scheduler
+from src.terminal import console as terminal_console
+from src.terminal import present_question, question_request, renderer
+
+SSE = Variant("sse", "sse")
+SRC_DIR = os.path.dirname(src.__file__)
+
+
+async def _until(condition, timeout=5.0):
+    """Waits for a condition to hold, failing the test if it does not in time."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "Condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def _server_tasks():
+    """Returns the running tasks started by the server, e.g. disconnect watchers."""
+    return {
+        task
+        for task in asyncio.all_tasks()
+        if getattr(task.get_coro(), "cr_code", None) is not None
+        and os.path.dirname(task.get_coro().cr_code.co_filename) == SRC_DIR
+    }
+
+
+async def _ask(url, question):
+    async with _connect(SSE, url) as session:
+        return await session.call_tool("request_yes_no_input", {"question": question})
+
+
+class TestPromptTeardown:
+    """Test that a prompt nobody waits for is closed."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("timeout_seconds", [None, 30])
+    async def test_cancelled_call_closes_prompt(self, timeout_seconds):
+        """Test that cancelling the caller takes the prompt off the screen."""
+        human = SimulatedHuman(think_time("constant", 30))
+        with human.installed():
+            prompt = asyncio.ensure_future(
+                ask_yes_no("Deploy?", timeout_seconds=timeout_seconds)
+            )
+            await _until(lambda: human.on_screen == 1)
+            prompt.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await prompt
+        assert human.on_screen == 0
+
+    @pytest.mark.asyncio
+    async def test_human_is_told_the_question_was_withdrawn(self):
+        """Test that a notice replaces the withdrawn prompt."""
+        human = SimulatedHuman(think_time("constant", 30))
+        screen = Console(file=io.StringIO(), width=100)
+        with human.installed(), patch("src.terminal.console", screen):
+            question = asyncio.ensure_future(
+                present_question(question_request("yes_no", "Deploy?"))
+            )
+            await _until(lambda: human.on_screen == 1)
+            question.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await question
+            # Wait for the notice queued on the render worker
+            await renderer.call(lambda: None)
+
+        assert "Question withdrawn" in screen.file.getvalue()
+
+
+class TestAgentGoesAway:
+    """Test withdrawing questions of agents that disconnect or cancel."""
+
+    @pytest.mark.asyncio
+    async def test_abrupt_disconnects_under_load_leak_nothing(self):
+        """Test that questions of disconnected agents are withdrawn without leaks."""
+        human = SimulatedHuman(think_time("constant", 30))
+        with human.installed(), patch.object(terminal_console, "_file", io.StringIO()):
+            async with _serve(SSE) as url:
+                baseline = _server_tasks()
+                asking = asyncio.create_task(_ask(url, "Apply patch 0?"))
+                await _until(lambda: human.on_screen == 1)
+                queued = [
+                    asyncio.create_task(_ask(url, f"Apply patch {n}?"))
+                    for n in range(1, 8)
+                ]
+                await _until(lambda: scheduler.pending == 7)
+
+                # Queued agents first, so none of their questions reaches the screen
+                for agent in queued:
+                    agent.cancel()
+                await asyncio.gather(*queued, return_exceptions=True)
+                await _until(lambda: not scheduler.pending, timeout=10)
+                asking.cancel()
+                await asyncio.gather(asking, return_exceptions=True)
+
+                await _until(lambda: human.on_screen == 0, timeout=10)
+                await _until(lambda: _server_tasks() <= baseline, timeout=10)
+                assert not scheduler.busy
+                assert len(questions_in_flight) == 0
+        assert human.prompts == 1
+
+    @pytest.mark.asyncio
+    async def test_next_question_is_asked_when_agent_leaves(self):
+        """Test that the queued question gets the operator once the first agent leaves."""
+        think_times = iter([30.0, 0.0])
+        human = SimulatedHuman(lambda: next(think_times))
+        with human.installed(), patch.object(terminal_console, "_file", io.StringIO()):
+            async with _serve(SSE) as url:
+                leaving = asyncio.create_task(_ask(url, "Drop the cache?"))
+                await _until(lambda: human.on_screen == 1)
+                staying = asyncio.create_task(_ask(url, "Rebuild the index?"))
+                await _until(lambda: scheduler.pending == 1)
+
+                leaving.cancel()
+                result = await asyncio.wait_for(staying, timeout=5)
+
+        assert not result.isError
+        assert human.prompts == 2
+
+    @pytest.mark.asyncio
+    async def test_cancel_notification_withdraws_question(self):
+        """Test that an MCP cancellation from the agent closes the prompt."""
+        human = SimulatedHuman(think_time("constant", 30))
+        with human.installed(), patch.object(terminal_console, "_file", io.StringIO()):
+            async with _serve(SSE) as url:
+                async with _connect(SSE, url) as session:
+                    request_id = session._request_id
+                    call = asyncio.create_task(
+                        session.call_tool(
+                            "request_yes_no_input", {"question": "Deploy?"}
+                        )
+                    )
+                    await _until(lambda: human.on_screen == 1)
+                    await session.send_notification(
+                        types.ClientNotification(
+                            types.CancelledNotification(
+                                method="notifications/cancelled",
+                                params=types.CancelledNotificationParams(
+                                    requestId=request_id
+                                ),
+                            )
+                        )
+                    )
+
+                    await _until(lambda: human.on_screen == 0)
+                    # Wait for the server's reply rather than dropping the call, which
+                    # would leave the reply with nowhere to go
+                    with pytest.raises(McpError, match="Request cancelled"):
+                        await asyncio.wait_for(call, timeout=5)
+                assert not scheduler.busy
+
+
+class TestDisconnectDetection:
+    """Test telling whether the agent of an MCP session is still connected."""
+
+    @pytest.mark.asyncio
+    async def test_closed_transport_is_detected(self, caplog):
+        """Test that the installed mcp still exposes the stream the check relies on."""
+        send, receive = anyio.create_memory_object_stream(1)
+        incoming_send, incoming = anyio.create_memory_object_stream(1)
+        session = ServerSession(
+            incoming,
+            send,
+            InitializationOptions(
+                server_name="test",
+                server_version="0",
+                capabilities=ServerCapabilities(),
+            ),
+        )
+
+        with caplog.at_level(logging.WARNING, logger="src.main"):
+            assert _agent_connected(session)
+            await receive.aclose()
+            assert not _agent_connected(session)
+        assert not caplog.records
+        for stream in (send, incoming_send, incoming):
+            await stream.aclose()
+
+    def test_missing_stream_is_reported_once(self, caplog):
+        """Test that losing disconnect detection is logged instead of silent."""
+        with patch("src.main._disconnect_detection_missing", False):
+            with caplog.at_level(logging.WARNING, logger="src.main"):
+                assert _agent_connected(object())
+                assert _agent_connected(object())
+
+        assert len(caplog.records) == 1
+        assert "not withdrawn" in caplog.records[0].getMessage()
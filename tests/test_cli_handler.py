@@ -3,10 +3,18 @@ Unit tests for CLI handler functions.
 Tests the questionary-based user interaction logic with mocked inputs.
 """
 
+import asyncio
+
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from src.cli_handler import ask_free_form, ask_yes_no, ask_multiple_choice
+from src.cli_handler import (
+    PromptCancelledError,
+    PromptTimeoutError,
+    ask_free_form,
+    ask_multiple_choice,
+    ask_yes_no,
+)
 
 
 class TestCliHandler:
@@ -92,4 +100,34 @@ class TestCliHandler:
         """Test multiple choice with empty options list."""
         result = await ask_multiple_choice("Choose:", [])
         
-        assert result == "ERROR_NO_OPTIONS" 
\ No newline at end of file
+        assert result == "ERROR_NO_OPTIONS"
+
+    @pytest.mark.asyncio
+    @patch('src.cli_handler.questionary.confirm')
+    async def test_ask_yes_no_cancelled_raises_when_requested(self, mock_confirm):
+        """Test yes/no confirmation raising on cancel when the caller opts in."""
+        mock_confirm.return_value.ask_async = AsyncMock(return_value=None)
+        
+        with pytest.raises(PromptCancelledError):
+            await ask_yes_no("Proceed?", raise_on_cancel=True)
+
+    @pytest.mark.asyncio
+    @patch('src.cli_handler.questionary.text')
+    async def test_ask_free_form_timeout_exits_prompt(self, mock_text):
+        """Test that a missed deadline tears down the prompt and raises."""
+        exited = asyncio.Event()
+
+        async def wait_for_exit():
+            await exited.wait()
+            return None
+
+        application = MagicMock(is_running=True)
+        application.exit.side_effect = lambda result: exited.set()
+        mock_text.return_value.application = application
+        mock_text.return_value.ask_async = wait_for_exit
+        
+        with pytest.raises(PromptTimeoutError):
+            await ask_free_form("Test question:", timeout_seconds=0.01)
+        
+        application.exit.assert_called_once_with(result=None)
+        assert "bottom_toolbar" in mock_text.call_args.kwargs
@@ -0,0 +1,203 @@
+"""
+Unit tests for the console link.
+Tests framing and question forwarding between a headless server and a console.
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.attach import _serve
+from src.cli_handler import PromptCancelledError
+from src.console_link import (
+    ConsoleDisconnectedError,
+    ConsoleServer,
+    _encode,
+    open_connection,
+    parse_address,
+    read_frame,
+    write_frame,
+)
+from src.scheduler import PromptScheduler
+from src.terminal import question_request
+
+
+@pytest.fixture
+async def server(tmp_path):
+    console_server = ConsoleServer(
+        PromptScheduler(operators=()), f"unix:{tmp_path / 'console.sock'}"
+    )
+    await console_server.start()
+    yield console_server
+    await console_server.stop()
+
+
+async def _attach(server, name="alice", tags=()):
+    reader, writer = await open_connection(server.address)
+    await write_frame(writer, {"kind": "hello", "name": name, "tags": list(tags)})
+    return reader, writer
+
+
+async def _wait_attached(server, *names):
+    while server.attached != list(names):
+        await asyncio.sleep(0.001)
+
+
+async def _ask(server, request):
+    async with server._scheduler.turn() as grant:
+        reply = await server.ask(grant.operator, request)
+        grant.record_answer()
+        return reply
+
+
+class TestConsoleLink:
+    """Test the framed protocol and the console server."""
+
+    def test_parse_address(self):
+        """Test that unix and tcp addresses are parsed and others rejected."""
+        assert parse_address("unix:/tmp/p.sock") == ("unix", "/tmp/p.sock", None)
+        assert parse_address("tcp:127.0.0.1:8101") == ("tcp", "127.0.0.1", 8101)
+        with pytest.raises(ValueError):
+            parse_address("127.0.0.1:8101")
+
+    @pytest.mark.asyncio
+    async def test_frames_round_trip(self):
+        """Test that a frame written to a stream reads back unchanged."""
+        reader = asyncio.StreamReader()
+
+        class Writer:
+            def write(self, data):
+                reader.feed_data(data)
+
+            async def drain(self):
+                pass
+
+        frame = {"kind": "ask", "id": 1, "request": {"question": "Proceed? ✅"}}
+        await write_frame(Writer(), frame)
+        reader.feed_eof()
+
+        assert await read_frame(reader) == frame
+        assert await read_frame(reader) is None
+
+    @pytest.mark.asyncio
+    async def test_question_waits_for_console_and_is_answered(self, server):
+        """Test that a question asked with no console attached is queued."""
+        question = asyncio.create_task(
+            _ask(server, question_request("yes_no", "Deploy?"))
+        )
+        await asyncio.sleep(0.01)
+        assert not question.done()
+
+        reader, writer = await _attach(server)
+        frame = await read_frame(reader)
+        assert frame["request"]["question"] == "Deploy?"
+        reply = {"answer": True, "comments": "Ship it."}
+        await write_frame(writer, {"kind": "answer", "id": frame["id"], "reply": reply})
+
+        assert await question == reply
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_fails_question_and_removes_operator(self, server):
+        """Test that a console going away mid-question is reported to the caller."""
+        reader, writer = await _attach(server, "alice")
+        await _wait_attached(server, "alice")
+        question = asyncio.create_task(
+            _ask(server, question_request("free_form", "Name?"))
+        )
+        await read_frame(reader)
+        writer.close()
+
+        with pytest.raises(ConsoleDisconnectedError):
+            await question
+        assert server.attached == []
+        assert server._scheduler.operators == []
+
+    @pytest.mark.asyncio
+    async def test_cancelled_prompt_is_reported(self, server):
+        """Test that a cancel on the console surfaces as PromptCancelledError."""
+        reader, writer = await _attach(server)
+        await _wait_attached(server, "alice")
+        question = asyncio.create_task(
+            _ask(server, question_request("yes_no", "Deploy?", raise_on_cancel=True))
+        )
+        frame = await read_frame(reader)
+        await write_frame(
+            writer, {"kind": "error", "id": frame["id"], "error": "cancelled"}
+        )
+
+        with pytest.raises(PromptCancelledError):
+            await question
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_consoles_answer_concurrently(self, server):
+        """Test that every attached console is an operator with its own question."""
+        alice_reader, alice = await _attach(server, "alice")
+        bob_reader, bob = await _attach(server, "alice", tags=["infra"])
+        await _wait_attached(server, "alice", "alice#2")
+        questions = [
+            asyncio.create_task(_ask(server, question_request("free_form", q)))
+            for q in ("First?", "Second?")
+        ]
+
+        for reader, writer, name in (
+            (alice_reader, alice, "A"),
+            (bob_reader, bob, "B"),
+        ):
+            frame = await read_frame(reader)
+            reply = {"answer": name, "comments": ""}
+            await write_frame(
+                writer, {"kind": "answer", "id": frame["id"], "reply": reply}
+            )
+
+        assert sorted(r["answer"] for r in await asyncio.gather(*questions)) == [
+            "A",
+            "B",
+        ]
+        stats = {s["name"]: s for s in server._scheduler.operator_stats()}
+        assert stats["alice#2"]["tags"] == ["infra"]
+        assert stats["alice"]["answered"] == stats["alice#2"]["answered"] == 1
+        alice.close()
+        bob.close()
+
+    @pytest.mark.asyncio
+    async def test_withdrawn_question_is_cancelled_on_console(self, server):
+        """Test that a caller giving up sends a cancel frame for its question."""
+        reader, writer = await _attach(server)
+        await _wait_attached(server, "alice")
+        question = asyncio.create_task(
+            _ask(server, question_request("yes_no", "Deploy?"))
+        )
+        asked = await read_frame(reader)
+        question.cancel()
+
+        assert await read_frame(reader) == {"kind": "cancel", "id": asked["id"]}
+        assert not server._scheduler.busy
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_console_closes_withdrawn_prompt(self):
+        """Test that the console tears down the prompt of a cancelled question."""
+        shown, closed = asyncio.Event(), asyncio.Event()
+
+        async def present(request):
+            shown.set()
+            try:
+                await asyncio.sleep(30)
+            finally:
+                closed.set()
+
+        reader = asyncio.StreamReader()
+        writer = MagicMock()
+        with patch("src.attach.present_question", present):
+            reader.feed_data(_encode({"kind": "ask", "id": 1, "request": {}}))
+            serving = asyncio.create_task(_serve(reader, writer))
+            await asyncio.wait_for(shown.wait(), timeout=5)
+            reader.feed_data(_encode({"kind": "cancel", "id": 1}))
+            await asyncio.wait_for(closed.wait(), timeout=5)
+            reader.feed_eof()
+            await serving
+
+        writer.write.assert_not_called()
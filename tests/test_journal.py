@@ -0,0 +1,241 @@
+"""
+Unit tests for the question journal.
+Tests durability, recovery after a restart and compaction of the journal file.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+import src.main as server
+from src.journal import QuestionJournal
+
+
+def _lines(path):
+    return path.read_text().splitlines()
+
+
+async def _unanswered(*args, **kwargs):
+    await asyncio.Event().wait()
+
+
+class TestQuestionJournal:
+    """Test recording, reloading and compacting journaled questions."""
+
+    @pytest.mark.asyncio
+    async def test_answer_is_durable_and_reloaded(self, tmp_path):
+        """Test that an answered, uncollected question survives a restart."""
+        path = tmp_path / "journal.jsonl"
+        journal = QuestionJournal(str(path), flush_interval=0)
+        journal.load()
+        entry = journal.asked("request_yes_no_input", "Deploy?", arguments={})
+        await journal.answered(entry.id, {"answer": True, "comments": ""})
+
+        # Simulate a crash: nothing is closed, a new process loads the file
+        restored = QuestionJournal(str(path)).load()
+
+        assert [e.id for e in restored] == [entry.id]
+        assert restored[0].answered
+        assert restored[0].result == {"answer": True, "comments": ""}
+
+    @pytest.mark.asyncio
+    async def test_closed_questions_are_not_restored(self, tmp_path):
+        """Test that delivered questions are dropped on the next load."""
+        path = tmp_path / "journal.jsonl"
+        journal = QuestionJournal(str(path), flush_interval=0)
+        journal.load()
+        done = journal.asked("request_free_form_input", "Name?")
+        journal.asked("request_free_form_input", "Branch?")
+        journal.closed(done.id)
+        await journal.close()
+
+        restored = QuestionJournal(str(path)).load()
+
+        assert [e.question for e in restored] == ["Branch?"]
+        assert not restored[0].answered
+        # Loading compacts the file down to the open question
+        assert len(_lines(path)) == 1
+
+    @pytest.mark.asyncio
+    async def test_records_are_batched(self, tmp_path):
+        """Test that concurrent answers share one write."""
+        journal = QuestionJournal(str(tmp_path / "journal.jsonl"))
+        journal.load()
+        entries = [journal.asked("request_free_form_input", f"Q{i}?") for i in range(5)]
+
+        with patch.object(journal, "_write", wraps=journal._write) as write:
+            await asyncio.gather(*(journal.answered(e.id, "yes") for e in entries))
+
+        assert write.call_count == 1
+        await journal.close()
+
+    def test_torn_last_line_is_ignored(self, tmp_path):
+        """Test that a partial record from a crash does not break loading."""
+        path = tmp_path / "journal.jsonl"
+        record = {
+            "op": "ask",
+            "id": "a1",
+            "tool": "request_free_form_input",
+            "question": "Name?",
+            "options": [],
+            "arguments": {},
+            "at": 1e12,
+        }
+        path.write_text(json.dumps(record) + '\n{"op": "answer", "id": "a1", "re')
+
+        restored = QuestionJournal(str(path)).load()
+
+        assert [e.id for e in restored] == ["a1"]
+        assert not restored[0].answered
+
+    @pytest.mark.asyncio
+    async def test_compaction_keeps_journal_bounded(self, tmp_path):
+        """Test that closed questions are compacted away while running."""
+        path = tmp_path / "journal.jsonl"
+        journal = QuestionJournal(str(path), flush_interval=0, compact_min_records=10)
+        journal.load()
+        for i in range(20):
+            entry = journal.asked("request_free_form_input", f"Q{i}?")
+            await journal.answered(entry.id, "yes")
+            journal.closed(entry.id)
+        kept = journal.asked("request_free_form_input", "Kept?")
+        await journal.close()
+
+        assert len(_lines(path)) < 20
+        assert [e.id for e in QuestionJournal(str(path)).load()] == [kept.id]
+
+    def test_recording_before_load_is_refused(self, tmp_path):
+        """Test that a journal that was never loaded says so instead of failing later."""
+        journal = QuestionJournal(str(tmp_path / "journal.jsonl"))
+
+        with pytest.raises(RuntimeError, match="load"):
+            journal.asked("request_free_form_input", "Name?")
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_raised_to_waiters(self, tmp_path):
+        """Test that any error while writing reaches the callers awaiting the batch."""
+        journal = QuestionJournal(str(tmp_path / "journal.jsonl"), flush_interval=0)
+        journal.load()
+        entry = journal.asked("request_free_form_input", "Name?")
+
+        with patch.object(journal, "_write", side_effect=ValueError("file closed")):
+            with pytest.raises(ValueError, match="file closed"):
+                await asyncio.wait_for(journal.answered(entry.id, "Ada"), 1)
+
+        await journal.close()
+
+
+class TestJournaledTools:
+    """Test that tools replay answers and resume questions after a restart."""
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_answer_is_replayed_after_restart(self, mock_ask_yes_no, _, tmp_path):
+        """Test that a retry gets the journaled answer without asking again."""
+        path = tmp_path / "journal.jsonl"
+        before = QuestionJournal(str(path), flush_interval=0)
+        before.load()
+        entry = before.asked("request_yes_no_input", "Drop table?", arguments={})
+        result = {"answer": True, "comments": "", "timed_out": False}
+        await before.answered(entry.id, result)
+
+        journal = QuestionJournal(str(path), flush_interval=0)
+        with patch("src.main.journal", journal):
+            server._recover_questions()
+            assert await server.request_yes_no_input_tool("Drop table?") == result
+            await journal.close()
+
+        mock_ask_yes_no.assert_not_called()
+        assert QuestionJournal(str(path)).load() == []
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    async def test_open_question_is_asked_once_after_restart(
+        self, mock_ask_free_form, _, tmp_path
+    ):
+        """Test that a retry waits for the re-asked question instead of a copy."""
+        path = tmp_path / "journal.jsonl"
+        before = QuestionJournal(str(path), flush_interval=0)
+        before.load()
+        before.asked("request_free_form_input", "Branch?", arguments={"priority": 0})
+        await before.close()
+        mock_ask_free_form.return_value = "main"
+
+        journal = QuestionJournal(str(path), flush_interval=0)
+        with patch("src.main.journal", journal):
+            server._recover_questions()
+            result = await server.request_free_form_input_tool("Branch?")
+            assert result == {"answer": "main", "timed_out": False}
+            await journal.close()
+
+        mock_ask_free_form.assert_called_once()
+        assert server.recovered_questions == {}
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    async def test_default_is_not_replayed_after_restart(
+        self, mock_ask_free_form, _, tmp_path
+    ):
+        """Test that a free-form question that timed out is asked again on retry."""
+        path = tmp_path / "journal.jsonl"
+        journal = QuestionJournal(str(path), flush_interval=0)
+        journal.load()
+        with patch("src.main.journal", journal), patch(
+            "src.main.scheduler.turn"
+        ) as turn:
+            turn.side_effect = asyncio.TimeoutError
+            result = await server.request_free_form_input_tool(
+                "Branch?", timeout_seconds=0, default="main"
+            )
+            await journal.close()
+
+        assert result == {"answer": "main", "timed_out": True}
+        mock_ask_free_form.assert_not_called()
+        # Closed without an answer, so a retry after a crash asks the human
+        assert "answer" not in [json.loads(line)["op"] for line in _lines(path)]
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    async def test_withdrawn_question_is_closed(self, mock_ask_free_form, _, tmp_path):
+        """Test that a question the agent gave up on is not resumed on retry."""
+        mock_ask_free_form.side_effect = _unanswered
+        journal = QuestionJournal(str(tmp_path / "journal.jsonl"), flush_interval=0)
+        journal.load()
+        with patch("src.main.journal", journal):
+            call = asyncio.ensure_future(server.request_free_form_input_tool("Branch?"))
+            while not mock_ask_free_form.called:
+                await asyncio.sleep(0.01)
+            assert journal.lookup("request_free_form_input", "Branch?", []) is not None
+
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            assert journal.lookup("request_free_form_input", "Branch?", []) is None
+            await journal.close()
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    async def test_question_stays_open_when_server_stops(
+        self, mock_ask_free_form, _, tmp_path
+    ):
+        """Test that a question cancelled by the shutdown is resumed after a restart."""
+        mock_ask_free_form.side_effect = _unanswered
+        journal = QuestionJournal(str(tmp_path / "journal.jsonl"), flush_interval=0)
+        journal.load()
+        with patch("src.main.journal", journal), patch("src.main._stopping", True):
+            call = asyncio.ensure_future(server.request_free_form_input_tool("Branch?"))
+            while not mock_ask_free_form.called:
+                await asyncio.sleep(0.01)
+
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            assert journal.lookup("request_free_form_input", "Branch?", []) is not None
+            await journal.close()
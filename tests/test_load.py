@@ -0,0 +1,62 @@
+"""
+Load tests for the server.
+Tests many concurrent SSE sessions end-to-end with a simulated human at the terminal.
+"""
+
+import asyncio
+
+import pytest
+
+from benchmarks.load_test import run_load
+from benchmarks.simulated_human import SimulatedHuman, think_time
+from src.cli_handler import PromptTimeoutError, ask_yes_no
+
+
+class TestSimulatedHuman:
+    """Test the simulated human that replaces the questionary prompts."""
+
+    def test_think_time_distributions(self):
+        """Test that think times follow the requested distribution."""
+        assert think_time()() == 0.0
+        assert think_time("constant", 0.5)() == 0.5
+        samples = [think_time("uniform", 0.5, seed=1)() for _ in range(100)]
+        assert all(0 <= sample <= 1.0 for sample in samples)
+        with pytest.raises(ValueError):
+            think_time("gaussian", 0.5)
+
+    @pytest.mark.asyncio
+    async def test_answers_after_think_time(self):
+        """Test that prompts are answered through the real CLI handler."""
+        human = SimulatedHuman(think_time("constant", 0.01), yes=False)
+        with human.installed():
+            assert await ask_yes_no("Proceed?") is False
+        assert human.prompts == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_answer_hits_the_deadline(self):
+        """Test that a human slower than the deadline times the prompt out."""
+        human = SimulatedHuman(think_time("constant", 1.0))
+        with human.installed():
+            with pytest.raises(PromptTimeoutError):
+                await ask_yes_no("Proceed?", timeout_seconds=0.01)
+
+
+class TestLoad:
+    """Test the server under concurrent sessions."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_sessions(self):
+        """Test that every call from concurrent sessions is answered in time."""
+        human = SimulatedHuman(think_time("exponential", 0.001, seed=7))
+
+        result = await asyncio.wait_for(run_load(5, 6, human), timeout=30)
+
+        assert result["calls"] == 30
+        assert result["errors"] == 0
+        # Every question is distinct, so none is answered by coalescing
+        assert human.prompts == 30
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        # Generous budgets that only trip on a real regression
+        assert result["p95_ms"] < 2000
+        assert result["loop_lag_p99_ms"] < 1000
+        assert result["peak_memory_mb"] > 0
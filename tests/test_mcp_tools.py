@@ -7,157 +7,177 @@ from unittest.mock import patch
 
 import pytest
 
+import asyncio
+
+from src.cli_handler import PromptCancelledError, PromptTimeoutError
 from src.main import (
+    BatchQuestion,
+    answer_cache,
+    get_answer_tool,
+    scheduler,
+    submit_question_tool,
+    request_batch_input_tool,
     request_free_form_input_tool,
     request_multiple_choice_input_tool,
     request_yes_no_input_tool,
 )
+from src.terminal import answer_index
 
 
 class TestMcpTools:
     """Test MCP tool functions with mocked CLI handlers."""
 
+    @pytest.fixture(autouse=True)
+    def forget_earlier_answers(self):
+        """Keeps answers from other tests from being suggested."""
+        answer_index.clear()
+
     @pytest.mark.asyncio
     @patch("src.main.console.print")
-    @patch("src.main.ask_free_form")
+    @patch("src.cli_handler.ask_free_form")
     async def test_request_free_form_input_tool(self, mock_ask_free_form, mock_print):
         """Test free-form input tool end-to-end."""
         mock_ask_free_form.return_value = "user response"
 
         result = await request_free_form_input_tool("What's your name?")
 
-        assert result == "user response"
-        mock_ask_free_form.assert_called_once_with("Your answer: ")
+        assert result == {"answer": "user response", "timed_out": False}
+        mock_ask_free_form.assert_called_once_with(
+            "Your answer: ", raise_on_cancel=False, timeout_seconds=None
+        )
         mock_print.assert_called_once()  # Verify rich panel was displayed
 
     @pytest.mark.asyncio
     @patch("src.main.console.print")
-    @patch("src.main.ask_free_form")
-    @patch("src.main.ask_yes_no")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
     async def test_request_yes_no_input_tool_true_with_comments(
-        self, mock_ask_yes_no, mock_ask_free_form, mock_print
+        self, mock_ask, mock_print
     ):
         """Test yes/no input tool returning True with comments."""
-        mock_ask_yes_no.return_value = True
-        mock_ask_free_form.return_value = "User provided comments."
+        mock_ask.return_value = (True, "User provided comments.")
 
         result = await request_yes_no_input_tool("Continue with operation?")
 
-        expected_result = {"answer": True, "comments": "User provided comments."}
+        expected_result = {
+            "answer": True,
+            "comments": "User provided comments.",
+            "timed_out": False,
+        }
         assert result == expected_result
-        mock_ask_yes_no.assert_called_once_with("Continue with operation? (yes/no):")
-        mock_ask_free_form.assert_called_once_with(
-            "Additional comments (optional, press Enter to skip): "
+        mock_ask.assert_called_once_with(
+            "Continue with operation?", raise_on_cancel=False, timeout_seconds=None
         )
         assert mock_print.call_count == 1  # Original panel print
 
     @pytest.mark.asyncio
     @patch("src.main.console.print")
-    @patch("src.main.ask_free_form")
-    @patch("src.main.ask_yes_no")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
     async def test_request_yes_no_input_tool_true_no_comments(
-        self, mock_ask_yes_no, mock_ask_free_form, mock_print
+        self, mock_ask, mock_print
     ):
         """Test yes/no input tool returning True without comments."""
-        mock_ask_yes_no.return_value = True
-        mock_ask_free_form.return_value = ""  # User presses Enter
+        mock_ask.return_value = (True, "")
 
         result = await request_yes_no_input_tool("Continue with operation?")
 
-        expected_result = {"answer": True, "comments": ""}
+        expected_result = {
+            "answer": True,
+            "comments": "",
+            "timed_out": False,
+        }
         assert result == expected_result
-        mock_ask_yes_no.assert_called_once_with("Continue with operation? (yes/no):")
-        mock_ask_free_form.assert_called_once_with(
-            "Additional comments (optional, press Enter to skip): "
+        mock_ask.assert_called_once_with(
+            "Continue with operation?", raise_on_cancel=False, timeout_seconds=None
         )
-        assert mock_print.call_count == 1
+        assert mock_print.call_count == 1  # Original panel print
 
     @pytest.mark.asyncio
     @patch("src.main.console.print")
-    @patch("src.main.ask_free_form")
-    @patch("src.main.ask_yes_no")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
     async def test_request_yes_no_input_tool_false_with_comments(
-        self, mock_ask_yes_no, mock_ask_free_form, mock_print
+        self, mock_ask, mock_print
     ):
         """Test yes/no input tool returning False with comments."""
-        mock_ask_yes_no.return_value = False
-        mock_ask_free_form.return_value = "Important feedback."
+        mock_ask.return_value = (False, "Important feedback.")
 
         result = await request_yes_no_input_tool("Delete file?")
 
-        expected_result = {"answer": False, "comments": "Important feedback."}
+        expected_result = {
+            "answer": False,
+            "comments": "Important feedback.",
+            "timed_out": False,
+        }
         assert result == expected_result
-        mock_ask_yes_no.assert_called_once_with("Delete file? (yes/no):")
-        mock_ask_free_form.assert_called_once_with(
-            "Additional comments (optional, press Enter to skip): "
+        mock_ask.assert_called_once_with(
+            "Delete file?", raise_on_cancel=False, timeout_seconds=None
         )
-        assert mock_print.call_count == 1
+        assert mock_print.call_count == 1  # Original panel print
 
     @pytest.mark.asyncio
     @patch("src.main.console.print")
-    @patch("src.main.ask_free_form")
-    @patch("src.main.ask_yes_no")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
     async def test_request_yes_no_input_tool_false_no_comments(
-        self, mock_ask_yes_no, mock_ask_free_form, mock_print
+        self, mock_ask, mock_print
     ):
         """Test yes/no input tool returning False without comments."""
-        mock_ask_yes_no.return_value = False
-        mock_ask_free_form.return_value = ""
+        mock_ask.return_value = (False, "")
 
         result = await request_yes_no_input_tool("Delete file?")
 
-        expected_result = {"answer": False, "comments": ""}
+        expected_result = {
+            "answer": False,
+            "comments": "",
+            "timed_out": False,
+        }
         assert result == expected_result
-        mock_ask_yes_no.assert_called_once_with("Delete file? (yes/no):")
-        mock_ask_free_form.assert_called_once_with(
-            "Additional comments (optional, press Enter to skip): "
+        mock_ask.assert_called_once_with(
+            "Delete file?", raise_on_cancel=False, timeout_seconds=None
         )
-        assert mock_print.call_count == 1  # mock_print is called once for the panel
+        assert mock_print.call_count == 1  # Original panel print
 
     @pytest.mark.asyncio
     @patch("src.main.console.print")
-    @patch("src.main.ask_free_form")
-    @patch("src.main.ask_multiple_choice")
+    @patch("src.cli_handler.ask_multiple_choice_with_comments")
     async def test_request_multiple_choice_input_tool_success_with_comments(
-        self, mock_ask_multiple_choice, mock_ask_free_form, mock_print
+        self, mock_ask, mock_print
     ):
         """Test multiple choice input tool with valid options and comments."""
         options = ["Option 1", "Option 2", "Option 3"]
-        mock_ask_multiple_choice.return_value = ["Option 2"]
-        mock_ask_free_form.return_value = "User chose Option 2."
+        mock_ask.return_value = (["Option 2"], "User chose Option 2.")
 
         result = await request_multiple_choice_input_tool("Choose approach:", options)
 
         expected_result = {
             "selection": ["Option 2"],
             "comments": "User chose Option 2.",
+            "timed_out": False,
         }
         assert result == expected_result
-        mock_ask_multiple_choice.assert_called_once_with("Select an option:", options)
-        mock_ask_free_form.assert_called_once_with(
-            "Additional comments (optional, press Enter to skip): "
+        mock_ask.assert_called_once_with(
+            "Choose approach:", options, raise_on_cancel=False, timeout_seconds=None
         )
         assert mock_print.call_count == 1
 
     @pytest.mark.asyncio
     @patch("src.main.console.print")
-    @patch("src.main.ask_free_form")
-    @patch("src.main.ask_multiple_choice")
+    @patch("src.cli_handler.ask_multiple_choice_with_comments")
     async def test_request_multiple_choice_input_tool_success_no_comments(
-        self, mock_ask_multiple_choice, mock_ask_free_form, mock_print
+        self, mock_ask, mock_print
     ):
         """Test multiple choice input tool with valid options and no comments."""
         options = ["Option 1", "Option 2", "Option 3"]
-        mock_ask_multiple_choice.return_value = ["Option 1"]
-        mock_ask_free_form.return_value = ""
+        mock_ask.return_value = (["Option 1"], "")
 
         result = await request_multiple_choice_input_tool("Choose approach:", options)
 
-        expected_result = {"selection": ["Option 1"], "comments": ""}
+        expected_result = {
+            "selection": ["Option 1"],
+            "comments": "",
+            "timed_out": False,
+        }
         assert result == expected_result
-        mock_ask_multiple_choice.assert_called_once_with("Select an option:", options)
-        mock_ask_free_form.assert_called_once_with(
-            "Additional comments (optional, press Enter to skip): "
+        mock_ask.assert_called_once_with(
+            "Choose approach:", options, raise_on_cancel=False, timeout_seconds=None
         )
         assert mock_print.call_count == 1
 
@@ -167,7 +187,182 @@ class TestMcpTools:
         """Test multiple choice input tool with empty options list."""
         result = await request_multiple_choice_input_tool("Choose approach:", [])
 
-        expected_result = {"selection": [], "comments": "ERROR_NO_OPTIONS"}
+        expected_result = {
+            "selection": [],
+            "comments": "ERROR_NO_OPTIONS",
+            "timed_out": False,
+        }
         assert result == expected_result
         # Should print error panel
         assert mock_print.call_count == 1
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    @patch("src.cli_handler.ask_multiple_choice_with_comments")
+    async def test_request_batch_input_tool_all_answered(
+        self, mock_ask_multiple_choice, mock_ask_yes_no, mock_ask_free_form, mock_print
+    ):
+        """Test batch input tool answering mixed question types in order."""
+        mock_ask_yes_no.return_value = (True, "")
+        mock_ask_multiple_choice.return_value = (["B"], "B is simpler.")
+        mock_ask_free_form.return_value = "Jude"
+
+        result = await request_batch_input_tool(
+            [
+                BatchQuestion(type="free_form", question="Your name?"),
+                BatchQuestion(type="yes_no", question="Run tests?"),
+                BatchQuestion(
+                    type="multiple_choice", question="Pick", options=["A", "B"]
+                ),
+            ]
+        )
+
+        assert result == {
+            "answers": [
+                {
+                    "type": "free_form",
+                    "question": "Your name?",
+                    "answer": "Jude",
+                    "comments": "",
+                },
+                {
+                    "type": "yes_no",
+                    "question": "Run tests?",
+                    "answer": True,
+                    "comments": "",
+                },
+                {
+                    "type": "multiple_choice",
+                    "question": "Pick",
+                    "answer": ["B"],
+                    "comments": "B is simpler.",
+                },
+            ],
+            "completed": True,
+        }
+        mock_ask_multiple_choice.assert_called_once_with(
+            "Pick", ["A", "B"], raise_on_cancel=True, timeout_seconds=None,
+            remember_hint=False
+        )
+        assert mock_print.call_count == 3  # One panel per question
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_request_batch_input_tool_cancelled_midway(
+        self, mock_ask_yes_no, mock_print
+    ):
+        """Test batch input tool returning partial answers when the user cancels."""
+        mock_ask_yes_no.side_effect = [
+            (False, "Not yet."),
+            PromptCancelledError("cancelled"),
+        ]
+
+        result = await request_batch_input_tool(
+            [
+                BatchQuestion(type="yes_no", question="Deploy?"),
+                BatchQuestion(type="yes_no", question="Notify team?"),
+                BatchQuestion(type="free_form", question="Why?"),
+            ]
+        )
+
+        assert result == {
+            "answers": [
+                {
+                    "type": "yes_no",
+                    "question": "Deploy?",
+                    "answer": False,
+                    "comments": "Not yet.",
+                }
+            ],
+            "completed": False,
+        }
+        assert mock_print.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_request_yes_no_input_tool_remembered_answer(
+        self, mock_ask_yes_no, mock_print
+    ):
+        """Test that a remembered yes/no answer is reused without prompting."""
+        answer_cache.clear()
+        mock_ask_yes_no.return_value = (True, "Always fine. !remember")
+
+        first = await request_yes_no_input_tool("Run the test suite?")
+        second = await request_yes_no_input_tool("run the test suite")
+
+        assert first == {"answer": True, "comments": "Always fine.", "timed_out": False}
+        assert second == first
+        mock_ask_yes_no.assert_called_once()
+        assert mock_print.call_count == 1
+        answer_cache.clear()
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_request_yes_no_input_tool_timed_out(
+        self, mock_ask_yes_no, mock_print
+    ):
+        """Test yes/no input tool returning the default when the deadline passes."""
+        mock_ask_yes_no.side_effect = PromptTimeoutError("No answer within 5s")
+
+        result = await request_yes_no_input_tool(
+            "Deploy?", timeout_seconds=5, default=True
+        )
+
+        assert result == {"answer": True, "comments": "", "timed_out": True}
+        assert 0 < mock_ask_yes_no.call_args.kwargs["timeout_seconds"] <= 5
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_multiple_choice_with_comments")
+    async def test_request_multiple_choice_input_tool_timed_out(
+        self, mock_ask_multiple_choice, mock_print
+    ):
+        """Test multiple choice input tool returning the default after the deadline."""
+        mock_ask_multiple_choice.side_effect = PromptTimeoutError("No answer within 5s")
+
+        result = await request_multiple_choice_input_tool(
+            "Pick", ["A", "B"], timeout_seconds=5, default=["B"]
+        )
+
+        assert result == {"selection": ["B"], "comments": "", "timed_out": True}
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_free_form")
+    async def test_request_free_form_input_tool_timed_out_while_queued(
+        self, mock_ask_free_form, mock_print
+    ):
+        """Test that time spent waiting behind another question counts too."""
+        async with scheduler.turn("other-session"):
+            result = await request_free_form_input_tool(
+                "Name?", timeout_seconds=0.01, default="unknown"
+            )
+
+        assert result == {"answer": "unknown", "timed_out": True}
+        mock_ask_free_form.assert_not_called()
+        mock_print.assert_not_called()
+        assert not scheduler.busy
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_submit_question_and_get_answer(self, mock_ask_yes_no, mock_print):
+        """Test asking a yes/no question in the background and collecting it later."""
+        mock_ask_yes_no.return_value = (True, "Go ahead.")
+
+        ticket = await submit_question_tool("Migrate the database?", type="yes_no")
+        result = await get_answer_tool(ticket["ticket_id"], wait_seconds=1)
+
+        assert result == {
+            "ticket_id": ticket["ticket_id"],
+            "status": "answered",
+            "result": {"answer": True, "comments": "Go ahead.", "timed_out": False},
+        }
+        mock_ask_yes_no.assert_called_once_with(
+            "Migrate the database?", raise_on_cancel=False, timeout_seconds=None
+        )
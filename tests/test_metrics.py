@@ -0,0 +1,90 @@
+"""
+Unit tests for the metrics module.
+Tests histogram bookkeeping, the Prometheus text format and the /metrics route.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from src.metrics import HUMAN_RESPONSE, TOOL_LATENCY, Registry
+from src.main import mcp, request_yes_no_input_tool
+
+
+class TestMetrics:
+    """Test metric recording and exposition."""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test that observations land in cumulative buckets with sum and count."""
+        registry = Registry()
+        histogram = registry.histogram(
+            "test_seconds", "Test.", ["kind"], buckets=(0.1, 1.0)
+        )
+        histogram.observe(0.05, kind="a")
+        histogram.observe(0.5, kind="a")
+        histogram.observe(5, kind="a")
+
+        assert registry.render().splitlines() == [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{kind="a",le="0.1"} 1',
+            'test_seconds_bucket{kind="a",le="1"} 2',
+            'test_seconds_bucket{kind="a",le="+Inf"} 3',
+            'test_seconds_sum{kind="a"} 5.55',
+            'test_seconds_count{kind="a"} 3',
+        ]
+
+    def test_gauge_reads_callback(self):
+        """Test that a gauge reports its callback's value at render time."""
+        registry = Registry()
+        values = [3]
+        registry.gauge("test_pending", "Test.", lambda: values[0])
+        values[0] = 7
+
+        assert "test_pending 7" in registry.render().splitlines()
+
+    def test_counter_renders_per_label_set(self):
+        """Test that a counter adds up per label set."""
+        registry = Registry()
+        counter = registry.counter("test_calls_total", "Test.", ["tool"])
+        counter.inc(tool="a")
+        counter.inc(2, tool="a")
+        counter.inc(tool="b")
+
+        assert registry.render().splitlines() == [
+            "# HELP test_calls_total Test.",
+            "# TYPE test_calls_total counter",
+            'test_calls_total{tool="a"} 3',
+            'test_calls_total{tool="b"} 1',
+        ]
+
+    def test_duplicate_names_are_rejected(self):
+        """Test that a metric name can only be registered once."""
+        registry = Registry()
+        registry.gauge("test_pending", "Test.", lambda: 0)
+        with pytest.raises(ValueError):
+            registry.gauge("test_pending", "Test.", lambda: 0)
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_tool_call_is_instrumented(self, mock_ask_yes_no, _):
+        """Test that a tool call records its latency and the human response time."""
+        mock_ask_yes_no.return_value = (True, "")
+        tool_calls = TOOL_LATENCY.count(tool="request_yes_no_input")
+        responses = HUMAN_RESPONSE.count(type="yes_no", operator="terminal")
+
+        await request_yes_no_input_tool("Instrumented?")
+
+        assert TOOL_LATENCY.count(tool="request_yes_no_input") == tool_calls + 1
+        assert HUMAN_RESPONSE.count(type="yes_no", operator="terminal") == responses + 1
+
+    def test_metrics_route(self):
+        """Test that /metrics serves the Prometheus text format."""
+        response = TestClient(mcp.sse_app()).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE pairpilot_pending_questions gauge" in response.text
+        assert "# TYPE pairpilot_tool_latency_seconds histogram" in response.text
@@ -0,0 +1,174 @@
+"""
+Unit tests for agent notifications.
+Tests coalescing, the ring buffer, rate-limited batches held back during prompts, and
+the notify_user tool and scrollback route.
+"""
+
+import asyncio
+import io
+import time
+
+import pytest
+from rich.console import Console
+from starlette.testclient import TestClient
+
+from src.main import mcp, notifications, notify_user_tool
+from src.metrics import NOTIFICATIONS
+from src.notifications import NotificationBoard
+
+
+class Screen:
+    """Collects the status panels written by a board."""
+
+    def __init__(self):
+        self.panels = []
+
+    async def write(self, panel):
+        self.panels.append(panel)
+
+    def text(self, index=-1):
+        console = Console(file=io.StringIO(), width=100)
+        console.print(self.panels[index])
+        return console.file.getvalue()
+
+
+async def _until(condition, timeout=5.0):
+    """Waits for a condition to hold, failing the test if it does not in time."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+class TestNotificationBoard:
+    """Test keeping and showing agent notifications."""
+
+    @pytest.mark.asyncio
+    async def test_repeats_are_folded_into_one_line(self):
+        """Test that a repeated message is counted instead of shown again."""
+        screen = Screen()
+        board = NotificationBoard(screen.write, flush_interval=0.05)
+
+        first, coalesced = board.notify("a", "Running tests...")
+        again, coalesced_again = board.notify("a", "running tests")
+        other, _ = board.notify("b", "Running tests...")
+        await _until(lambda: screen.panels)
+
+        assert (coalesced, coalesced_again) == (False, True)
+        assert again is first and first["count"] == 2
+        assert other["id"] != first["id"]
+        assert "×2" in screen.text()
+        assert [item["session"] for item in board.history()] == ["agent 1", "agent 2"]
+        await board.close()
+
+    @pytest.mark.asyncio
+    async def test_bursts_are_batched_and_rate_limited(self):
+        """Test that rapid messages are written in batches at most once per interval."""
+        screen = Screen()
+        board = NotificationBoard(screen.write, flush_interval=0.2, max_lines=3)
+
+        board.notify("a", "step 0")
+        await _until(lambda: len(screen.panels) == 1)
+        for step in range(1, 8):
+            board.notify("a", f"step {step}")
+        await asyncio.sleep(0.1)
+        assert len(screen.panels) == 1
+
+        await _until(lambda: len(screen.panels) == 2)
+        text = screen.text()
+        assert "4 earlier update(s) not shown" in text
+        assert "step 5" in text and "step 7" in text and "step 4" not in text
+        assert board.pending == 0
+        await board.close()
+
+    @pytest.mark.asyncio
+    async def test_held_back_while_prompting(self):
+        """Test that nothing is written while a prompt is on screen."""
+        screen = Screen()
+        prompting = True
+        board = NotificationBoard(
+            screen.write, flush_interval=0.01, hold=lambda: prompting
+        )
+
+        board.notify("a", "Migration started")
+        await asyncio.sleep(0.2)
+        assert not screen.panels and board.pending == 1
+
+        prompting = False
+        await _until(lambda: screen.panels)
+        assert "Migration started" in screen.text()
+        await board.close()
+
+    @pytest.mark.asyncio
+    async def test_ring_buffer_keeps_latest(self):
+        """Test that the scrollback keeps only the latest notifications."""
+        board = NotificationBoard(Screen().write, history=3, flush_interval=60)
+
+        for step in range(5):
+            board.notify("a", f"step {step}")
+
+        assert len(board) == 3
+        assert [item["message"] for item in board.history()] == [
+            "step 2",
+            "step 3",
+            "step 4",
+        ]
+        assert [item["message"] for item in board.history(since=4)] == ["step 4"]
+        assert [item["message"] for item in board.history(limit=1)] == ["step 4"]
+        await board.close()
+
+    def test_agent_text_is_not_markup(self):
+        """Test that markup in a message is shown as typed."""
+        board = NotificationBoard(Screen().write)
+        notification = {
+            "id": 1,
+            "session": "agent 1",
+            "level": "warning",
+            "message": "[red]not styled[/red]",
+            "count": 1,
+            "first_at": 0.0,
+            "last_at": 0.0,
+        }
+        screen = Screen()
+        screen.panels.append(board.render([notification]))
+
+        assert "[red]not styled[/red]" in screen.text()
+
+
+class TestNotifyUserTool:
+    """Test the notify_user tool and the scrollback route."""
+
+    @pytest.mark.asyncio
+    async def test_returns_without_waiting_for_the_human(self):
+        """Test that notifying returns at once and the message is kept."""
+        sent = NOTIFICATIONS.value(level="success")
+
+        result = await notify_user_tool("Migration finished", level="success")
+        repeat = await notify_user_tool("Migration finished.", level="success")
+
+        assert result == {
+            "notification_id": result["notification_id"],
+            "coalesced": False,
+        }
+        assert repeat == {
+            "notification_id": result["notification_id"],
+            "coalesced": True,
+        }
+        assert NOTIFICATIONS.value(level="success") == sent + 2
+        await notifications.close()
+
+    @pytest.mark.asyncio
+    async def test_scrollback_route(self):
+        """Test that the scrollback is served as JSON."""
+        result = await notify_user_tool("Indexing the repository")
+        await notifications.close()
+        client = TestClient(mcp.sse_app())
+
+        since = result["notification_id"] - 1
+        response = client.get(f"/notifications?since={since}")
+
+        assert response.status_code == 200
+        assert [item["message"] for item in response.json()] == [
+            "Indexing the repository"
+        ]
+        assert client.get("/notifications?limit=x").status_code == 400
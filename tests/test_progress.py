@@ -0,0 +1,171 @@
+"""
+Progress tests for the server.
+Tests that calls waiting for the human send progress notifications, so a client that
+times out quiet calls keeps waiting instead of sending the call again.
+"""
+
+import asyncio
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+
+from benchmarks.simulated_human import SimulatedHuman, think_time
+from benchmarks.transport_benchmark import Variant, _connect, _serve
+from src.terminal import console as terminal_console
+
+SSE = Variant("sse", "sse")
+
+
+class ImpatientClient:
+    """
+    Stands in for an MCP client that gives up on a tool call after a quiet interval
+    and sends it again. Progress notifications for the call restart the interval.
+    """
+
+    def __init__(self, session, idle_timeout, max_attempts=5):
+        self.session = session
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max_attempts
+        self.retries = 0
+        self.progress = []
+
+    async def call_tool(self, name, arguments):
+        for _ in range(self.max_attempts):
+            heard = asyncio.Event()
+
+            async def on_progress(progress, total, message):
+                self.progress.append((progress, message))
+                heard.set()
+
+            call = asyncio.create_task(
+                self.session.call_tool(name, arguments, progress_callback=on_progress)
+            )
+            while True:
+                heard.clear()
+                waiter = asyncio.create_task(heard.wait())
+                done, _ = await asyncio.wait(
+                    {call, waiter},
+                    timeout=self.idle_timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                waiter.cancel()
+                if call in done:
+                    return call.result()
+                if not done:
+                    break
+            # Nothing heard in time: give up on this call and send it again
+            call.cancel()
+            await asyncio.gather(call, return_exceptions=True)
+            self.retries += 1
+        raise AssertionError("The call never completed")
+
+
+async def _ask_slow_human(progress_interval):
+    human = SimulatedHuman(think_time("constant", 1.0))
+    with human.installed(), patch.object(
+        terminal_console, "_file", io.StringIO()
+    ), patch("src.main.PROGRESS_INTERVAL_SECONDS", progress_interval):
+        async with _serve(SSE) as url:
+            async with _connect(SSE, url) as session:
+                client = ImpatientClient(session, idle_timeout=0.4)
+                result = await client.call_tool(
+                    "request_yes_no_input", {"question": "Apply the migration?"}
+                )
+    return client, result, human
+
+
+class TestProgressHeartbeats:
+    """Test progress notifications during long waits for the human."""
+
+    @pytest.mark.asyncio
+    async def test_quiet_call_is_retried(self):
+        """Test that without progress the stand-in client times out and retries."""
+        client, result, _ = await _ask_slow_human(progress_interval=0)
+
+        assert not result.isError
+        assert client.retries >= 1
+        assert client.progress == []
+
+    @pytest.mark.asyncio
+    async def test_progress_prevents_retries(self):
+        """Test that heartbeats keep the client waiting for the single prompt."""
+        client, result, human = await _ask_slow_human(progress_interval=0.1)
+
+        assert not result.isError
+        assert client.retries == 0
+        assert human.prompts == 1
+        progress = [value for value, _ in client.progress]
+        assert len(progress) >= 5
+        assert progress == sorted(set(progress))
+        assert all("s elapsed" in message for _, message in client.progress)
+        assert "Waiting for the human to answer" in client.progress[-1][1]
+
+    @pytest.mark.asyncio
+    async def test_progress_reports_queue_position(self):
+        """Test that a queued call reports how many questions are ahead of it."""
+        human = SimulatedHuman(think_time("constant", 0.6))
+        with human.installed(), patch.object(
+            terminal_console, "_file", io.StringIO()
+        ), patch("src.main.PROGRESS_INTERVAL_SECONDS", 0.1):
+            async with _serve(SSE) as url:
+                async with _connect(SSE, url) as first, _connect(SSE, url) as second:
+                    asking = asyncio.create_task(
+                        first.call_tool("request_yes_no_input", {"question": "Deploy?"})
+                    )
+                    await asyncio.sleep(0.1)
+                    client = ImpatientClient(second, idle_timeout=1.0)
+                    await client.call_tool(
+                        "request_free_form_input", {"question": "Which region?"}
+                    )
+                    await asyncio.wait_for(asking, timeout=5)
+
+        messages = [message for _, message in client.progress]
+        assert any("next in line" in message for message in messages)
+        assert "Waiting for the human to answer" in messages[-1]
+
+    @pytest.mark.asyncio
+    async def test_no_progress_after_submit_question_returns(self):
+        """Test that a ticket's question sends no progress for submit_question."""
+        human = SimulatedHuman(think_time("constant", 0.8))
+        progress = []
+
+        async def record(message):
+            if isinstance(message, types.ServerNotification) and isinstance(
+                message.root, types.ProgressNotification
+            ):
+                progress.append(message.root.params.progressToken)
+
+        async def ignore(progress, total, message):
+            pass
+
+        with human.installed(), patch.object(
+            terminal_console, "_file", io.StringIO()
+        ), patch("src.main.PROGRESS_INTERVAL_SECONDS", 0.1):
+            async with _serve(SSE) as url:
+                async with sse_client(url) as streams, ClientSession(
+                    *streams, message_handler=record
+                ) as session:
+                    await session.initialize()
+                    ticket = await session.call_tool(
+                        "submit_question",
+                        {"question": "Apply the migration?", "type": "yes_no"},
+                        progress_callback=ignore,
+                    )
+                    submit_token = session._request_id - 1
+                    await asyncio.sleep(0.5)
+                    assert submit_token not in progress
+
+                    ticket_id = json.loads(ticket.content[0].text)["ticket_id"]
+                    answer = await session.call_tool(
+                        "get_answer",
+                        {"ticket_id": ticket_id, "wait_seconds": 5},
+                        progress_callback=ignore,
+                    )
+
+        assert json.loads(answer.content[0].text)["status"] == "answered"
+        # Only get_answer, which is still waiting, hears about the question
+        assert progress and submit_token not in progress
@@ -0,0 +1,155 @@
+"""
+Unit tests for rendering large questions.
+Tests byte limits, code and diff detection, previews and the pager.
+"""
+
+import io
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from rich.console import Console
+
+from src.question_view import (
+    QuestionView,
+    limit_bytes,
+    preview,
+    prompt_message,
+    split_segments,
+)
+from src.terminal import present_question, question_request
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,2 @@
+-retries = 1
++retries = 3
+ timeout = 10"""
+
+TRACEBACK = """Traceback (most recent call last):
+  File "app.py", line 3, in <module>
+    connect()
+ConnectionError: refused"""
+
+
+class TestQuestionView:
+    """Test how large questions are cut and split before rendering."""
+
+    def test_limit_bytes_keeps_whole_characters(self):
+        """Test that the byte limit never splits a multi-byte character."""
+        assert limit_bytes("short", 100) == ("short", 0)
+        assert limit_bytes("ééé", 3) == ("é", 4)
+
+    def test_detects_diffs_tracebacks_and_fenced_code(self):
+        """Test that code is split out of the prose with the right lexer."""
+        question = (
+            f"Apply this?\n{DIFF}\n\nIt fails with:\n{TRACEBACK}\n```js\nrun()\n```"
+        )
+
+        segments = split_segments(question)
+
+        assert [segment.lexer for segment in segments] == [
+            None,
+            "diff",
+            None,
+            "pytb",
+            "js",
+        ]
+        assert segments[1].body == DIFF
+        assert segments[3].body == TRACEBACK
+
+    def test_preview_is_bounded(self):
+        """Test that the preview stops at the line and character limits."""
+        segments = split_segments("\n".join(f"line {n}" for n in range(1000)))
+
+        shown, hidden, _ = preview(segments, max_lines=40, max_chars=10_000)
+        assert shown[0].line_count == 40
+        assert hidden == 960
+
+        shown, hidden, hidden_chars = preview(
+            split_segments("x" * 100_000), 40, max_chars=500
+        )
+        assert len(shown[0].body) <= 501
+        assert (hidden, hidden_chars) == (0, 99_500)
+
+    def test_prompt_message_for_long_questions(self):
+        """Test that long questions are announced by their first line at the prompt."""
+        assert prompt_message("Deploy?") == "Deploy?"
+        assert prompt_message(f"Apply this?\n{DIFF}") == "Apply this? …"
+
+    def test_huge_question_is_cut_before_rendering(self):
+        """Test that the byte limit applies before the question is split."""
+        view = QuestionView(DIFF * 100_000, 64 * 1024, 40, 8000)
+
+        assert len(view.text.encode("utf-8")) <= 64 * 1024
+        assert view.omitted_bytes == len(DIFF * 100_000) - len(view.text)
+        assert view.truncated
+
+    def test_single_long_line_is_truncated(self):
+        """Test that a preview cut within one line still counts as truncated."""
+        view = QuestionView("x" * 200_000, 256 * 1024, 40, 8000)
+
+        assert (view.hidden_lines, view.omitted_bytes) == (0, 0)
+        assert view.hidden_chars == 192_000
+        assert view.truncated
+
+
+class TestLargeQuestionPanel:
+    """Test presenting a large question in the terminal."""
+
+    @pytest.mark.asyncio
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    @patch("src.cli_handler.ask_yes_no")
+    async def test_panel_shows_a_preview(self, mock_page, mock_answer):
+        """Test that only the preview is printed when the pager is declined."""
+        mock_page.return_value = False
+        mock_answer.return_value = (True, "")
+        screen = Console(file=io.StringIO(), width=100)
+        question = "Apply this?\n" + "\n".join(f"+line {n}" for n in range(5000))
+
+        with patch("src.terminal.console", screen):
+            reply = await present_question(question_request("yes_no", question))
+
+        output = screen.file.getvalue()
+        assert reply == {"answer": True, "comments": ""}
+        assert "showing 40 of 5,001 lines" in output
+        assert "+line 38" in output and "+line 39" not in output
+        assert mock_answer.call_args.args[0] == "Apply this? …"
+
+    @pytest.mark.asyncio
+    @patch("pydoc.pager")
+    @patch("src.cli_handler.ask_free_form", new_callable=AsyncMock)
+    @patch("src.cli_handler.ask_yes_no", new_callable=AsyncMock)
+    async def test_pager_shows_everything(self, mock_page, mock_answer, mock_pager):
+        """Test that accepting the pager shows the whole question, highlighted."""
+        mock_page.return_value = True
+        mock_answer.return_value = "Looks fine"
+        screen = Console(file=io.StringIO(), width=100, force_terminal=True)
+
+        with patch("src.terminal.console", screen):
+            reply = await present_question(
+                question_request("free_form", "Review:\n" + "\n".join([DIFF] * 50))
+            )
+
+        assert reply["answer"] == "Looks fine"
+        paged = mock_pager.call_args.args[0]
+        assert paged.count("retries = 3") == 50
+        assert "\x1b[" in paged  # Styled for less -R
+
+    @pytest.mark.asyncio
+    @patch("src.cli_handler.ask_free_form", new_callable=AsyncMock)
+    @patch("src.cli_handler.ask_yes_no", new_callable=AsyncMock)
+    async def test_long_line_offers_the_pager(self, mock_page, mock_answer):
+        """Test that a single line longer than the preview can be paged."""
+        mock_page.return_value = False
+        mock_answer.return_value = "ok"
+        screen = Console(file=io.StringIO(), width=100)
+        question = '{"rows": [' + ", ".join(["1"] * 40_000) + "]}"
+
+        with patch("src.terminal.console", screen):
+            await present_question(question_request("free_form", question))
+
+        assert f"showing 8,000 of {len(question):,} characters" in (
+            screen.file.getvalue()
+        )
+        mock_page.assert_called_once()
@@ -0,0 +1,124 @@
+"""
+Unit tests for rendering off the event loop.
+Tests that terminal output runs on the render worker in order, and that the loop lag
+monitor reports how long the loop was blocked.
+"""
+
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+from rich.console import Console
+from rich.panel import Panel
+
+from src.loop_lag import LoopLagMonitor
+from src.render_worker import RenderWorker
+
+
+class TestRenderWorker:
+    """Test running output jobs on the render worker."""
+
+    @pytest.mark.asyncio
+    async def test_output_is_written_off_the_loop_in_order(self):
+        """Test that jobs run on the worker thread in the order they were submitted."""
+        worker = RenderWorker(max_pending=2)
+        written = []
+
+        def write(line):
+            written.append((line, threading.current_thread().name))
+
+        await asyncio.gather(*(worker.call(write, n) for n in range(10)))
+        worker.close()
+
+        assert [line for line, _ in written] == list(range(10))
+        assert {thread for _, thread in written} == {"render-worker"}
+
+    @pytest.mark.asyncio
+    async def test_slow_terminal_does_not_block_the_loop(self):
+        """Test that other tasks keep running while a slow render is written."""
+        worker = RenderWorker()
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await worker.call(time.sleep, 0.3)
+        ticker.cancel()
+        worker.close()
+
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_the_caller(self):
+        """Test that an exception raised while rendering is raised to the caller."""
+        worker = RenderWorker()
+
+        def fail():
+            raise ValueError("terminal gone")
+
+        with pytest.raises(ValueError):
+            await worker.call(fail)
+        assert await worker.call(lambda: "still running") == "still running"
+        worker.close()
+
+    @pytest.mark.asyncio
+    async def test_prints_panels(self):
+        """Test that a panel is laid out and written by the worker."""
+        worker = RenderWorker()
+        screen = Console(file=io.StringIO(), width=40)
+
+        await worker.call(screen.print, Panel("Deploy now?", title="Yes/No"))
+        worker.close()
+
+        assert "Deploy now?" in screen.file.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_stop_runs_the_backlog_in_order(self):
+        """Test that stopping writes every job, including ones waiting for room."""
+        worker = RenderWorker(max_pending=1)
+        released = threading.Event()
+        written = []
+        worker.post(released.wait)
+        calls = [
+            asyncio.ensure_future(worker.call(written.append, n)) for n in range(5)
+        ]
+        await asyncio.sleep(0.05)
+        assert worker.pending >= 4
+
+        released.set()
+        await worker.stop()
+
+        assert written == list(range(5))
+        assert all(call.done() for call in calls)
+
+
+class TestLoopLagMonitor:
+    """Test reporting how long the event loop was blocked."""
+
+    @pytest.mark.asyncio
+    async def test_reports_blocked_loop(self):
+        """Test that blocking the loop shows up as lag."""
+        monitor = LoopLagMonitor(interval=0.01, warn_after=10)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.2)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+        assert monitor.max_lag >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_has_little_lag(self):
+        """Test that an idle loop reports almost no lag."""
+        monitor = LoopLagMonitor(interval=0.01, warn_after=10)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+        assert monitor.max_lag < 0.1
@@ -0,0 +1,208 @@
+"""
+Unit tests for the prompt scheduler.
+Tests that concurrent questions are handed to operators with priority, session
+fairness and tag routing.
+"""
+
+import asyncio
+
+import pytest
+
+from src.scheduler import PromptScheduler
+
+
+async def _ask(scheduler, order, name, session_id="s1", priority=0, hold=0.01):
+    async with scheduler.turn(session_id, priority):
+        order.append(name)
+        await asyncio.sleep(hold)
+
+
+class TestPromptScheduler:
+    """Test turn ordering and cleanup of the prompt scheduler."""
+
+    @pytest.mark.asyncio
+    async def test_turns_are_exclusive(self):
+        """Test that only one question holds the terminal at a time."""
+        scheduler = PromptScheduler()
+        active = []
+        overlaps = []
+
+        async def ask(name):
+            async with scheduler.turn():
+                active.append(name)
+                overlaps.append(len(active))
+                await asyncio.sleep(0.01)
+                active.remove(name)
+
+        await asyncio.gather(*(ask(i) for i in range(5)))
+
+        assert max(overlaps) == 1
+        assert not scheduler.busy
+        assert scheduler.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_is_served_first(self):
+        """Test that a high-priority question jumps the queue."""
+        scheduler = PromptScheduler()
+        order = []
+
+        first = asyncio.create_task(_ask(scheduler, order, "first"))
+        await asyncio.sleep(0)
+        low = asyncio.create_task(_ask(scheduler, order, "low"))
+        high = asyncio.create_task(_ask(scheduler, order, "high", priority=5))
+        await asyncio.gather(first, low, high)
+
+        assert order == ["first", "high", "low"]
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_served_round_robin(self):
+        """Test that a session with many questions does not starve another."""
+        scheduler = PromptScheduler()
+        order = []
+
+        tasks = [
+            asyncio.create_task(_ask(scheduler, order, f"a{i}", session_id="a"))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(_ask(scheduler, order, "b0", session_id="b")))
+        await asyncio.gather(*tasks)
+
+        assert order == ["a0", "b0", "a1", "a2"]
+
+    @pytest.mark.asyncio
+    async def test_yields_queue_depth(self):
+        """Test that the granted question sees how many are waiting behind it."""
+        scheduler = PromptScheduler()
+        depths = []
+
+        async def ask():
+            async with scheduler.turn() as grant:
+                depths.append(grant.queued)
+                await asyncio.sleep(0.01)
+
+        first = asyncio.create_task(ask())
+        await asyncio.sleep(0)
+        await asyncio.gather(first, ask(), ask())
+
+        assert depths == [0, 1, 0]
+
+    @pytest.mark.asyncio
+    async def test_position_in_queue(self):
+        """Test how many questions are reported ahead of a session's question."""
+        scheduler = PromptScheduler()
+        order = []
+
+        first = asyncio.create_task(_ask(scheduler, order, "a0", "a", hold=0.05))
+        await asyncio.sleep(0)
+        rest = [
+            asyncio.create_task(_ask(scheduler, order, "a1", "a")),
+            asyncio.create_task(_ask(scheduler, order, "b0", "b", priority=1)),
+        ]
+        await asyncio.sleep(0)
+
+        assert scheduler.position("b") == 0
+        assert scheduler.position("a") == 1
+        assert scheduler.position("c") is None
+        await asyncio.gather(first, *rest)
+        assert scheduler.position("a") is None
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_removed(self):
+        """Test that cancelling a queued question does not block the next one."""
+        scheduler = PromptScheduler()
+        order = []
+
+        first = asyncio.create_task(_ask(scheduler, order, "first", hold=0.02))
+        await asyncio.sleep(0)
+        abandoned = asyncio.create_task(_ask(scheduler, order, "abandoned"))
+        last = asyncio.create_task(_ask(scheduler, order, "last"))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.gather(first, last)
+
+        assert order == ["first", "last"]
+        assert abandoned.cancelled()
+        assert not scheduler.busy
+
+    @pytest.mark.asyncio
+    async def test_timeout_without_operators(self):
+        """Test that a question with a timeout gives up when nobody can answer."""
+        scheduler = PromptScheduler(operators=())
+
+        with pytest.raises(asyncio.TimeoutError):
+            async with scheduler.turn(timeout=0.01):
+                pass
+        assert scheduler.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_operators_answer_in_parallel(self):
+        """Test that each operator holds its own question at the same time."""
+        scheduler = PromptScheduler(operators=("alice", "bob"))
+        granted = []
+
+        async def ask():
+            async with scheduler.turn() as grant:
+                granted.append(grant.operator)
+                await asyncio.sleep(0.01)
+                grant.record_answer()
+
+        await asyncio.gather(*(ask() for _ in range(4)))
+
+        assert sorted(granted) == ["alice", "alice", "bob", "bob"]
+        assert {s["name"]: s["answered"] for s in scheduler.operator_stats()} == {
+            "alice": 2,
+            "bob": 2,
+        }
+
+    @pytest.mark.asyncio
+    async def test_unanswered_turns_are_not_counted(self):
+        """Test that turns cancelled or timed out before an answer skip the stats."""
+        scheduler = PromptScheduler(operators=("alice",))
+
+        async def hold():
+            async with scheduler.turn():
+                await asyncio.sleep(1)
+
+        withdrawn = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        withdrawn.cancel()
+        with pytest.raises(asyncio.TimeoutError):
+            async with scheduler.turn():
+                raise asyncio.TimeoutError
+
+        (stats,) = scheduler.operator_stats()
+        assert stats["answered"] == 0
+        assert stats["mean_response_seconds"] is None
+        assert not stats["busy"]
+
+    @pytest.mark.asyncio
+    async def test_tagged_questions_go_to_matching_operators(self):
+        """Test that a tagged question skips operators with other tags."""
+        scheduler = PromptScheduler(operators=())
+        scheduler.add_operator("dba", tags=["database"])
+        scheduler.add_operator("sre", tags=["infra"])
+        granted = {}
+
+        async def ask(name, tags):
+            async with scheduler.turn(tags=tags) as grant:
+                granted[name] = grant.operator
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(ask("migration", ["database"]), ask("deploy", ["infra"]))
+
+        assert granted == {"migration": "dba", "deploy": "sre"}
+
+    @pytest.mark.asyncio
+    async def test_question_waits_for_added_operator(self):
+        """Test that queued questions are pulled by an operator that joins later."""
+        scheduler = PromptScheduler(operators=())
+        question = asyncio.create_task(_ask(scheduler, [], "q"))
+        await asyncio.sleep(0)
+        assert scheduler.pending == 1
+
+        scheduler.add_operator("alice")
+        await question
+
+        scheduler.remove_operator("alice")
+        assert scheduler.operators == []
@@ -0,0 +1,172 @@
+"""
+Unit tests for sharing in-flight questions.
+Tests that identical concurrent questions prompt the human once, and that callers can
+give up without withdrawing the question from the others.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.main import (
+    questions_in_flight,
+    request_multiple_choice_input_tool,
+    request_yes_no_input_tool,
+)
+from src.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test sharing one call among concurrent callers."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self):
+        """Test that callers with the same key get the result of a single call."""
+        flights = SingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await release.wait()
+            return "answer"
+
+        waiting = [asyncio.ensure_future(flights.do("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flights.waiting == 2
+        release.set()
+
+        assert await asyncio.gather(*waiting) == ["answer"] * 3
+        assert len(calls) == 1
+        assert flights.coalesced == 2
+        assert len(flights) == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_leaves_the_call_running(self):
+        """Test that one caller giving up does not cancel the call for the others."""
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "answer"
+
+        first = asyncio.ensure_future(flights.do("key", call))
+        second = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == "answer"
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_call_is_cancelled_when_every_caller_gives_up(self):
+        """Test that the call stops once nobody waits for it, and is started again."""
+        flights = SingleFlight()
+        started = []
+
+        async def call():
+            started.append(1)
+            await asyncio.sleep(10)
+
+        waiting = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        await asyncio.sleep(0)
+        assert len(flights) == 0
+
+        again = asyncio.ensure_future(flights.do("key", call))
+        await asyncio.sleep(0.01)
+        assert len(started) == 2
+        again.cancel()
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        """Test that an exception from the shared call is raised to each caller."""
+        flights = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0)
+            raise ValueError("failed")
+
+        results = await asyncio.gather(
+            flights.do("key", call), flights.do("key", call), return_exceptions=True
+        )
+
+        assert all(isinstance(result, ValueError) for result in results)
+
+
+class TestCoalescedQuestions:
+    """Test that tools asking the same question share one prompt."""
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_retried_question_is_asked_once(self, mock_ask_yes_no, mock_print):
+        """Test that a retry of a waiting question gets the answer to the first."""
+        release = asyncio.Event()
+
+        async def answer(*args, **kwargs):
+            await release.wait()
+            return True, "Go ahead."
+
+        mock_ask_yes_no.side_effect = answer
+        first = asyncio.ensure_future(request_yes_no_input_tool("Deploy now?"))
+        await asyncio.sleep(0.05)
+        retry = asyncio.ensure_future(request_yes_no_input_tool("  deploy NOW "))
+        await asyncio.sleep(0.05)
+        assert questions_in_flight.waiting == 1
+        release.set()
+
+        expected = {"answer": True, "comments": "Go ahead.", "timed_out": False}
+        assert await first == expected
+        assert await retry == expected
+        mock_ask_yes_no.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_yes_no_with_comments")
+    async def test_caller_timing_out_keeps_the_prompt(
+        self, mock_ask_yes_no, mock_print
+    ):
+        """Test that a caller's own deadline does not withdraw the shared prompt."""
+        release = asyncio.Event()
+
+        async def answer(*args, **kwargs):
+            await release.wait()
+            return False, ""
+
+        mock_ask_yes_no.side_effect = answer
+        first = asyncio.ensure_future(request_yes_no_input_tool("Drop the table?"))
+        await asyncio.sleep(0.05)
+        impatient = await request_yes_no_input_tool(
+            "Drop the table?", timeout_seconds=0.05, default=True
+        )
+        release.set()
+
+        assert impatient == {"answer": True, "comments": "", "timed_out": True}
+        assert (await first)["answer"] is False
+        mock_ask_yes_no.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("src.main.console.print")
+    @patch("src.cli_handler.ask_multiple_choice_with_comments")
+    async def test_different_options_are_asked_separately(
+        self, mock_ask_choice, mock_print
+    ):
+        """Test that the same question with other options is not coalesced."""
+        mock_ask_choice.side_effect = lambda message, options, **kwargs: (
+            options[:1],
+            "",
+        )
+
+        results = await asyncio.gather(
+            request_multiple_choice_input_tool("Which?", ["A", "B"]),
+            request_multiple_choice_input_tool("Which?", ["C", "D"]),
+        )
+
+        assert [result["selection"] for result in results] == [["A"], ["C"]]
+        assert mock_ask_choice.call_count == 2
@@ -0,0 +1,111 @@
+"""
+Unit tests for the ticket store.
+Tests submitting questions, collecting answers and expiring abandoned tickets.
+"""
+
+import asyncio
+
+import pytest
+
+from src.tickets import TicketStore
+
+
+async def _answer_after(delay, answer):
+    await asyncio.sleep(delay)
+    return answer
+
+
+class TestTicketStore:
+    """Test the background question ticket store."""
+
+    @pytest.mark.asyncio
+    async def test_collect_without_waiting_returns_pending(self):
+        """Test that a non-blocking collect does not wait for the answer."""
+        store = TicketStore()
+        ticket_id = store.submit(_answer_after(1, "late"))
+
+        result = await store.collect(ticket_id)
+
+        assert result == {"ticket_id": ticket_id, "status": "pending", "result": None}
+        await store.cancel_all()
+
+    @pytest.mark.asyncio
+    async def test_collect_waits_for_answer_and_forgets_ticket(self):
+        """Test that a blocking collect returns the answer once, then forgets it."""
+        store = TicketStore()
+        ticket_id = store.submit(_answer_after(0.01, {"answer": True}))
+
+        result = await store.collect(ticket_id, wait_seconds=1)
+
+        assert result["status"] == "answered"
+        assert result["result"] == {"answer": True}
+        assert (await store.collect(ticket_id))["status"] == "not_found"
+        assert len(store) == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_timeout_leaves_question_running(self):
+        """Test that timing out while waiting does not cancel the question."""
+        store = TicketStore()
+        ticket_id = store.submit(_answer_after(0.05, "done"))
+
+        first = await store.collect(ticket_id, wait_seconds=0.01)
+        second = await store.collect(ticket_id, wait_seconds=1)
+
+        assert first["status"] == "pending"
+        assert second == {
+            "ticket_id": ticket_id,
+            "status": "answered",
+            "result": "done",
+        }
+
+    @pytest.mark.asyncio
+    async def test_failed_question_is_reported(self):
+        """Test that an exception while asking is reported as a failure."""
+
+        async def broken():
+            raise RuntimeError("terminal closed")
+
+        store = TicketStore()
+        ticket_id = store.submit(broken())
+
+        result = await store.collect(ticket_id, wait_seconds=1)
+
+        assert result["status"] == "failed"
+        assert result["result"] == "terminal closed"
+
+    @pytest.mark.asyncio
+    async def test_abandoned_ticket_expires_and_is_cancelled(self):
+        """Test that an uncollected ticket is cancelled once it expires."""
+        store = TicketStore(ttl_seconds=0.01)
+        question = asyncio.Event()
+
+        async def wait_forever():
+            await question.wait()
+
+        ticket_id = store.submit(wait_forever())
+        await asyncio.sleep(0.05)
+
+        assert len(store) == 0
+        assert (await store.collect(ticket_id))["status"] == "not_found"
+
+    @pytest.mark.asyncio
+    async def test_cancel_all_waits_for_questions_to_close(self):
+        """Test that cancelling every ticket lets each question clean up first."""
+        store = TicketStore()
+        withdrawn = []
+
+        async def withdraw_when_cancelled(name):
+            try:
+                await asyncio.Event().wait()
+            finally:
+                withdrawn.append(name)
+
+        first = store.submit(withdraw_when_cancelled("first"))
+        store.submit(withdraw_when_cancelled("second"))
+        await asyncio.sleep(0)
+
+        await store.cancel_all()
+
+        assert sorted(withdrawn) == ["first", "second"]
+        assert len(store) == 0
+        assert (await store.collect(first))["status"] == "not_found"